@@ -0,0 +1,191 @@
+"""Benchmark runner: per-phase timings & memory peaks of the Saga workloads.
+
+Every workload is a script of this directory, plus "generated", a large
+synthetic program (tools/bench_parse_memory.py's) that mostly weighs on
+lexing & parsing. Each (workload, backend) pair runs in a fresh process:
+the phases (lex, parse, optimize, resolve, then compile for the VM and
+execute) are timed separately, best of --repeat, and one more run under
+tracemalloc gives the peak of each phase. A phase's peak includes what the
+earlier phases still hold (the AST, the resolution...). Program output is
+discarded.
+
+--json writes the results to a file, --baseline compares them with an
+earlier one & exits with status 1 when a total time or peak grew by more
+than --threshold, e.g. to check a commit against its parent:
+
+    git checkout HEAD~1 && python benchmarks/run.py --json before.json
+    git checkout - && python benchmarks/run.py --baseline before.json
+
+usage: python benchmarks/run.py [workload ...] [--backend {tree,closure,vm,all}] [--repeat N]
+                                [--json FILE] [--baseline FILE] [--threshold RATIO]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parent
+ROOT = BENCHMARKS.parent
+
+BACKENDS = ("tree", "closure", "vm")
+GENERATED = "generated"
+# Lines of the generated workload
+GENERATED_LINES = 20_000
+
+WORKLOADS = sorted(path.stem for path in BENCHMARKS.glob("*.saga")) + [GENERATED]
+
+
+def workload_source(name: str) -> str:
+    if name == GENERATED:
+        sys.path.insert(0, str(ROOT / "tools"))
+        from bench_parse_memory import synthetic_script
+        return synthetic_script(GENERATED_LINES)
+    return (BENCHMARKS / f"{name}.saga").read_text()
+
+
+def measure(name: str, backend: str, repeat: int) -> dict:
+    """Runs in a fresh process, the interpreter & error state start clean"""
+    sys.path.insert(0, str(ROOT / "saga"))
+    from lexer.lexer import Lexer
+    from parser.parser import Parser
+    from optimizer.optimizer import Optimizer
+    from resolver.resolver import Resolver, Resolution
+    from interpreter.interpreter import Interpreter
+    from interpreter.closure_interpreter import ClosureInterpreter
+    from compiler.compiler import Compiler
+    from vm.vm import VM
+    from errors.errors import Diagnostics
+
+    source = workload_source(name)
+
+    def run_once(phase):
+        """Runs every phase through phase(name, function), which returns the function's result"""
+        diagnostics = Diagnostics()
+        tokens = phase("lex", lambda: Lexer(source, diagnostics).lex_tokens())
+        statements = phase("parse", lambda: Parser(tokens, diagnostics).parse())
+        del tokens
+        statements = phase("optimize", lambda: Optimizer().optimize(statements))
+
+        def resolve():
+            resolution = Resolution()
+            Resolver(resolution, diagnostics).resolve(statements)
+            return resolution
+        resolution = phase("resolve", resolve)
+        if diagnostics.had_error:
+            raise SystemExit(f"{name} doesn't compile")
+
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            if backend == "vm":
+                function = phase("compile", lambda: Compiler(diagnostics).compile(statements))
+                phase("execute", lambda: VM().interpret(function, diagnostics))
+            else:
+                interpreter = Interpreter() if backend == "tree" else ClosureInterpreter()
+                resolution.apply(interpreter)
+                phase("execute", lambda: interpreter.interpret(statements, diagnostics))
+        if diagnostics.had_runtime_error:
+            raise SystemExit(f"{name} failed on the {backend} backend")
+
+    times: dict[str, float] = {}
+    for _ in range(repeat):
+        def timed(phase_name, function):
+            start = time.perf_counter()
+            result = function()
+            seconds = time.perf_counter() - start
+            times[phase_name] = min(seconds, times.get(phase_name, seconds))
+            return result
+        run_once(timed)
+
+    peaks: dict[str, int] = {}
+
+    def traced(phase_name, function):
+        tracemalloc.reset_peak()
+        result = function()
+        peaks[phase_name] = tracemalloc.get_traced_memory()[1]
+        return result
+    tracemalloc.start()
+    run_once(traced)
+    tracemalloc.stop()
+
+    return {"phases": times, "peaks": peaks, "total": sum(times.values()), "peak": max(peaks.values())}
+
+
+def run_measurement(name: str, backend: str, repeat: int) -> dict:
+    command = [sys.executable, __file__, "--measure", name, backend, "--repeat", str(repeat)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        sys.exit(completed.stderr.strip() or f"{name} ({backend}) failed")
+    return json.loads(completed.stdout)
+
+
+def commit() -> str | None:
+    completed = subprocess.run(["git", "-C", str(ROOT), "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return completed.stdout.strip() if completed.returncode == 0 else None
+
+
+def report(key: str, result: dict):
+    phases = " ".join(f"{phase} {seconds * 1000:.1f}" for phase, seconds in result["phases"].items())
+    print(f"{key:<24} {result['total']:>8.3f}s {result['peak'] / 2**20:>8.2f} MiB   ms: {phases}")
+
+
+def compare(baseline: dict, results: dict, threshold: float) -> bool:
+    """Prints how each total & peak moved since the baseline, returns whether any regressed"""
+    regressed = False
+    print(f"\ncompared with {baseline.get('commit') or 'baseline'} (threshold {threshold:.0%})")
+    for key, result in results.items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        for metric, unit, scale in (("total", "s", 1), ("peak", " MiB", 2**20)):
+            change = result[metric] / before[metric] - 1 if before[metric] else 0.0
+            flag = ""
+            if change > threshold:
+                flag, regressed = "  REGRESSION", True
+            print(f"{key:<24} {metric:<5} {before[metric] / scale:>9.3f}{unit} -> "
+                  f"{result[metric] / scale:>9.3f}{unit} {change:>+7.1%}{flag}")
+    return regressed
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("workloads", nargs="*", metavar="workload", help=f"any of {', '.join(WORKLOADS)} (default: all)")
+    arg_parser.add_argument("--backend", choices=BACKENDS + ("all",), default="all")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--json", metavar="FILE", help="write the results as JSON")
+    arg_parser.add_argument("--baseline", metavar="FILE", help="JSON of an earlier run to compare with")
+    arg_parser.add_argument("--threshold", type=float, default=0.10,
+                            help="relative growth of a total or peak reported as a regression (default 0.10)")
+    arg_parser.add_argument("--measure", nargs=2, metavar=("WORKLOAD", "BACKEND"), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(*args.measure, args.repeat)))
+        sys.exit()
+
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        arg_parser.error(f"unknown workload {', '.join(unknown)}, expected any of {', '.join(WORKLOADS)}")
+
+    backends = BACKENDS if args.backend == "all" else (args.backend,)
+    results = {}
+    for name in args.workloads or WORKLOADS:
+        for backend in backends:
+            key = f"{name}/{backend}"
+            results[key] = run_measurement(name, backend, args.repeat)
+            report(key, results[key])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"commit": commit(), "python": platform.python_version(), "repeat": args.repeat,
+                       "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,62 @@
+"""Startup regression benchmark: wall time of `saga -c 'say 1'` against a budget.
+
+Each backend runs the one-line program --runs times in a fresh process,
+the median wall time has to stay under --budget-ms or the benchmark exits
+with status 1. A bare `python -c pass` is timed alongside, what's above it
+is SAGA's own startup: imports, the native globals & the run. See
+`saga --startup-profile -c 'say 1'` for where it goes.
+
+usage: python benchmarks/startup.py [--backend {tree,closure,vm,all}] [--runs N] [--budget-ms MS]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+MAIN = Path(__file__).resolve().parent.parent / "saga" / "cmd" / "main.py"
+
+BACKENDS = ("tree", "closure", "vm")
+PROGRAM = "say 1"
+# Median wall time allowed to a launch, with room for a noisy machine
+BUDGET_MS = 60.0
+
+
+def launch_times(command: list[str], runs: int, expected: str = None) -> list[float]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if completed.returncode != 0 or (expected is not None and completed.stdout != expected):
+            sys.exit(f"{' '.join(command)} failed:\n{completed.stdout}{completed.stderr}")
+    return times
+
+
+def report(label: str, times: list[float], budget_ms: float = None) -> bool:
+    """Prints the best & median launch, returns whether the median went over the budget"""
+    median_ms = statistics.median(times) * 1000
+    over = budget_ms is not None and median_ms > budget_ms
+    flag = f"  REGRESSION (budget {budget_ms:.0f} ms)" if over else ""
+    print(f"{label:<28} best {min(times) * 1000:>7.1f} ms  median {median_ms:>7.1f} ms{flag}")
+    return over
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--backend", choices=BACKENDS + ("all",), default="all")
+    arg_parser.add_argument("--runs", type=int, default=20)
+    arg_parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                            help=f"median wall time of a launch reported as a regression above it (default {BUDGET_MS:.0f})")
+    args = arg_parser.parse_args()
+
+    report("python -c pass", launch_times([sys.executable, "-c", "pass"], args.runs))
+
+    regressed = False
+    for backend in BACKENDS if args.backend == "all" else (args.backend,):
+        command = [sys.executable, str(MAIN), "--backend", backend, "-c", PROGRAM]
+        regressed |= report(f"saga -c '{PROGRAM}' ({backend})", launch_times(command, args.runs, "1\n"), args.budget_ms)
+
+    if regressed:
+        sys.exit(1)
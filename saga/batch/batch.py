@@ -0,0 +1,98 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.engine import Engine, CompileError
+from errors.errors import Diagnostics, RuntimeError
+
+# Exit code of each script, as run_file would have exited
+OK = 0
+COMPILE_ERROR = 65
+NO_INPUT = 66
+RUNTIME_ERROR = 70
+
+# Engine of a worker process, created once by start_worker
+engine: Engine = None
+
+
+def expand(patterns: list[str]) -> list[str]:
+    """Scripts named by files & globs, in order & without duplicates"""
+    scripts = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            scripts.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            scripts.append(pattern)
+    return list(dict.fromkeys(scripts))
+
+
+def start_worker(backend: str):
+    global engine
+    engine = Engine(backend)
+
+
+def record(script: str, exit_code: int, stdout: str, diagnostics: list, start: float) -> dict:
+    return {"script": script, "exit_code": exit_code, "stdout": stdout,
+            "diagnostics": [diagnostic.to_dict() for diagnostic in diagnostics],
+            "seconds": time.perf_counter() - start}
+
+
+def run_script(script: str) -> dict:
+    """Compiles & runs one script on the worker's engine, its stdout as the command line would print it"""
+    start = time.perf_counter()
+    try:
+        with open(script) as f:
+            source = f.read()
+    except OSError as error:
+        return record(script, NO_INPUT, f"Error: running file {error}\n", [], start)
+
+    try:
+        program = engine.compile(source)
+    except CompileError as error:
+        return record(script, COMPILE_ERROR, "".join(message + "\n" for message in error.messages),
+                      error.diagnostics, start)
+
+    try:
+        result = program.run()
+    except Exception as error:
+        # One script mustn't take the batch down, nor leave its worker an engine in an unknown state
+        start_worker(engine.backend)
+        return record(script, RUNTIME_ERROR, f"Error: running file {error}\n", [], start)
+
+    if result.ok:
+        return record(script, OK, result.output, [], start)
+    if not isinstance(result.error, RuntimeError):
+        # A native's own Python error, there's no position to report it at
+        return record(script, RUNTIME_ERROR, result.output + f"Error: running file {result.error}\n", [], start)
+
+    diagnostics = Diagnostics(echo=False)
+    diagnostics.runtime_error(result.error)
+    stdout = result.output + "".join(f"{diagnostic}\n" for diagnostic in diagnostics.entries)
+    return record(script, RUNTIME_ERROR, stdout, diagnostics.entries, start)
+
+
+def run_batch(patterns: list[str], backend: str, jobs: int = None) -> dict:
+    """Runs every script over a pool of warm worker processes, returns the JSON summary.
+
+    Each worker imports the interpreter once & keeps an Engine around, so a
+    script only costs its own compilation & run. Scripts are handed out in
+    chunks to keep the inter-process traffic down, the results come back in
+    the order the scripts were given.
+    """
+    scripts = expand(patterns)
+    jobs = jobs if jobs is not None else os.cpu_count() or 1
+    chunksize = max(1, len(scripts) // (jobs * 4))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=start_worker, initargs=(backend,)) as executor:
+        results = list(executor.map(run_script, scripts, chunksize=chunksize))
+
+    return {
+        "backend": backend,
+        "jobs": jobs,
+        "scripts": len(results),
+        "failed": sum(result["exit_code"] != OK for result in results),
+        "seconds": time.perf_counter() - start,
+        "results": results,
+    }
@@ -0,0 +1,93 @@
+import os
+import sys
+import pickle
+import hashlib
+
+# Like __pycache__, entries live next to the script they were parsed from
+CACHE_DIR = "__sagacache__"
+MAGIC = b"SAGC"
+
+# What decides an entry's content, relative to saga/: the lexer, parser &
+# optimizer build the AST (folding with the interpreter's operators), expr &
+# stmt define it, the resolver what's recorded about it & saga.py chains them
+FRONT_END = ("lexer", "parser", "expr", "stmt", "optimizer", "interpreter", "resolver", "cache", "saga.py")
+
+# Digest of the front end this process runs, see front_end_digest
+front_end: bytes = None
+
+
+def cache_path(script: str) -> str:
+    # os.path rather than pathlib, which costs more to import than a cache hit saves
+    directory, name = os.path.split(script)
+    return os.path.join(directory, CACHE_DIR, f"{name}.{sys.implementation.cache_tag}.sagac")
+
+
+def front_end_digest() -> bytes:
+    """Fingerprint of the front end's modules & the Python running them.
+
+    Like __pycache__ checking its sources, a module counts by its size &
+    modification time, stat-ing them is cheaper than reading them. Computed
+    once per process: the code it describes is the code already imported.
+    """
+    global front_end
+    if front_end is None:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        digest = hashlib.sha256(sys.implementation.cache_tag.encode())
+        for entry in FRONT_END:
+            path = os.path.join(root, entry)
+            try:
+                names = sorted(name for name in os.listdir(path) if name.endswith(".py")) if os.path.isdir(path) else [""]
+                for name in names:
+                    stat = os.stat(os.path.join(path, name) if name else path)
+                    digest.update(f"{entry}/{name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+            except OSError:
+                digest.update(f"{entry}:missing\n".encode())
+        front_end = digest.digest()
+    return front_end
+
+
+def header(source: str) -> bytes:
+    """Identifies what an entry was built from: the front end & a hash of the source"""
+    digest = hashlib.sha256(source.encode("utf-8")).digest()
+    return MAGIC + front_end_digest() + digest
+
+
+def load(script: str, source: str):
+    """The program cached for this exact source, None on a miss or a stale entry"""
+    try:
+        with open(cache_path(script), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    expected = header(source)
+    if not data.startswith(expected):
+        return None
+
+    try:
+        return pickle.loads(data[len(expected):])
+    except Exception:
+        # Truncated or otherwise unreadable, it gets rewritten after parsing
+        return None
+
+
+def store(script: str, source: str, program):
+    """Writes the program to the cache, failures are silently ignored like with __pycache__"""
+    try:
+        data = header(source) + pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, RecursionError):
+        return
+
+    path = cache_path(script)
+    # Written aside then renamed, a concurrent run never sees half an entry
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
@@ -0,0 +1,54 @@
+import asyncio
+from typing import override
+
+from callables.saga_callable import SAGACallable
+from callables.native_callables import natives
+
+# Natives doing blocking I/O, given async counterparts in async mode
+BLOCKING_NATIVES = ("input", "read_file", "write_file", "append_file", "file_exists", "delete_file")
+
+
+class Suspend(Exception):
+    """Raised by an async native to suspend the VM until its awaitable is done"""
+
+    def __init__(self, awaitable):
+        self.awaitable = awaitable
+
+
+class AsyncCallable(SAGACallable):
+    """Async counterpart of a blocking native.
+
+    On a VM running a program with run_program_async, calling it suspends
+    the VM: the call raises Suspend, the VM's frames & stack stay as they
+    are while the event loop awaits call_async, & the result is pushed as
+    the call's value once the VM resumes. Anywhere else (the tree
+    interpreters, a native calling back into SAGA code) it just does the
+    blocking call.
+    """
+
+    def __init__(self, native: SAGACallable):
+        self.native = native
+
+    @override
+    def arity(self):
+        return self.native.arity()
+
+    def call(self, interpreter, arguments):
+        if getattr(interpreter, "suspendable", False):
+            raise Suspend(self.call_async(interpreter, arguments))
+        return self.native.call(interpreter, arguments)
+
+    async def call_async(self, interpreter, arguments):
+        # The blocking call goes to the default thread pool, the loop runs other programs meanwhile
+        return await asyncio.to_thread(self.native.call, interpreter, arguments)
+
+    def __str__(self):
+        return "<native fn>"
+
+
+def async_natives() -> dict[str, SAGACallable]:
+    """The natives every SAGA program starts with, the blocking ones replaced by their async counterparts"""
+    globals = natives()
+    for name in BLOCKING_NATIVES:
+        globals[name] = AsyncCallable(globals[name])
+    return globals
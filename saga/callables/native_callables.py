@@ -1,7 +1,8 @@
 from typing import override
-from time import time
-import random
-import sys
+from time import time, sleep
+
+from interpreter.completion import Yield
+from errors.errors import RuntimeError as SAGARuntimeError
 
 from callables.saga_callable import SAGACallable
 
@@ -24,6 +25,8 @@ class RandomCallable(SAGACallable):
         return 0
     
     def call(self, interpreter, arguments):
+        # Imported on first use like os below, most programs never draw a number
+        import random
         return random.random()
     
     def __str__(self):
@@ -39,6 +42,7 @@ class RandomIntCallable(SAGACallable):
     def call(self, interpreter, arguments):
         min_val = int(arguments[0])
         max_val = int(arguments[1])
+        import random
         return random.randint(min_val, max_val)
     
     def __str__(self):
@@ -52,6 +56,8 @@ class InputCallable(SAGACallable):
         return -1  # variadic: 0 or 1 argument
     
     def call(self, interpreter, arguments):
+        # The prompt & what was said before it have to show up first
+        interpreter.output.flush()
         if len(arguments) == 0:
             return input()
         elif len(arguments) == 1:
@@ -158,3 +164,38 @@ class DeleteFileCallable(SAGACallable):
     def __str__(self):
         return "<native fn>"
 
+
+class SleepCallable(SAGACallable):
+    """Waits for a number of seconds, the VM runs the program's other tasks meanwhile"""
+    @override
+    def arity(self):
+        return 1
+
+    def call(self, interpreter, arguments):
+        seconds = arguments[0]
+        if type(seconds) not in (int, float) or seconds < 0:
+            # Positioned at the call by the backend running it
+            raise SAGARuntimeError(None, "sleep() takes a number of seconds.")
+        if getattr(interpreter, "switchable", False):
+            raise Yield(seconds)
+        # No tasks on the tree interpreters, nothing else to run
+        sleep(seconds)
+
+    def __str__(self):
+        return "<native fn>"
+
+
+def natives() -> dict[str, SAGACallable]:
+    """The native functions every SAGA program starts with, keyed by their global name"""
+    return {
+        "clock": ClockCallable(),
+        "random": RandomCallable(),
+        "random_int": RandomIntCallable(),
+        "input": InputCallable(),
+        "read_file": ReadFileCallable(),
+        "write_file": WriteFileCallable(),
+        "append_file": AppendFileCallable(),
+        "file_exists": FileExistsCallable(),
+        "delete_file": DeleteFileCallable(),
+        "sleep": SleepCallable(),
+    }
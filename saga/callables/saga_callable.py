@@ -2,8 +2,8 @@ from abc import ABC, abstractmethod
 from typing import override
 
 from stmt.stmt import Function
-from environment.environment import Environment
-from errors.errors import ReturnException
+from environment.environment import Environment, Frame
+from interpreter.completion import TailCall
 
 class SAGACallable(ABC):
 
@@ -17,22 +17,41 @@ class SAGACallable(ABC):
 
 class SAGAFunction(SAGACallable):
 
-    def __init__(self, declaration: Function, closure: Environment):
+    def __init__(self, declaration: Function, closure: Environment, slot_count: int):
         self.declaration = declaration
         self.closure = closure
+        self.body = declaration.body
+        # The other locals of the function, after its parameters
+        self.padding = [None] * (slot_count - len(declaration.params))
     
     @override
     def call(self, interpreter, arguments):
-        env: Environment = Environment(self.closure)
-        for i in range(len(self.declaration.params)):
-            env.define(self.declaration.params[i].lexeme, arguments[i])
-        
-        try:
-            interpreter.execute_block(self.declaration.body, env)
-        except ReturnException as return_value:
-            return return_value.value
+        function: SAGAFunction = self
+        previous: Environment = interpreter.env
 
-        return None
+        # Each iteration runs a tail call of the previous one
+        while True:
+            # The (freshly built) argument list becomes the frame's slot array,
+            # parameters take its first slots
+            arguments += function.padding
+            frame: Frame = Frame(function.closure, arguments)
+
+            # execute_block inlined, this is the hottest path of recursive code
+            interpreter.env = frame
+            try:
+                for statement in function.body:
+                    signal = statement.accept(interpreter)
+                    if signal is not None:
+                        break
+                else:
+                    return None
+            finally:
+                interpreter.env = previous
+
+            # break & continue can't leave a function, it's a return
+            if type(signal) is not TailCall:
+                return signal.value
+            function, arguments = signal.function, signal.arguments
     
     @override
     def arity(self):
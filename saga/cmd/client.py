@@ -0,0 +1,20 @@
+"""Thin client of `saga serve`: the daemon runs `saga <arguments>` on this process' streams.
+
+Only imports the socket protocol, never the interpreter, so launching it
+costs little more than the Python startup itself.
+
+usage: python saga/cmd/client.py [saga arguments]
+       ($SAGA_SOCKET names the daemon's socket when it wasn't started on the default one)
+"""
+import sys
+import os.path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.client import forward
+
+if __name__ == "__main__":
+    try:
+        sys.exit(forward(sys.argv[1:]))
+    except OSError as err:
+        sys.exit(f"Error: reaching saga serve {err}")
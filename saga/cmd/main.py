@@ -1,22 +1,115 @@
 import sys
-from pathlib import Path
+import os.path
+import argparse
 
-parent_dir = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(parent_dir))
+# os.path rather than pathlib, which would be imported for this line alone
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
 
-from saga import run_file, run_prompt
+from saga import run_file, run_source, run_prompt, preload, interpreter, output, BACKENDS, TREE
 
-if __name__ == "__main__":
-    args = sys.argv
-    argn = len(args)
 
-    if argn > 2:
-        sys.exit("Usage: saga [script]")
-    elif argn == 2:
+def run_server(argv: list[str]):
+    arg_parser = argparse.ArgumentParser(prog="saga serve")
+    arg_parser.add_argument("--socket", metavar="PATH",
+                            help="Unix socket to listen on, $SAGA_SOCKET or saga-<uid>.sock in $XDG_RUNTIME_DIR by default")
+    args = arg_parser.parse_args(argv)
+    # Workers are forked with every backend already built
+    preload()
+    # Only imported when asked for, like the profiler
+    from server.server import serve
+    serve(main, args.socket)
+
+
+def main(argv: list[str] = None):
+    """Command line entry point, also what a saga serve worker runs"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        run_server(argv[1:])
+        return
+
+    arg_parser = argparse.ArgumentParser(prog="saga", usage="saga [--backend {tree,closure,vm}] [--profile] [--node-counts FILE] [--line-buffered] [--startup-profile] [script | -c source]\n"
+                                                           "       saga --batch [--backend {tree,closure,vm}] [--jobs N] [--summary FILE] script|glob ...\n"
+                                                           "       saga serve [--socket PATH]")
+    arg_parser.add_argument("scripts", nargs="*", metavar="script", help="SAGA script to run, starts the REPL when omitted")
+    arg_parser.add_argument("-c", dest="source", metavar="source", help="run the program given as a string")
+    arg_parser.add_argument("--backend", choices=BACKENDS,
+                            help="tree-walk interpreter (default, the VM for programs using spawn & yield), closure compiler or bytecode VM")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="sample the script, report time & calls per function and line")
+    arg_parser.add_argument("--profile-output", metavar="FILE",
+                            help="collapsed stack file for flamegraph tools, <script>.collapsed by default")
+    arg_parser.add_argument("--node-counts", metavar="FILE",
+                            help="write how many times each AST node ran as JSON keyed by line:column (tree backend)")
+    arg_parser.add_argument("--line-buffered", action="store_true",
+                            help="write each line as soon as it's said, the default on a terminal")
+    arg_parser.add_argument("--startup-profile", action="store_true",
+                            help="run again under -X importtime, report the wall time & the slowest imports to stderr")
+    arg_parser.add_argument("--batch", action="store_true",
+                            help="run every script (files or globs) over a pool of processes, print a JSON summary")
+    arg_parser.add_argument("--jobs", type=int, metavar="N", help="worker processes of --batch, one per core by default")
+    arg_parser.add_argument("--summary", metavar="FILE", help="write the --batch summary to FILE instead of stdout")
+    args = arg_parser.parse_args(argv)
+
+    if args.startup_profile:
+        # Only imported when asked for, like the profiler
+        from profiler.startup import profile_startup
+        sys.exit(profile_startup(__file__, [arg for arg in argv if arg != "--startup-profile"]))
+
+    if args.batch:
+        if not args.scripts:
+            arg_parser.error("--batch needs scripts")
+        if args.jobs is not None and args.jobs < 1:
+            arg_parser.error("--jobs needs at least one worker process")
+        # Only imported when asked for, like the profiler
+        import json
+        from batch.batch import run_batch
+        summary = run_batch(args.scripts, args.backend or TREE, args.jobs)
+        if args.summary:
+            with open(args.summary, "w") as f:
+                json.dump(summary, f, indent=2)
+        else:
+            print(json.dumps(summary, indent=2))
+        sys.exit(1 if summary["failed"] else 0)
+
+    if len(args.scripts) > 1:
+        arg_parser.error("running several scripts needs --batch")
+    args.script = args.scripts[0] if args.scripts else None
+    if args.source is not None and args.script:
+        arg_parser.error("-c & a script can't be run together")
+
+    if args.profile and not args.script:
+        arg_parser.error("--profile needs a script")
+    if args.node_counts and (not args.script or args.backend not in (None, TREE)):
+        arg_parser.error("--node-counts needs a script run by the tree backend")
+    if args.node_counts:
+        args.backend = TREE
+        interpreter.instrument().enable_counters()
+    # Also decided again in a worker of saga serve, its stdout is the client's
+    output.line_buffered = args.line_buffered or sys.stdout.isatty()
+
+    if args.script:
         try:
-            run_file(args[1])
+            if args.profile:
+                # Only imported when asked for, the profiler costs nothing otherwise
+                from profiler.profiler import Profiler
+                with Profiler(args.script, args.backend, args.profile_output):
+                    run_file(args.script, backend=args.backend)
+            else:
+                run_file(args.script, backend=args.backend)
         except Exception as err:
             sys.exit(f"Error: running file {err}")
+        finally:
+            # Also written when the script stops on an error
+            if args.node_counts:
+                interpreter.instrumentation.dump_node_counts(args.node_counts)
+    elif args.source is not None:
+        run_source(args.source, backend=args.backend)
     else:
-        run_prompt()
-        
\ No newline at end of file
+        # Every line runs on the same backend, whatever it uses
+        run_prompt(backend=args.backend or TREE)
+        
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from lexer.token import Token
+
+from compiler.opcode import OpCode
+
+
+class Chunk:
+    """A flat array of (opcode, operand) instructions.
+
+    Like CPython's wordcode every instruction takes exactly one slot, so the VM
+    fetches an opcode and its operand with a single index. Constants and
+    variable names are the operands themselves rather than indexes into a pool.
+    """
+
+    def __init__(self):
+        self.code: list[tuple[OpCode, any]] = []
+        # tokens[i] is the token instruction i reports runtime errors at
+        self.tokens: list[Token] = []
+
+    def write(self, op: OpCode, arg: any = None, token: Token = None):
+        self.code.append((op, arg))
+        self.tokens.append(token)
+
+    def disassemble(self, name: str) -> str:
+        """Human readable listing of the chunk, handy when debugging the compiler"""
+        lines = [f"== {name} =="]
+        for index, (op, arg) in enumerate(self.code):
+            if op == OpCode.CLOSURE:
+                function, captures = arg
+                upvalues = [f"{'local' if is_local else 'upvalue'} {i}" for is_local, i in captures]
+                operand = " ".join([str(function)] + upvalues)
+            elif arg is None:
+                operand = ""
+            else:
+                operand = repr(arg)
+            lines.append(f"{index:04} {OpCode(op).name:<25} {operand}".rstrip())
+        return "\n".join(lines)
+
+
+class CompiledFunction:
+    """The compiled form of a SAGA function, shared by every closure created from it"""
+
+    def __init__(self, name: str = None, arity: int = 0, line: int = None):
+        self.name = name
+        self.arity = arity
+        # Line of the declaration, None for the top-level script
+        self.line = line
+        self.chunk = Chunk()
+
+    def __str__(self):
+        if self.name is None:
+            return "<script>"
+        return f"<fn {self.name}>"
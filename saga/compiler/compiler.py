@@ -0,0 +1,561 @@
+from typing import override
+
+import expr.expr as expr
+from expr.expr import Expr, Assign, Binary, Call, Grouping, Literal, Logical, Ternary, Unary, Variable
+
+import stmt.stmt as stmt
+from stmt.stmt import Stmt, Block, Expression, Function, Class, If, Say, Return, Let, While, ForRange, Break, Continue, Pass, Spawn, Yield
+
+from lexer.token import Token
+from lexer.token_type import TokenType
+
+from errors.errors import Diagnostics, COMPILE
+
+from compiler.opcode import OpCode
+from compiler.chunk import CompiledFunction
+
+BINARY_OPCODES = {
+    TokenType.COMMA: OpCode.COMMA,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.STAR: OpCode.MULTIPLY,
+}
+
+# Comparisons used as branch conditions jump directly instead of pushing a boolean
+CONDITIONAL_JUMPS = {
+    TokenType.LESS: OpCode.JUMP_IF_NOT_LESS,
+    TokenType.LESS_EQUAL: OpCode.JUMP_IF_NOT_LESS_EQUAL,
+    TokenType.GREATER: OpCode.JUMP_IF_NOT_GREATER,
+    TokenType.GREATER_EQUAL: OpCode.JUMP_IF_NOT_GREATER_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.JUMP_IF_NOT_EQUAL,
+    TokenType.BANG_EQUAL: OpCode.JUMP_IF_EQUAL,
+}
+
+CONSTANT_OPCODES = {
+    TokenType.PLUS: OpCode.ADD_CONSTANT,
+    TokenType.MINUS: OpCode.SUBTRACT_CONSTANT,
+    TokenType.STAR: OpCode.MULTIPLY_CONSTANT,
+}
+
+
+class Local:
+    def __init__(self, name: str, depth: int, slot: int):
+        self.name = name
+        self.depth = depth
+        self.slot = slot
+        self.initialized = False
+
+
+class Loop:
+    def __init__(self, start: int, slot_count: int):
+        self.start = start
+        self.slot_count = slot_count
+        self.break_jumps: list[int] = []
+
+
+class FunctionState:
+    """Compilation state of the function currently being compiled (clox's Compiler struct)"""
+
+    def __init__(self, enclosing: "FunctionState", function: CompiledFunction):
+        self.enclosing = enclosing
+        self.function = function
+        self.locals: list[Local] = []
+        self.upvalues: list[tuple[bool, int]] = []
+        self.loops: list[Loop] = []
+        self.scope_depth = 0
+        # slot 0 of every frame holds the callee itself
+        self.slot_count = 1
+        # first slot of each open scope and the next one it has not handed out yet
+        self.scope_starts: list[int] = []
+        self.scope_slots: list[int] = []
+
+
+class Compiler(expr.Visitor, stmt.Visitor):
+    """Lowers the parsed Stmt/Expr trees into bytecode for the VM.
+
+    Scoping mirrors the tree-walk Interpreter: blocks, while bodies and function
+    bodies open a scope while if branches run in the enclosing one. Every local a
+    scope can declare gets its stack slot reserved when the scope is entered, so
+    slots stay fixed whichever if branches end up running.
+    """
+
+    def __init__(self, diagnostics: Diagnostics = None):
+        self.state: FunctionState = None
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
+
+    def compile(self, statements: list[Stmt]) -> CompiledFunction:
+        """Compiles a whole program into a script function taking no arguments"""
+        self.state = FunctionState(None, CompiledFunction())
+        for statement in statements:
+            self.compile_stmt(statement)
+        self.emit_return()
+        return self.state.function
+
+    def compile_expression(self, expression: Expr) -> CompiledFunction:
+        """Compiles a single expression into a script returning its value (used by the REPL)"""
+        self.state = FunctionState(None, CompiledFunction())
+        self.compile_expr(expression)
+        self.emit(OpCode.RETURN)
+        return self.state.function
+
+    def compile_stmt(self, statement: Stmt):
+        # The parser leaves None behind for statements it had to skip
+        if statement is not None:
+            statement.accept(self)
+
+    def compile_expr(self, expression: Expr):
+        expression.accept(self)
+
+    ### emission helpers ###
+
+    @property
+    def chunk(self):
+        return self.state.function.chunk
+
+    def emit(self, op: OpCode, arg: any = None, token: Token = None):
+        self.chunk.write(op, arg, token)
+
+    def emit_jump(self, op: OpCode, token: Token = None) -> int:
+        """Emits a jump with a placeholder target and returns its index for patching"""
+        self.emit(op, None, token=token)
+        return len(self.chunk.code) - 1
+
+    def patch_jump(self, index: int):
+        """Points the jump at index to the next instruction to be emitted"""
+        op, _ = self.chunk.code[index]
+        self.chunk.code[index] = (op, len(self.chunk.code))
+
+    def emit_return(self):
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+    ### scopes & variables ###
+
+    def count_declarations(self, statements: list[Stmt]) -> int:
+        """Number of locals the statements declare directly in the current scope"""
+        count = 0
+        for statement in statements:
+            if isinstance(statement, (Let, Function, Class)):
+                count += 1
+            elif isinstance(statement, If):
+                count += self.count_declarations(self.branch_statements(statement.then_branch))
+                count += self.count_declarations(self.branch_statements(statement.else_branch))
+            elif isinstance(statement, While) and not isinstance(statement.body, Block):
+                count += self.count_declarations([statement.body])
+        return count
+
+    def branch_statements(self, branch: Stmt) -> list[Stmt]:
+        if branch is None:
+            return []
+        if isinstance(branch, Block):
+            return branch.statements
+        return [branch]
+
+    def begin_scope(self, statements: list[Stmt]):
+        state = self.state
+        state.scope_depth += 1
+        state.scope_starts.append(state.slot_count)
+        state.scope_slots.append(state.slot_count)
+        count = self.count_declarations(statements)
+        if count:
+            self.emit(OpCode.RESERVE, count)
+            state.slot_count += count
+
+    def end_scope(self):
+        state = self.state
+        first_slot = state.scope_starts.pop()
+        state.scope_slots.pop()
+        while state.locals and state.locals[-1].depth == state.scope_depth:
+            state.locals.pop()
+        state.scope_depth -= 1
+
+        count = state.slot_count - first_slot
+        if count:
+            self.emit(OpCode.END_SCOPE, count)
+            state.slot_count = first_slot
+
+    def declare_local(self, name: Token, parameter: bool = False) -> Local:
+        state = self.state
+        for local in reversed(state.locals):
+            if local.depth < state.scope_depth:
+                break
+            if local.name == name.lexeme:
+                if parameter:
+                    # Arguments are bound to the parameters' slots by position
+                    self.diagnostics.error(name, "Already a parameter with this name.", COMPILE)
+                    break
+                # Declaring the name again rebinds it in its slot, as the resolver does
+                return local
+
+        local = Local(name.lexeme, state.scope_depth, state.scope_slots[-1])
+        state.scope_slots[-1] += 1
+        state.locals.append(local)
+        return local
+
+    def define_variable(self, name: Token, local: Local):
+        """Stores the value on top of the stack into the freshly declared variable"""
+        if local is None:
+            self.emit(OpCode.DEFINE_GLOBAL, name.lexeme, token=name)
+        else:
+            local.initialized = True
+            self.emit(OpCode.STORE_LOCAL, local.slot)
+
+    def resolve_local(self, state: FunctionState, name: Token) -> int:
+        for local in reversed(state.locals):
+            if local.name == name.lexeme:
+                if not local.initialized:
+                    self.diagnostics.error(name, "Can't read local variable in its own initializer.", COMPILE)
+                return local.slot
+        return None
+
+    def resolve_upvalue(self, state: FunctionState, name: Token) -> int:
+        if state.enclosing is None:
+            return None
+
+        slot = self.resolve_local(state.enclosing, name)
+        if slot is not None:
+            return self.add_upvalue(state, True, slot)
+
+        index = self.resolve_upvalue(state.enclosing, name)
+        if index is not None:
+            return self.add_upvalue(state, False, index)
+
+        return None
+
+    def add_upvalue(self, state: FunctionState, is_local: bool, index: int) -> int:
+        upvalue = (is_local, index)
+        if upvalue in state.upvalues:
+            return state.upvalues.index(upvalue)
+        state.upvalues.append(upvalue)
+        return len(state.upvalues) - 1
+
+    def named_variable(self, name: Token, ops: tuple[OpCode, OpCode, OpCode]):
+        """Emits the local, upvalue or global flavour of a variable access"""
+        local_op, upvalue_op, global_op = ops
+
+        slot = self.resolve_local(self.state, name)
+        if slot is not None:
+            self.emit(local_op, slot)
+            return
+
+        index = self.resolve_upvalue(self.state, name)
+        if index is not None:
+            self.emit(upvalue_op, index)
+            return
+
+        self.emit(global_op, name.lexeme, token=name)
+
+    def unwind_to(self, loop: Loop):
+        """Drops the locals of every scope opened inside the loop before jumping out of them"""
+        count = self.state.slot_count - loop.slot_count
+        if count:
+            self.emit(OpCode.END_SCOPE, count)
+
+    ### expressions ###
+
+    def compile_condition(self, condition: Expr) -> int:
+        """Compiles a branch condition and returns the jump taken when it is falsy"""
+        if isinstance(condition, Binary) and condition.operator.type in CONDITIONAL_JUMPS:
+            self.compile_expr(condition.left)
+            self.compile_expr(condition.right)
+            return self.emit_jump(CONDITIONAL_JUMPS[condition.operator.type], token=condition.operator)
+
+        self.compile_expr(condition)
+        return self.emit_jump(OpCode.POP_JUMP_IF_FALSE)
+
+    def is_number_literal(self, expression: Expr) -> bool:
+        return (isinstance(expression, Literal) and isinstance(expression.value, (int, float))
+                and not isinstance(expression.value, bool))
+
+    @override
+    def visit_assign(self, assign: Assign):
+        self.compile_expr(assign.value)
+        self.named_variable(assign.name, (OpCode.SET_LOCAL, OpCode.SET_UPVALUE, OpCode.SET_GLOBAL))
+
+    @override
+    def visit_binary(self, binary: Binary):
+        self.compile_expr(binary.left)
+
+        if binary.operator.type in CONSTANT_OPCODES and self.is_number_literal(binary.right):
+            self.emit(CONSTANT_OPCODES[binary.operator.type], binary.right.value, token=binary.operator)
+            return
+
+        self.compile_expr(binary.right)
+
+        if binary.operator.type == TokenType.RANGE:
+            # Ranges only mean something in a for loop header, elsewhere they evaluate to nil
+            self.emit(OpCode.POP)
+            self.emit(OpCode.POP)
+            self.emit(OpCode.NIL)
+            return
+
+        self.emit(BINARY_OPCODES[binary.operator.type], token=binary.operator)
+
+    @override
+    def visit_call(self, call: Call):
+        self.compile_expr(call.callee)
+        for argument in call.arguments:
+            self.compile_expr(argument)
+        self.emit(OpCode.CALL, len(call.arguments), token=call.paren)
+
+    @override
+    def visit_grouping(self, grouping: Grouping):
+        self.compile_expr(grouping.expression)
+
+    @override
+    def visit_literal(self, literal: Literal):
+        if literal.value is None:
+            self.emit(OpCode.NIL)
+        elif literal.value is True:
+            self.emit(OpCode.TRUE)
+        elif literal.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit(OpCode.CONSTANT, literal.value)
+
+    @override
+    def visit_logical(self, logical: Logical):
+        self.compile_expr(logical.left)
+        # Short-circuiting: keep the left operand as the result if it decides the outcome
+        op = OpCode.JUMP_IF_TRUE if logical.operator.type == TokenType.OR else OpCode.JUMP_IF_FALSE
+        end_jump = self.emit_jump(op)
+        self.emit(OpCode.POP)
+        self.compile_expr(logical.right)
+        self.patch_jump(end_jump)
+
+    @override
+    def visit_ternary(self, ternary: Ternary):
+        else_jump = self.compile_condition(ternary.condition)
+        self.compile_expr(ternary.then_branch)
+        end_jump = self.emit_jump(OpCode.JUMP)
+        self.patch_jump(else_jump)
+        self.compile_expr(ternary.else_branch)
+        self.patch_jump(end_jump)
+
+    @override
+    def visit_unary(self, unary: Unary):
+        self.compile_expr(unary.right)
+        match unary.operator.type:
+            case TokenType.MINUS:
+                self.emit(OpCode.NEGATE, token=unary.operator)
+            case TokenType.BANG:
+                self.emit(OpCode.NOT)
+
+    @override
+    def visit_variable(self, variable: Variable):
+        self.named_variable(variable.name, (OpCode.GET_LOCAL, OpCode.GET_UPVALUE, OpCode.GET_GLOBAL))
+
+    ### statements ###
+
+    @override
+    def visit_block(self, block: Block):
+        self.begin_scope(block.statements)
+        for statement in block.statements:
+            self.compile_stmt(statement)
+        self.end_scope()
+
+    @override
+    def visit_expression(self, expression: Expression):
+        if isinstance(expression.expression, Assign):
+            # Assignment statements store without leaving the value behind to pop
+            assign: Assign = expression.expression
+            self.compile_expr(assign.value)
+            self.named_variable(assign.name, (OpCode.STORE_LOCAL, OpCode.STORE_UPVALUE, OpCode.STORE_GLOBAL))
+            return
+
+        self.compile_expr(expression.expression)
+        self.emit(OpCode.POP)
+
+    @override
+    def visit_function(self, function: Function):
+        local = None
+        if self.state.scope_depth > 0:
+            local = self.declare_local(function.name)
+            # A function may refer to itself in its own body
+            local.initialized = True
+
+        self.function_body(function)
+        self.define_variable(function.name, local)
+
+    def function_body(self, function: Function):
+        compiled = CompiledFunction(function.name.lexeme, len(function.params), function.name.line)
+        self.state = FunctionState(self.state, compiled)
+
+        # Parameters and top-level locals of the body share the function scope
+        self.state.scope_depth = 1
+        self.state.scope_starts.append(self.state.slot_count)
+        self.state.scope_slots.append(self.state.slot_count)
+        for param in function.params:
+            self.declare_local(param, parameter=True).initialized = True
+        self.state.slot_count += len(function.params)
+
+        count = self.count_declarations(function.body)
+        if count:
+            self.emit(OpCode.RESERVE, count)
+            self.state.slot_count += count
+
+        for statement in function.body:
+            self.compile_stmt(statement)
+        self.emit_return()
+
+        state = self.state
+        self.state = state.enclosing
+        self.emit(OpCode.CLOSURE, (compiled, tuple(state.upvalues)))
+
+    @override
+    def visit_class(self, saga_class: Class):
+        local = None
+        if self.state.scope_depth > 0:
+            local = self.declare_local(saga_class.name)
+        self.emit(OpCode.CLASS, saga_class.name.lexeme)
+        self.define_variable(saga_class.name, local)
+
+    @override
+    def visit_if(self, stmt: If):
+        else_jump = self.compile_condition(stmt.condition)
+
+        # Branches run in the enclosing scope, just like Interpreter.visit_if
+        for statement in self.branch_statements(stmt.then_branch):
+            self.compile_stmt(statement)
+
+        if stmt.else_branch is None:
+            self.patch_jump(else_jump)
+            return
+
+        end_jump = self.emit_jump(OpCode.JUMP)
+        self.patch_jump(else_jump)
+        for statement in self.branch_statements(stmt.else_branch):
+            self.compile_stmt(statement)
+        self.patch_jump(end_jump)
+
+    @override
+    def visit_say(self, say: Say):
+        self.compile_expr(say.expression)
+        self.emit(OpCode.SAY)
+
+    @override
+    def visit_return(self, stmt: Return):
+        if self.state.enclosing is None:
+            self.diagnostics.error(stmt.keyword, "Can't return from top-level code.", COMPILE)
+
+        if stmt.value is None:
+            self.emit(OpCode.NIL)
+        elif type(stmt.value) is Call:
+            # Nothing runs after a return, calling a function there is a tail
+            # call. Only SAGA closures reuse the frame, any other callee falls
+            # through to the RETURN with its result like after a CALL
+            call: Call = stmt.value
+            self.compile_expr(call.callee)
+            for argument in call.arguments:
+                self.compile_expr(argument)
+            self.emit(OpCode.TAIL_CALL, len(call.arguments), token=call.paren)
+        else:
+            self.compile_expr(stmt.value)
+        self.emit(OpCode.RETURN)
+
+    @override
+    def visit_let(self, let: Let):
+        local = None
+        if self.state.scope_depth > 0:
+            local = self.declare_local(let.name)
+
+        if let.initializer is None:
+            self.emit(OpCode.NIL)
+        else:
+            self.compile_expr(let.initializer)
+        self.define_variable(let.name, local)
+
+    @override
+    def visit_while(self, stmt: While):
+        loop = Loop(len(self.chunk.code), self.state.slot_count)
+        self.state.loops.append(loop)
+
+        exit_jump = self.compile_condition(stmt.condition)
+        self.compile_stmt(stmt.body)
+        self.emit(OpCode.JUMP, loop.start)
+
+        self.patch_jump(exit_jump)
+        for jump in loop.break_jumps:
+            self.patch_jump(jump)
+        self.state.loops.pop()
+
+    @override
+    def visit_forrange(self, stmt: ForRange):
+        state = self.state
+        name: Token = stmt.name
+
+        # The bounds are evaluated once, into an iterator held by a hidden local
+        # right below the loop variable
+        self.compile_expr(stmt.start)
+        self.compile_expr(stmt.end)
+        self.emit(OpCode.FOR_RANGE, token=name)
+        self.emit(OpCode.NIL)
+
+        state.scope_depth += 1
+        state.scope_starts.append(state.slot_count)
+        state.scope_slots.append(state.slot_count)
+        # A name with a space can never be referred to from SAGA code
+        iterator = self.declare_local(Token(TokenType.IDENTIFIER, "for iterator", None, name.line, name.column))
+        iterator.initialized = True
+        self.declare_local(name).initialized = True
+        state.slot_count += 2
+
+        count = self.count_declarations([stmt.body])
+        if count:
+            self.emit(OpCode.RESERVE, count)
+            state.slot_count += count
+
+        loop = Loop(len(self.chunk.code), state.slot_count)
+        state.loops.append(loop)
+        exit_jump = self.emit_jump(OpCode.FOR_ITER)
+
+        self.compile_stmt(stmt.body)
+        self.emit(OpCode.JUMP, loop.start)
+
+        self.chunk.code[exit_jump] = (OpCode.FOR_ITER, (iterator.slot, len(self.chunk.code)))
+        for jump in loop.break_jumps:
+            self.patch_jump(jump)
+        state.loops.pop()
+        self.end_scope()
+
+    @override
+    def visit_break(self, stmt: Break):
+        if not self.state.loops:
+            self.diagnostics.error(stmt.keyword, "Can't use 'break' outside of a loop.", COMPILE)
+            return
+        loop = self.state.loops[-1]
+        self.unwind_to(loop)
+        loop.break_jumps.append(self.emit_jump(OpCode.JUMP))
+
+    @override
+    def visit_continue(self, stmt: Continue):
+        if not self.state.loops:
+            self.diagnostics.error(stmt.keyword, "Can't use 'continue' outside of a loop.", COMPILE)
+            return
+        loop = self.state.loops[-1]
+        self.unwind_to(loop)
+        self.emit(OpCode.JUMP, loop.start)
+
+    @override
+    def visit_pass(self, stmt: Pass):
+        return None
+
+    @override
+    def visit_spawn(self, stmt: Spawn):
+        call: Call = stmt.call
+        self.compile_expr(call.callee)
+        for argument in call.arguments:
+            self.compile_expr(argument)
+        self.emit(OpCode.SPAWN, len(call.arguments), token=call.paren)
+
+    @override
+    def visit_yield(self, stmt: Yield):
+        self.emit(OpCode.YIELD, token=stmt.keyword)
+        self.emit(OpCode.POP)
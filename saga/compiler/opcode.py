@@ -0,0 +1,79 @@
+from enum import IntEnum
+
+class OpCode(IntEnum):
+    """Instruction set of the SAGA virtual machine.
+
+    Every instruction is an (opcode, operand) pair, the comment next to each
+    opcode describes its operand. The VM dispatches on numeric ranges, so the
+    opcodes of a section must stay contiguous and hot opcodes come first.
+    """
+    ### variables & constants ###
+    GET_LOCAL = 0           # slot
+    GET_GLOBAL = 1          # variable name
+    CONSTANT = 2            # value
+    STORE_LOCAL = 3         # slot, pops the value
+    STORE_GLOBAL = 4        # variable name, pops the value
+
+    ### superinstructions for the common loop shapes ###
+    ADD_CONSTANT = 5        # number
+    SUBTRACT_CONSTANT = 6   # number
+    MULTIPLY_CONSTANT = 7   # number
+    JUMP_IF_NOT_LESS = 8            # target, pops both operands
+    JUMP_IF_NOT_LESS_EQUAL = 9      # target, pops both operands
+    JUMP_IF_NOT_GREATER = 10        # target, pops both operands
+    JUMP_IF_NOT_GREATER_EQUAL = 11  # target, pops both operands
+    JUMP_IF_NOT_EQUAL = 12          # target, pops both operands
+    JUMP_IF_EQUAL = 13              # target, pops both operands
+
+    ### control flow ###
+    JUMP = 14               # target
+    POP_JUMP_IF_FALSE = 15  # target
+    JUMP_IF_FALSE = 16      # target, leaves the condition on the stack
+    JUMP_IF_TRUE = 17       # target, leaves the condition on the stack
+    FOR_ITER = 18           # (iterator slot, exit target), stores the next value in the slot after it
+
+    ### operators ###
+    ADD = 19
+    SUBTRACT = 20
+    MULTIPLY = 21
+    DIVIDE = 22
+    LESS = 23
+    LESS_EQUAL = 24
+    GREATER = 25
+    GREATER_EQUAL = 26
+    EQUAL = 27
+    NOT_EQUAL = 28
+    NOT = 29
+    NEGATE = 30
+    COMMA = 31
+
+    ### functions ###
+    CALL = 32               # argument count
+    TAIL_CALL = 33          # argument count, return f(...) reusing the caller's frame
+    RETURN = 34
+    GET_UPVALUE = 35        # upvalue index
+    STORE_UPVALUE = 36      # upvalue index, pops the value
+    CLOSURE = 37            # (function, (is_local, index) per upvalue)
+
+    ### stack manipulation ###
+    POP = 38
+    NIL = 39
+    TRUE = 40
+    FALSE = 41
+    RESERVE = 42            # slot count, pushes nils for the locals of a scope
+    END_SCOPE = 43          # slot count, closes captured locals and pops them
+
+    ### assignments used as values ###
+    SET_LOCAL = 44          # slot
+    SET_GLOBAL = 45         # variable name
+    SET_UPVALUE = 46        # upvalue index
+
+    ### declarations & statements ###
+    DEFINE_GLOBAL = 47      # variable name
+    CLASS = 48              # variable name
+    SAY = 49
+    FOR_RANGE = 50          # pops the bounds of a for loop, pushes an iterator over them
+
+    ### coroutines ###
+    SPAWN = 51              # argument count, pops a function & its arguments into a new task
+    YIELD = 52              # hands the VM over to the next ready task, pushes nil once resumed
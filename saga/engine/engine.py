@@ -0,0 +1,198 @@
+import io
+
+from saga import parse, check_backend, TREE, CLOSURE, VM_BACKEND, BACKENDS
+from stmt.stmt import Stmt
+from resolver.resolver import Resolution
+from interpreter.interpreter import Interpreter
+from interpreter.closure_interpreter import ClosureInterpreter
+from compiler.compiler import Compiler
+from compiler.chunk import CompiledFunction
+from vm.vm import VM
+from output.output import Output
+from errors.errors import RuntimeError, Diagnostic, Diagnostics
+
+
+class CompileError(Exception):
+    """Source that doesn't lex, parse, resolve or compile, with the errors reported about it"""
+
+    def __init__(self, diagnostics: list[Diagnostic]):
+        self.diagnostics = diagnostics
+        self.messages = [str(diagnostic) for diagnostic in diagnostics]
+        super().__init__("\n".join(self.messages))
+
+
+class RunResult:
+    """Outcome of one run of a Program"""
+    __slots__ = ("output", "error")
+
+    def __init__(self, output: str | None, error: Exception | None):
+        # What the program said, None when it went to a sink of the host's
+        self.output = output
+        # What stopped the program, if anything: a RuntimeError of SAGA's, or
+        # the Python exception a native raised (a missing file, a bad argument)
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Program:
+    """Source compiled once by an Engine, to be run any number of times"""
+
+    def __init__(self, engine: "Engine", source: str, statements: list[Stmt], resolution: Resolution,
+                 function: CompiledFunction = None):
+        self.engine = engine
+        self.source = source
+        self.statements = statements
+        self.resolution = resolution
+        # Bytecode of the VM backend
+        self.function = function
+        # ClosureInterpreter -> (closures compiled by it, their call site caches)
+        self.compiled: dict = {}
+
+    def run(self, globals: dict[str, any] = None, sink=None) -> RunResult:
+        return self.engine.run(self, globals, sink)
+
+    async def run_async(self, globals: dict[str, any] = None, sink=None) -> RunResult:
+        return await self.engine.run_async(self, globals, sink)
+
+
+class Engine:
+    """Embedding API: compiles SAGA programs once & runs them many times.
+
+    compile() runs the whole front end (and the bytecode compiler for the vm
+    backend) once, the Program it returns is run without touching the source
+    again. Each run borrows an interpreter from the engine's pool, resets its
+    global environment in place to the natives plus the globals the host
+    passes in, & hands it back afterwards. Threads running programs at the
+    same time each get an interpreter of their own.
+
+    A run's output is captured into RunResult.output unless the host gives
+    a sink, and a runtime error stopping it, a native's Python exception
+    included, is returned in RunResult.error instead of being printed.
+    Compilation errors raise CompileError, nothing else is raised by a run.
+
+    run_async runs programs as asyncio tasks, many of them sharing one
+    event loop, see there.
+    """
+
+    def __init__(self, backend: str = TREE):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}.")
+        self.backend = backend
+        # Idle interpreters (VMs), list.pop & append are atomic
+        self.pool: list = []
+
+    def compile(self, source: str) -> Program:
+        # Errors of this compilation alone, safe to compile from several threads
+        diagnostics = Diagnostics(echo=False)
+        program = parse(source, diagnostics)
+        function = None
+        if program is not None and self.backend == VM_BACKEND:
+            function = Compiler(diagnostics).compile(program[0])
+        elif program is not None:
+            check_backend(program[1], self.backend, diagnostics)
+
+        if diagnostics.had_error:
+            raise CompileError(diagnostics.entries)
+        statements, resolution = program
+        return Program(self, source, statements, resolution, function)
+
+    def run(self, program: Program, globals: dict[str, any] = None, sink=None) -> RunResult:
+        """Runs a program of this engine against fresh globals, plus the given ones"""
+        backend = self.checkout()
+        captured = self.prepare(backend, globals, sink)
+        try:
+            self.run_program(backend, program)
+        except RuntimeError as error:
+            result = RunResult(captured and captured.getvalue(), error)
+        except Exception as error:
+            # A native's own error, the backend may be left mid-run & isn't pooled again
+            return RunResult(captured and captured.getvalue(), error)
+        else:
+            result = RunResult(captured and captured.getvalue(), None)
+        self.pool.append(backend)
+        return result
+
+    async def run_async(self, program: Program, globals: dict[str, any] = None, sink=None) -> RunResult:
+        """run as a coroutine, for hosts running hundreds of programs on one event loop.
+
+        On the vm backend, input & the file natives are swapped for async
+        counterparts: calling one suspends the program while the blocking
+        call runs on the default thread pool, other programs carry on
+        meanwhile. The tree interpreters keep their state on the Python
+        stack & can't be suspended, their whole run goes to the thread pool.
+        """
+        # Only imported when asked for, asyncio is slow to import
+        import asyncio
+        if self.backend != VM_BACKEND:
+            return await asyncio.to_thread(self.run, program, globals, sink)
+
+        from callables.async_callables import async_natives
+        backend = self.checkout()
+        captured = self.prepare(backend, globals, sink, async_natives())
+        try:
+            await backend.run_program_async(program.function)
+        except RuntimeError as error:
+            result = RunResult(captured and captured.getvalue(), error)
+        except Exception as error:
+            # A native's own error, the backend may be left mid-run & isn't pooled again
+            return RunResult(captured and captured.getvalue(), error)
+        else:
+            result = RunResult(captured and captured.getvalue(), None)
+        self.pool.append(backend)
+        return result
+
+    def checkout(self):
+        """An idle backend from the pool, or a new one"""
+        try:
+            return self.pool.pop()
+        except IndexError:
+            return self.new_backend()
+
+    def prepare(self, backend, globals: dict[str, any], sink, natives: dict[str, any] = None) -> io.StringIO | None:
+        """Fresh globals & output for a run, returns what captures the output unless there's a sink"""
+        backend.reset_globals()
+        if natives:
+            self.define_globals(backend, natives)
+        if globals:
+            self.define_globals(backend, globals)
+
+        captured = io.StringIO() if sink is None else None
+        backend.output = Output(sink if sink is not None else captured, line_buffered=False)
+        return captured
+
+    def new_backend(self):
+        if self.backend == VM_BACKEND:
+            return VM()
+        return ClosureInterpreter() if self.backend == CLOSURE else Interpreter()
+
+    def define_globals(self, backend, globals: dict[str, any]):
+        if self.backend == VM_BACKEND:
+            backend.globals.update(globals)
+        else:
+            backend.globals.values.update(globals)
+
+    def run_program(self, backend, program: Program):
+        if self.backend == VM_BACKEND:
+            backend.run_program(program.function)
+            return
+
+        # The resolution is handed over as is, the interpreter only needs the current program's
+        resolution = program.resolution
+        backend.locals, backend.slot_counts = resolution.locals, resolution.slot_counts
+
+        if self.backend == TREE:
+            backend.call_caches = {}
+            backend.run_program(program.statements)
+            return
+
+        compiled = program.compiled.get(backend)
+        if compiled is None:
+            backend.call_caches = {}
+            compiled = program.compiled[backend] = (backend.compile_block(program.statements), backend.call_caches)
+        closures, backend.call_caches = compiled
+        for cache in backend.call_caches.values():
+            cache.clear()
+        backend.run_program(closures)
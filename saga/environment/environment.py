@@ -3,8 +3,14 @@ from errors.errors import RuntimeError
 
 
 class Environment:
-    def __init__(self, enclosing=None):
-        self.values = {}
+    # Globals live in values & are looked up by name, locals are
+    # stored in slots at the index the Resolver assigned them.
+    # Only the global environment (no enclosing one) has a values dict
+    __slots__ = ("values", "slots", "enclosing")
+
+    def __init__(self, enclosing=None, slot_count: int = 0):
+        self.values = {} if enclosing is None else None
+        self.slots = [None] * slot_count
         self.enclosing = enclosing
 
     def define(self, name: str, value: any):
@@ -17,8 +23,8 @@ class Environment:
             env = env.enclosing
         return env
 
-    def get_at(self, distance: int, name: str):
-        return self.ancestor(distance).values.get(name)    
+    def get_at(self, distance: int, slot: int):
+        return self.ancestor(distance).slots[slot]
 
     def get(self, token):
         if token.lexeme in self.values:
@@ -29,8 +35,8 @@ class Environment:
 
         raise RuntimeError(token, f"Undefined variable '{token.lexeme}'.")
 
-    def assign_at(self, distance: int, name: Token, value: any):
-        self.ancestor(distance).values[name.lexeme] = value
+    def assign_at(self, distance: int, slot: int, value: any):
+        self.ancestor(distance).slots[slot] = value
 
     def assign(self, token, value: any):
         if token.lexeme in self.values:
@@ -41,4 +47,14 @@ class Environment:
             self.enclosing.assign(token, value)
             return
 
-        raise RuntimeError(token, f"Undefined variable '{token.lexeme}'.")
\ No newline at end of file
+        raise RuntimeError(token, f"Undefined variable '{token.lexeme}'.")
+
+
+class Frame(Environment):
+    """Environment of a function call, built around an existing slot array"""
+    __slots__ = ()
+
+    def __init__(self, enclosing: Environment, slots: list):
+        self.values = None
+        self.slots = slots
+        self.enclosing = enclosing
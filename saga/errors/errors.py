@@ -1,45 +1,81 @@
 from lexer.token import Token
 from lexer.token_type import TokenType
 
-class Error:
-    """Base class for all custom errors."""
-    had_error: bool = False
-    had_runtime_error: bool = False
-
-    @staticmethod
-    def report(line: int, column: int, message: str):
-        print(f"SAGA::[line {line}, column {column}] Error: {message}")
-        Error.had_error = True
-
-    @staticmethod
-    def error(token: Token, message: str):
+# Phase of the pipeline a diagnostic comes from
+LEX = "lex"
+PARSE = "parse"
+RESOLVE = "resolve"
+COMPILE = "compile"
+RUNTIME = "runtime"
+
+
+class Diagnostic:
+    """One error reported about a program"""
+    __slots__ = ("line", "column", "message", "phase", "where")
+
+    def __init__(self, line: int, column: int, message: str, phase: str, where: str = None):
+        self.line = line
+        self.column = column
+        self.message = message
+        self.phase = phase
+        # "at 'x'" for errors about a token
+        self.where = where
+
+    def __str__(self):
+        where = f" {self.where} " if self.where is not None else ""
+        return f"SAGA::[line {self.line}, column {self.column}] Error: {where}{self.message}"
+
+    def to_dict(self) -> dict:
+        return {"line": self.line, "column": self.column, "message": self.message, "phase": self.phase}
+
+
+class Diagnostics:
+    """Errors of one compilation or run.
+
+    Each Lexer, Parser, Resolver, Compiler & run of a backend reports into the
+    Diagnostics it's handed, so compilations & runs happening at the same
+    time never see each other's errors. With echo, every error is also
+    printed the moment it's reported, as the command line does.
+    """
+
+    def __init__(self, echo: bool = True):
+        self.echo = echo
+        self.entries: list[Diagnostic] = []
+
+    def report(self, line: int, column: int, message: str, phase: str, where: str = None):
+        diagnostic = Diagnostic(line, column, message, phase, where)
+        self.entries.append(diagnostic)
+        if self.echo:
+            print(diagnostic)
+
+    def error(self, token: Token, message: str, phase: str):
         if token.type == TokenType:
-            Error.report(token.line, token.column, f" at end {message}")
+            self.report(token.line, token.column, message, phase, "at end")
         else:
-            Error.report(token.line, token.column, f" at '{token.lexeme}' {message}")
+            self.report(token.line, token.column, message, phase, f"at '{token.lexeme}'")
+
+    def runtime_error(self, error: RuntimeError):
+        self.report(error.token.line, error.token.column, error.message, RUNTIME)
 
-    @staticmethod
-    def runtime_error(error: RuntimeError):
-        print(f"SAGA::[line {error.token.line}, column {error.token.column}] Error: {error.message}")
-        Error.had_runtime_error = True
+    @property
+    def had_error(self) -> bool:
+        """Whether the program failed to compile"""
+        return any(diagnostic.phase != RUNTIME for diagnostic in self.entries)
+
+    @property
+    def had_runtime_error(self) -> bool:
+        return any(diagnostic.phase == RUNTIME for diagnostic in self.entries)
 
 class ParseError(RuntimeError):
     """Custom exception for parser-related errors."""
 
 class RuntimeError(RuntimeError):
+    """Error stopping a running program, at token.
+
+    A native raises it with no token, the call site running the native
+    fills its own in.
+    """
     def __init__(self, token, message):
         super().__init__(message)
         self.token = token
-        self.message = message
-
-
-class BreakException(Exception):
-    pass
-
-class ContinueException(Exception):
-    pass
-
-class ReturnException(Exception):
-    def __init__(self, value: any, *args):
-        super().__init__(*args)
-        self.value = value
\ No newline at end of file
+        self.message = message
\ No newline at end of file
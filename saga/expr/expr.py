@@ -4,11 +4,15 @@ from typing import override
 from lexer.token import Token
 
 class Expr(ABC):
+  __slots__ = ()
+
   @abstractmethod
   def accept(self, visitor: "Visitor"):
       pass
 
 class Assign(Expr):
+  __slots__ = ('name', 'value')
+
   def __init__(self, name: Token, value: Expr):
       self.name = name
       self.value = value
@@ -18,6 +22,8 @@ class Assign(Expr):
       return visitor.visit_assign(self)
 
 class Binary(Expr):
+  __slots__ = ('left', 'operator', 'right')
+
   def __init__(self, left: Expr, operator: Token, right: Expr):
       self.left = left
       self.operator = operator
@@ -28,6 +34,8 @@ class Binary(Expr):
       return visitor.visit_binary(self)
 
 class Call(Expr):
+  __slots__ = ('callee', 'paren', 'arguments')
+
   def __init__(self, callee: Expr, paren: Token, arguments: list[Expr]):
       self.callee = callee
       self.paren = paren
@@ -38,6 +46,8 @@ class Call(Expr):
       return visitor.visit_call(self)
 
 class Grouping(Expr):
+  __slots__ = ('expression',)
+
   def __init__(self, expression: Expr):
       self.expression = expression
 
@@ -46,6 +56,8 @@ class Grouping(Expr):
       return visitor.visit_grouping(self)
 
 class Literal(Expr):
+  __slots__ = ('value',)
+
   def __init__(self, value: any):
       self.value = value
 
@@ -54,6 +66,8 @@ class Literal(Expr):
       return visitor.visit_literal(self)
 
 class Logical(Expr):
+  __slots__ = ('left', 'operator', 'right')
+
   def __init__(self, left: Expr, operator: Token, right: Expr):
       self.left = left
       self.operator = operator
@@ -64,6 +78,8 @@ class Logical(Expr):
       return visitor.visit_logical(self)
 
 class Ternary(Expr):
+  __slots__ = ('condition', 'then_branch', 'else_branch')
+
   def __init__(self, condition: Expr, then_branch: Expr, else_branch: Expr):
       self.condition = condition
       self.then_branch = then_branch
@@ -74,6 +90,8 @@ class Ternary(Expr):
       return visitor.visit_ternary(self)
 
 class Unary(Expr):
+  __slots__ = ('operator', 'right')
+
   def __init__(self, operator: Token, right: Expr):
       self.operator = operator
       self.right = right
@@ -83,6 +101,8 @@ class Unary(Expr):
       return visitor.visit_unary(self)
 
 class Variable(Expr):
+  __slots__ = ('name',)
+
   def __init__(self, name: Token):
       self.name = name
 
@@ -0,0 +1,587 @@
+from typing import override
+
+from callables.saga_callable import SAGACallable, SAGAClass
+from callables.native_callables import natives
+import expr.expr as expr
+from expr.expr import Expr, Assign, Binary, Call, Grouping, Literal, Logical, Ternary, Unary, Variable
+
+import stmt.stmt as stmt
+from stmt.stmt import Stmt, Block, Expression, Function, Class, If, Say, Return, Let, While, ForRange, Break, Continue, Pass, Spawn, Yield
+
+from lexer.token_type import TokenType
+from lexer.token import Token
+
+from errors.errors import RuntimeError, Diagnostics
+
+from environment.environment import Environment, Frame
+
+from output.output import Output
+
+from interpreter.operators import add, check_number_operand, check_number_operands, comma, counted_range, divide, no_coroutines
+from interpreter.completion import BREAK, CONTINUE, ReturnSignal, TailCall
+from interpreter.inline_cache import CallSiteCache, call_site_stats
+
+
+class ClosureFunction(SAGACallable):
+    """A SAGA function whose body was compiled to closures once, at declaration time"""
+
+    def __init__(self, declaration: Function, body: list, slot_count: int, closure: Environment):
+        self.declaration = declaration
+        self.body = body
+        self.closure = closure
+        # The other locals of the function, after its parameters
+        self.padding = [None] * (slot_count - len(declaration.params))
+
+    @override
+    def call(self, interpreter, arguments):
+        function: ClosureFunction = self
+
+        # Each iteration runs a tail call of the previous one
+        while True:
+            # The (freshly built) argument list becomes the frame's slot array,
+            # parameters take its first slots
+            arguments += function.padding
+            env: Frame = Frame(function.closure, arguments)
+
+            for statement in function.body:
+                signal = statement(env)
+                if signal is not None:
+                    break
+            else:
+                return None
+
+            # break & continue can't leave a function, it's a return
+            if type(signal) is not TailCall:
+                return signal.value
+            function, arguments = signal.function, signal.arguments
+
+    @override
+    def arity(self):
+        return len(self.declaration.params)
+
+    def __str__(self):
+        return f"<fn {self.declaration.name.lexeme}>"
+
+
+class ClosureInterpreter(expr.Visitor, stmt.Visitor):
+    """Backend that compiles the AST into nested Python closures, then calls them.
+
+    Each visit_* method runs once per node and returns a closure taking the
+    current Environment. All the decisions the tree-walk Interpreter takes on
+    every evaluation (visitor dispatch, operator match, resolver depth lookup)
+    are taken at compile time, picking a closure specialized for the node.
+    """
+
+    def __init__(self, output: Output = None):
+        self.globals = Environment()
+        self.env = self.globals
+        # Resolver output: expression/declaration -> (depth, slot), block/function -> slot count
+        self.locals = {}
+        self.slot_counts = {}
+        # Call node -> CallSiteCache of its compiled closure
+        self.call_caches = {}
+        # Where say writes
+        self.output: Output = output if output is not None else Output()
+
+        # define native functions
+        for name, native in natives().items():
+            self.globals.define(name, native)
+
+    def interpret(self, statements: list[Stmt], diagnostics: Diagnostics = None):
+        """Compiles & runs a program, a runtime error stopping it is reported into diagnostics"""
+        try:
+            self.run_program(self.compile_block(statements))
+        except RuntimeError as error:
+            if diagnostics is None:
+                diagnostics = Diagnostics()
+            diagnostics.runtime_error(error)
+
+    def run_program(self, compiled: list):
+        """Runs compile_block's closures, a RuntimeError stopping them is raised once what was said before is flushed"""
+        try:
+            for statement in compiled:
+                if statement(self.env) is not None:
+                    break
+        finally:
+            self.output.flush()
+
+    def reset_globals(self):
+        """Back to a global environment holding only the natives, in place as compiled code holds on to it"""
+        values = self.globals.values
+        values.clear()
+        values.update(natives())
+        self.env = self.globals
+        # The callees they hold were globals of the previous program
+        for cache in self.call_caches.values():
+            cache.clear()
+
+    def call_site_stats(self) -> dict[str, dict]:
+        """Inline cache hit/miss counters of the call sites compiled so far"""
+        return call_site_stats(self.call_caches)
+
+    def evaluate(self, expression: Expr):
+        return self.compile_expr(expression)(self.env)
+
+    def resolve(self, expr: Expr, depth: int, slot: int):
+        self.locals[expr] = (depth, slot)
+
+    def resolve_scope(self, node: Stmt, slot_count: int):
+        self.slot_counts[node] = slot_count
+
+    def compile_expr(self, expression: Expr):
+        return expression.accept(self)
+
+    def compile_stmt(self, statement: Stmt):
+        return statement.accept(self)
+
+    def compile_block(self, statements: list[Stmt]) -> list:
+        # The parser leaves None behind for statements it had to skip
+        return [self.compile_stmt(statement) for statement in statements if statement is not None]
+
+    def run_sequence(self, statements: list):
+        """Closure running statements one after another in the environment it is given"""
+        if len(statements) == 1:
+            return statements[0]
+
+        def run(env):
+            for statement in statements:
+                signal = statement(env)
+                if signal is not None:
+                    return signal
+            return None
+        return run
+
+    def declare(self, declaration: Stmt, name: Token, value):
+        """Closure binding a declared name to the result of value(env)"""
+        location = self.locals.get(declaration)
+        if location is None:
+            values = self.globals.values
+            lexeme: str = name.lexeme
+
+            # Only top level code declares globals, so env is the global environment
+            def declare_global(env):
+                values[lexeme] = value(env)
+            return declare_global
+
+        slot: int = location[1]
+
+        def declare_local(env):
+            env.slots[slot] = value(env)
+        return declare_local
+
+    def branch(self, branch: Stmt):
+        # If branches run in the enclosing environment, like Interpreter.visit_if
+        statements = branch.statements if isinstance(branch, Block) else [branch]
+        return self.run_sequence(self.compile_block(statements))
+
+    ### expressions ###
+
+    @override
+    def visit_literal(self, literal: Literal):
+        value = literal.value
+        return lambda env: value
+
+    @override
+    def visit_grouping(self, grouping: Grouping):
+        return self.compile_expr(grouping.expression)
+
+    @override
+    def visit_variable(self, variable: Variable):
+        location = self.locals.get(variable)
+
+        if location is None:
+            name: str = variable.name.lexeme
+            values = self.globals.values
+            token: Token = variable.name
+
+            def global_variable(env):
+                try:
+                    return values[name]
+                except KeyError:
+                    raise RuntimeError(token, f"Undefined variable '{name}'.") from None
+            return global_variable
+
+        distance, slot = location
+        match distance:
+            case 0:
+                return lambda env: env.slots[slot]
+            case 1:
+                return lambda env: env.enclosing.slots[slot]
+            case 2:
+                return lambda env: env.enclosing.enclosing.slots[slot]
+            case _:
+                return lambda env: env.ancestor(distance).slots[slot]
+
+    @override
+    def visit_assign(self, assign: Assign):
+        name: str = assign.name.lexeme
+        value = self.compile_expr(assign.value)
+        location = self.locals.get(assign)
+
+        if location is None:
+            values = self.globals.values
+            token: Token = assign.name
+
+            def assign_global(env):
+                result = value(env)
+                if name not in values:
+                    raise RuntimeError(token, f"Undefined variable '{name}'.")
+                values[name] = result
+                return result
+            return assign_global
+
+        distance, slot = location
+        if distance == 0:
+            def assign_slot(env):
+                result = value(env)
+                env.slots[slot] = result
+                return result
+            return assign_slot
+
+        def assign_local(env):
+            result = value(env)
+            env.ancestor(distance).slots[slot] = result
+            return result
+        return assign_local
+
+    @override
+    def visit_logical(self, logical: Logical):
+        left = self.compile_expr(logical.left)
+        right = self.compile_expr(logical.right)
+
+        # Short-circuiting
+        if logical.operator.type == TokenType.OR:
+            def logical_or(env):
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+            return logical_or
+
+        def logical_and(env):
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+        return logical_and
+
+    @override
+    def visit_ternary(self, ternary: Ternary):
+        condition = self.compile_expr(ternary.condition)
+        then_branch = self.compile_expr(ternary.then_branch)
+        else_branch = self.compile_expr(ternary.else_branch)
+
+        def ternary_(env):
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+        return ternary_
+
+    @override
+    def visit_unary(self, unary: Unary):
+        right = self.compile_expr(unary.right)
+        operator: Token = unary.operator
+
+        if operator.type == TokenType.MINUS:
+            def negate(env):
+                value = right(env)
+                check_number_operand(operator, value)
+                return -value
+            compiled = negate
+        else:
+            def not_(env):
+                value = right(env)
+                return value is None or value is False
+            compiled = not_
+
+        return self.fold(compiled, unary.right)
+
+    @override
+    def visit_binary(self, binary: Binary):
+        left = self.compile_expr(binary.left)
+        right = self.compile_expr(binary.right)
+        operator: Token = binary.operator
+
+        match operator.type:
+            case TokenType.PLUS:
+                if isinstance(binary.right, Literal) and type(binary.right.value) is int:
+                    constant = binary.right.value
+
+                    def add_constant(env):
+                        value = left(env)
+                        if type(value) is int:
+                            return value + constant
+                        return add(value, constant, operator)
+                    compiled = add_constant
+                else:
+                    def plus(env):
+                        a, b = left(env), right(env)
+                        if type(a) is int and type(b) is int:
+                            return a + b
+                        return add(a, b, operator)
+                    compiled = plus
+            case TokenType.MINUS:
+                def minus(env):
+                    a, b = left(env), right(env)
+                    if type(a) is not int or type(b) is not int:
+                        check_number_operands(operator, a, b)
+                    return a - b
+                compiled = minus
+            case TokenType.STAR:
+                def star(env):
+                    a, b = left(env), right(env)
+                    if type(a) is not int or type(b) is not int:
+                        check_number_operands(operator, a, b)
+                    return a * b
+                compiled = star
+            case TokenType.SLASH:
+                compiled = lambda env: divide(left(env), right(env), operator)
+            case TokenType.LESS:
+                def less(env):
+                    a, b = left(env), right(env)
+                    if type(a) is not int or type(b) is not int:
+                        check_number_operands(operator, a, b)
+                    return a < b
+                compiled = less
+            case TokenType.LESS_EQUAL:
+                def less_equal(env):
+                    a, b = left(env), right(env)
+                    if type(a) is not int or type(b) is not int:
+                        check_number_operands(operator, a, b)
+                    return a <= b
+                compiled = less_equal
+            case TokenType.GREATER:
+                def greater(env):
+                    a, b = left(env), right(env)
+                    if type(a) is not int or type(b) is not int:
+                        check_number_operands(operator, a, b)
+                    return a > b
+                compiled = greater
+            case TokenType.GREATER_EQUAL:
+                def greater_equal(env):
+                    a, b = left(env), right(env)
+                    if type(a) is not int or type(b) is not int:
+                        check_number_operands(operator, a, b)
+                    return a >= b
+                compiled = greater_equal
+            case TokenType.EQUAL_EQUAL:
+                compiled = lambda env: left(env) == right(env)
+            case TokenType.BANG_EQUAL:
+                compiled = lambda env: left(env) != right(env)
+            case TokenType.COMMA:
+                compiled = lambda env: comma(left(env), right(env))
+            case _:
+                # Ranges only mean something in a for loop header, elsewhere they evaluate to nil
+                def range_(env):
+                    left(env)
+                    right(env)
+                    return None
+                compiled = range_
+
+        return self.fold(compiled, binary.left, binary.right)
+
+    def fold(self, compiled, *operands: Expr):
+        """Evaluates an operator over literal operands once, at compile time.
+
+        Operations that would fail keep their closure so the error is still
+        raised at runtime, in program order.
+        """
+        if not all(isinstance(operand, Literal) for operand in operands):
+            return compiled
+        try:
+            value = compiled(None)
+        except RuntimeError:
+            return compiled
+        return lambda env: value
+
+    @override
+    def visit_call(self, call: Call):
+        callee = self.compile_expr(call.callee)
+        arguments = [self.compile_expr(argument) for argument in call.arguments]
+        return self.compile_call(call, callee, arguments)
+
+    def compile_call(self, call: Call, callee, arguments: list):
+        paren: Token = call.paren
+        interpreter = self
+
+        # Each compiled call site owns its inline cache
+        cache: CallSiteCache = CallSiteCache(paren, len(arguments))
+        self.call_caches[call] = cache
+
+        def call_(env):
+            function = callee(env)
+            if function is cache.callee:
+                cache.hits += 1
+                entry = cache.entry
+            else:
+                entry = cache.lookup(function)
+
+            try:
+                return entry(interpreter, [argument(env) for argument in arguments])
+            except RuntimeError as error:
+                # A native's own error, reported at the call
+                if error.token is None:
+                    error.token = paren
+                raise
+        return call_
+
+    ### statements ###
+
+    @override
+    def visit_expression(self, expression: Expression):
+        evaluate = self.compile_expr(expression.expression)
+
+        def expression_(env):
+            evaluate(env)
+        return expression_
+
+    @override
+    def visit_say(self, say: Say):
+        evaluate = self.compile_expr(say.expression)
+
+        # Looked up on every run, the output can be swapped between runs
+        def say_(env):
+            self.output.say(evaluate(env))
+        return say_
+
+    @override
+    def visit_let(self, let: Let):
+        if let.initializer is None:
+            return self.declare(let, let.name, lambda env: None)
+        return self.declare(let, let.name, self.compile_expr(let.initializer))
+
+    @override
+    def visit_block(self, block: Block):
+        body = self.run_sequence(self.compile_block(block.statements)) if block.statements else None
+        slot_count: int = self.slot_counts.get(block, 0)
+
+        def block_(env):
+            if body is not None:
+                return body(Environment(env, slot_count))
+        return block_
+
+    @override
+    def visit_if(self, stmt: If):
+        condition = self.compile_expr(stmt.condition)
+        then_branch = self.branch(stmt.then_branch)
+
+        if stmt.else_branch is None:
+            def if_(env):
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+            return if_
+
+        else_branch = self.branch(stmt.else_branch)
+
+        def if_else(env):
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+        return if_else
+
+    @override
+    def visit_while(self, stmt: While):
+        condition = self.compile_expr(stmt.condition)
+        body = self.compile_stmt(stmt.body)
+
+        def while_(env):
+            while True:
+                value = condition(env)
+                if value is None or value is False:
+                    return None
+
+                signal = body(env)
+                if signal is not None:
+                    if signal is BREAK:
+                        return None
+                    if signal is not CONTINUE:
+                        return signal
+        return while_
+
+    @override
+    def visit_forrange(self, stmt: ForRange):
+        start = self.compile_expr(stmt.start)
+        end = self.compile_expr(stmt.end)
+        body = self.compile_stmt(stmt.body)
+        name: Token = stmt.name
+        slot_count: int = self.slot_counts[stmt]
+        slot: int = self.locals[stmt][1]
+
+        def for_range(env):
+            values = counted_range(start(env), end(env), name)
+
+            # The loop variable lives in a scope of its own around the body
+            loop_env: Environment = Environment(env, slot_count)
+            slots = loop_env.slots
+            for value in values:
+                slots[slot] = value
+                signal = body(loop_env)
+                if signal is not None:
+                    if signal is BREAK:
+                        return None
+                    if signal is not CONTINUE:
+                        return signal
+            return None
+        return for_range
+
+    @override
+    def visit_break(self, stmt: Break):
+        return lambda env: BREAK
+
+    @override
+    def visit_continue(self, stmt: Continue):
+        return lambda env: CONTINUE
+
+    @override
+    def visit_pass(self, stmt: Pass):
+        return lambda env: None
+
+    @override
+    def visit_spawn(self, stmt: Spawn):
+        return lambda env: no_coroutines(stmt.keyword)
+
+    @override
+    def visit_yield(self, stmt: Yield):
+        return lambda env: no_coroutines(stmt.keyword)
+
+    @override
+    def visit_return(self, stmt: Return):
+        if stmt.value is None:
+            return lambda env: ReturnSignal(None)
+
+        # Nothing runs after a return, calling a function there is a tail call
+        if type(stmt.value) is Call and type(stmt.value.callee) is Variable:
+            callee = self.compile_expr(stmt.value.callee)
+            arguments = [self.compile_expr(argument) for argument in stmt.value.arguments]
+            argument_count: int = len(arguments)
+            call = self.compile_call(stmt.value, callee, arguments)
+
+            def tail_call_(env):
+                function = callee(env)
+                if type(function) is ClosureFunction and len(function.declaration.params) == argument_count:
+                    return TailCall(function, [argument(env) for argument in arguments])
+
+                # Natives, classes & arity errors go through the regular call,
+                # looking the variable up again has no side effects
+                return ReturnSignal(call(env))
+            return tail_call_
+
+        value = self.compile_expr(stmt.value)
+        return lambda env: ReturnSignal(value(env))
+
+    @override
+    def visit_function(self, stmt: Function):
+        body = self.compile_block(stmt.body)
+        slot_count: int = self.slot_counts[stmt]
+
+        # We pass the environment that is active when
+        # the function is declared not when it's called
+        return self.declare(stmt, stmt.name, lambda env: ClosureFunction(stmt, body, slot_count, env))
+
+    @override
+    def visit_class(self, stmt: Class):
+        name: str = stmt.name.lexeme
+        return self.declare(stmt, stmt.name, lambda env: SAGAClass(name))
@@ -0,0 +1,38 @@
+# Statements complete normally by returning None. break, continue & return
+# complete with one of these signals instead, which the enclosing loop or
+# function call consumes. Returning is far cheaper than raising in CPython.
+BREAK = object()
+CONTINUE = object()
+
+
+class ReturnSignal:
+    __slots__ = ("value",)
+
+    def __init__(self, value: any):
+        self.value = value
+
+
+class TailCall:
+    """Completion of 'return f(...)' when f is a SAGA function.
+
+    The arguments are already evaluated, the running call loops into f with
+    them instead of calling it from inside the caller's frame, so tail calls
+    run in constant stack space.
+    """
+    __slots__ = ("function", "arguments")
+
+    def __init__(self, function, arguments: list[any]):
+        self.function = function
+        self.arguments = arguments
+
+
+class Yield(Exception):
+    """Raised out of the VM's run loop by yield & sleep, its scheduler then switches tasks.
+
+    Unlike the signals above it's raised: sleep has to get out of the run
+    loop from inside a native's call, & a task switch is rare next to a return.
+    """
+
+    def __init__(self, delay: float):
+        # Seconds before the task is ready again, 0 for the back of the ready queue
+        self.delay = delay
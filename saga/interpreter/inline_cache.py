@@ -0,0 +1,86 @@
+from lexer.token import Token
+
+from errors.errors import RuntimeError
+
+from callables.saga_callable import SAGACallable
+
+# Distinct callees a call site remembers before it's considered megamorphic
+MAX_CALLEES = 4
+
+# Initial callee of an empty cache, nil itself can be called (& must fail)
+EMPTY = object()
+
+
+class CallSiteCache:
+    """Inline cache of a single Call node.
+
+    The argument count of a call site never changes, so once a callee's arity
+    has been validated against it the callee can be called straight away. The
+    last callee is checked first by identity (monomorphic case), the others the
+    site has seen are scanned after it (polymorphic case, up to MAX_CALLEES). A
+    site seeing more callees than that is megamorphic, new callees are checked
+    on every call & never cached.
+
+    An entry is the callee's bound call method, taking (interpreter, arguments).
+    """
+    __slots__ = ("paren", "argument_count", "callee", "entry", "callees", "megamorphic", "hits", "misses")
+
+    def __init__(self, paren: Token, argument_count: int):
+        self.paren = paren
+        self.argument_count = argument_count
+        self.callee = EMPTY
+        self.entry = None
+        # (callee, entry) pairs, the polymorphic part of the cache
+        self.callees = []
+        self.megamorphic = False
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, callee: any):
+        """Slow path once the last callee didn't match, returns the entry to call"""
+        for cached, entry in self.callees:
+            if cached is callee:
+                self.hits += 1
+                self.callee, self.entry = callee, entry
+                return entry
+
+        self.misses += 1
+        if not isinstance(callee, SAGACallable):
+            raise RuntimeError(self.paren, "Can only call functions or classes.")
+
+        # Handle variadic functions (arity -1) differently
+        arity = callee.arity()
+        if arity != -1 and arity != self.argument_count:
+            # Raised once the arguments are evaluated, like an uncached call
+            return self.arity_error(arity)
+
+        entry = callee.call
+        if len(self.callees) < MAX_CALLEES:
+            self.callees.append((callee, entry))
+        else:
+            self.megamorphic = True
+        self.callee, self.entry = callee, entry
+        return entry
+
+    def arity_error(self, arity: int):
+        paren = self.paren
+
+        def raise_(interpreter, arguments):
+            raise RuntimeError(paren, f"Expected {arity} arguments but got {len(arguments)}.")
+        return raise_
+
+    def clear(self):
+        """Forgets every callee, e.g. once the globals they were found in are gone"""
+        self.callee = EMPTY
+        self.entry = None
+        self.callees = []
+        self.megamorphic = False
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "callees": len(self.callees),
+                "megamorphic": self.megamorphic}
+
+
+def call_site_stats(call_caches: dict) -> dict[str, dict]:
+    """Hit/miss counters of every call site that ran, keyed by 'line:column' of its '('"""
+    return {f"{cache.paren.line}:{cache.paren.column}": cache.stats() for cache in call_caches.values()}
@@ -0,0 +1,217 @@
+import json
+from collections import Counter
+
+import expr.expr as expr
+from expr.expr import Expr, Call
+
+import stmt.stmt as stmt
+from stmt.stmt import Stmt
+
+from lexer.token import Token
+
+from interpreter.completion import ReturnSignal
+from interpreter.inline_cache import CallSiteCache
+
+# Hook events & the arguments their hooks get
+EVENTS = (
+    "before_statement",  # (stmt)
+    "after_statement",   # (stmt)
+    "call_enter",        # (call, callee, arguments)
+    "call_exit",         # (call, callee, value)
+    "loop_iteration",    # (loop stmt), before each run of the body
+)
+
+STATEMENT_VISITS = sorted(stmt.Visitor.__abstractmethods__)
+EXPRESSION_VISITS = sorted(expr.Visitor.__abstractmethods__)
+
+# Key of the nodes without any token (literals, pass) in the node counts
+NO_POSITION = "?"
+
+
+def node_token(node) -> Token | None:
+    """Token a node is reported at: its own (operator, name, '('...) or else the first one of its children"""
+    fields = type(node).__slots__
+    for field in fields:
+        if type(getattr(node, field)) is Token:
+            return getattr(node, field)
+
+    for field in fields:
+        value = getattr(node, field)
+        for child in (value if type(value) is list else (value,)):
+            if isinstance(child, (Expr, Stmt)):
+                token = node_token(child)
+                if token is not None:
+                    return token
+    return None
+
+
+def node_position(node) -> str:
+    token = node_token(node)
+    return f"{token.line}:{token.column}" if token is not None else NO_POSITION
+
+
+class Instrumentation:
+    """Hooks & per-node hit counters of one tree-walk Interpreter.
+
+    Nothing in the Interpreter checks whether it's instrumented. Registering
+    the first hook of a kind or enabling the counters swaps instrumented
+    versions of the methods involved into the interpreter instance, where they
+    shadow the class' visit_* methods for every accept() & self.visit_x call;
+    removing the last one deletes them again and the dispatch is back to the
+    plain class methods.
+
+    While call hooks are registered, tail calls run as regular calls so every
+    call_enter has its call_exit. Neither after_statement nor call_exit run
+    when a runtime error unwinds the statement or call.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.hooks: dict[str, list] = {event: [] for event in EVENTS}
+        # node -> hits, None while the counters are off
+        self.counters: Counter = None
+        # loop body -> its While/ForRange, seen as the loops start
+        self.loop_bodies: dict[Stmt, Stmt] = {}
+        # names of the methods set on the interpreter instance
+        self.installed: list[str] = []
+
+    def add_hook(self, event: str, hook):
+        """Registers a hook for one of EVENTS, returns it so it can be used as a decorator"""
+        if event not in self.hooks:
+            raise ValueError(f"Unknown instrumentation event '{event}', expected one of {', '.join(EVENTS)}.")
+        self.hooks[event].append(hook)
+        self.install()
+        return hook
+
+    def remove_hook(self, event: str, hook):
+        self.hooks[event].remove(hook)
+        self.install()
+
+    def enable_counters(self):
+        if self.counters is None:
+            self.counters = Counter()
+            self.install()
+
+    def disable_counters(self):
+        self.counters = None
+        self.install()
+
+    def clear(self):
+        """Drops every hook & the counters, the interpreter runs uninstrumented again"""
+        for hooks in self.hooks.values():
+            hooks.clear()
+        self.counters = None
+        self.install()
+
+    def node_counts(self) -> dict[str, dict[str, int]]:
+        """Hits per node kind of every node that ran, keyed by 'line:column' of the node's token"""
+        counts: dict[str, dict[str, int]] = {}
+        for node, hits in self.counters.items():
+            kinds = counts.setdefault(node_position(node), {})
+            kind = type(node).__name__
+            kinds[kind] = kinds.get(kind, 0) + hits
+
+        def order(position: str):
+            return tuple(map(int, position.split(":"))) if position != NO_POSITION else (0, 0)
+        return {position: counts[position] for position in sorted(counts, key=order)}
+
+    def dump_node_counts(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.node_counts(), f, indent=2)
+
+    def install(self):
+        """Sets the instrumented methods the current hooks & counters need on the interpreter"""
+        interpreter = self.interpreter
+        for name in self.installed:
+            delattr(interpreter, name)
+
+        hooks = self.hooks
+        # name -> method, each layer wraps what's there or the class' method
+        methods = {}
+
+        if hooks["call_enter"] or hooks["call_exit"]:
+            methods["visit_call"] = self.traced_call
+            methods["tail_call"] = self.traced_tail_call
+
+        if hooks["loop_iteration"]:
+            methods["execute"] = self.traced_execute
+            for name in ("visit_while", "visit_forrange"):
+                methods[name] = self.loop(getattr(interpreter, name))
+
+        if self.counters is not None:
+            # A plain tail_call runs its Call node without visiting it
+            counted = STATEMENT_VISITS + EXPRESSION_VISITS + ([] if "tail_call" in methods else ["tail_call"])
+            for name in counted:
+                methods[name] = self.counted(methods.get(name) or getattr(interpreter, name))
+
+        if hooks["before_statement"] or hooks["after_statement"]:
+            for name in STATEMENT_VISITS:
+                methods[name] = self.hooked_statement(methods.get(name) or getattr(interpreter, name))
+
+        for name, method in methods.items():
+            setattr(interpreter, name, method)
+        self.installed = list(methods)
+
+    ### instrumented methods ###
+
+    def counted(self, method):
+        counters = self.counters
+
+        def visit(node):
+            counters[node] += 1
+            return method(node)
+        return visit
+
+    def hooked_statement(self, method):
+        before, after = self.hooks["before_statement"], self.hooks["after_statement"]
+
+        def visit(statement):
+            for hook in before:
+                hook(statement)
+            signal = method(statement)
+            for hook in after:
+                hook(statement)
+            return signal
+        return visit
+
+    def loop(self, method):
+        loop_bodies = self.loop_bodies
+
+        def visit(statement):
+            loop_bodies[statement.body] = statement
+            return method(statement)
+        return visit
+
+    def traced_execute(self, statement: Stmt):
+        # Loops run their body through execute, see Interpreter.visit_while
+        loop = self.loop_bodies.get(statement)
+        if loop is not None:
+            for hook in self.hooks["loop_iteration"]:
+                hook(loop)
+        return statement.accept(self.interpreter)
+
+    def traced_call(self, call: Call):
+        """Interpreter.visit_call with the call hooks around the callee's entry"""
+        interpreter = self.interpreter
+        callee: any = interpreter.evaluate(call.callee)
+
+        cache: CallSiteCache = interpreter.call_caches.get(call)
+        if cache is None:
+            cache = interpreter.call_caches[call] = CallSiteCache(call.paren, len(call.arguments))
+        if callee is cache.callee:
+            cache.hits += 1
+            entry = cache.entry
+        else:
+            entry = cache.lookup(callee)
+
+        arguments: list[any] = [interpreter.evaluate(arg) for arg in call.arguments]
+        # The entry may extend the list it's given, the hooks get the arguments alone
+        for hook in self.hooks["call_enter"]:
+            hook(call, callee, tuple(arguments))
+        value: any = entry(interpreter, arguments)
+        for hook in self.hooks["call_exit"]:
+            hook(call, callee, value)
+        return value
+
+    def traced_tail_call(self, call: Call):
+        return ReturnSignal(self.interpreter.visit_call(call))
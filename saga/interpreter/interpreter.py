@@ -1,62 +1,100 @@
 from typing import override
 
 from callables.saga_callable import SAGACallable, SAGAFunction, SAGAClass, SAGAInstance
-from callables.native_callables import (
-    ClockCallable,
-    RandomCallable,
-    RandomIntCallable,
-    InputCallable,
-    ReadFileCallable,
-    WriteFileCallable,
-    AppendFileCallable,
-    FileExistsCallable,
-    DeleteFileCallable
-)
+from callables.native_callables import natives
 import expr.expr as expr
-from expr.expr import Expr, Grouping, Binary, Unary, Ternary, Literal
+from expr.expr import Expr, Grouping, Binary, Unary, Ternary, Literal, Call, Variable
 
 import stmt.stmt as stmt
-from stmt.stmt import Stmt, Expression, Say, Let, If, Break, Continue, Pass
+from stmt.stmt import Stmt, Expression, Say, Let, If, ForRange, Break, Continue, Pass, Spawn, Yield
 
 from lexer.token_type import TokenType
 from lexer.token import Token
 
-from errors.errors import RuntimeError, Error, ContinueException, BreakException, ReturnException
+from errors.errors import RuntimeError, Diagnostics
+
+from interpreter.completion import BREAK, CONTINUE, ReturnSignal, TailCall
+from interpreter.operators import counted_range, no_coroutines
+from interpreter.inline_cache import CallSiteCache, call_site_stats
+from interpreter.rope import STRINGS, concat
 
 from environment.environment import Environment
 
+from output.output import Output
+
 # TODO: Handle distinction between floats & integer in SAGA
 
 class Interpreter(expr.Visitor, stmt.Visitor):
 
-    def __init__(self):
+    def __init__(self, output: Output = None):
         self.globals = Environment()
         self.env = self.globals
+        # Resolver output: expression/declaration -> (depth, slot), block/function -> slot count
         self.locals = {}
+        self.slot_counts = {}
+        # Call node -> CallSiteCache, filled as call sites run
+        self.call_caches = {}
+        # Hooks & node counters, created on first use
+        self.instrumentation: "Instrumentation" = None
+        # Where say writes
+        self.output: Output = output if output is not None else Output()
 
         # define native functions
-        self.globals.define("clock", ClockCallable())
-        self.globals.define("random", RandomCallable())
-        self.globals.define("random_int", RandomIntCallable())
-        self.globals.define("input", InputCallable())
-        self.globals.define("read_file", ReadFileCallable())
-        self.globals.define("write_file", WriteFileCallable())
-        self.globals.define("append_file", AppendFileCallable())
-        self.globals.define("file_exists", FileExistsCallable())
-        self.globals.define("delete_file", DeleteFileCallable())
-
-    def interpret(self, statements: list[Stmt]):
+        for name, native in natives().items():
+            self.globals.define(name, native)
+
+    def interpret(self, statements: list[Stmt], diagnostics: Diagnostics = None):
+        """Runs a program, a runtime error stopping it is reported into diagnostics"""
+        try:
+            self.run_program(statements)
+        except RuntimeError as error:
+            if diagnostics is None:
+                diagnostics = Diagnostics()
+            diagnostics.runtime_error(error)
+
+    def run_program(self, statements: list[Stmt]):
+        """Runs a program, a RuntimeError stopping it is raised once what was said before is flushed"""
         try:
             for stmt in statements:
                 self.execute(stmt)
-        except RuntimeError as error:
-            Error.runtime_error(error)
+        finally:
+            self.output.flush()
 
-    def execute(self, statement: Stmt):
-        statement.accept(self)
+    def reset_globals(self):
+        """Back to a global environment holding only the natives, in place, for the next program"""
+        values = self.globals.values
+        values.clear()
+        values.update(natives())
+        self.env = self.globals
+        # The callees they hold were globals of the previous program
+        for cache in self.call_caches.values():
+            cache.clear()
 
-    def resolve(self, expr: Expr, depth: int):
-        self.locals[expr] = depth
+    def execute(self, statement: Stmt):
+        """Runs a statement, returns None or the completion signal of a break, continue or return"""
+        return statement.accept(self)
+
+    def instrument(self) -> "Instrumentation":
+        """Hooks & per-node counters of this interpreter, see Instrumentation"""
+        if self.instrumentation is None:
+            # Only imported when asked for, it pulls in json & collections
+            from interpreter.instrumentation import Instrumentation
+            self.instrumentation = Instrumentation(self)
+        return self.instrumentation
+
+    def resolve(self, expr: Expr, depth: int, slot: int):
+        self.locals[expr] = (depth, slot)
+
+    def resolve_scope(self, node: Stmt, slot_count: int):
+        self.slot_counts[node] = slot_count
+
+    def declare(self, declaration: Stmt, name: Token, value: any):
+        """Binds a declared name, in its slot if the Resolver found it local"""
+        location = self.locals.get(declaration)
+        if location is None:
+            self.env.define(name.lexeme, value)
+        else:
+            self.env.slots[location[1]] = value
 
     def execute_block(self, statements: list[Stmt], environment: Environment):
         previous: Environment = self.env
@@ -64,20 +102,20 @@ class Interpreter(expr.Visitor, stmt.Visitor):
             self.env = environment
 
             for stmt in statements:
-                self.execute(stmt)
+                signal = self.execute(stmt)
+                if signal is not None:
+                    return signal
         finally:
             self.env = previous
 
     @override
     def visit_block(self, block):
-        self.execute_block(block.statements, Environment(self.env))
-        return None
+        return self.execute_block(block.statements, Environment(self.env, self.slot_counts.get(block, 0)))
 
     @override
     def visit_class(self, stmt):
-        self.env.define(stmt.name.lexeme, None)
         saga_class: SAGAClass = SAGAClass(stmt.name.lexeme)
-        self.env.assign(stmt.name, saga_class) 
+        self.declare(stmt, stmt.name, saga_class)
 
     @override
     def visit_literal(self, literal: Literal):
@@ -147,10 +185,11 @@ class Interpreter(expr.Visitor, stmt.Visitor):
                 # addition or concatenation
                 if isinstance(left, (int, float)) and isinstance(right, (int, float)):
                     return left + right
-                elif isinstance(left, str) and isinstance(right, str):
-                    return left + right
-                elif (isinstance(left, (int, float)) and isinstance(right, str)) or (isinstance(left, str) and isinstance(right, (int, float))):
-                    return str(left) + str(right)
+                # Long strings are built as ropes, see Rope
+                elif isinstance(left, STRINGS) and isinstance(right, STRINGS):
+                    return concat(left, right)
+                elif (isinstance(left, (int, float)) and isinstance(right, STRINGS)) or (isinstance(left, STRINGS) and isinstance(right, (int, float))):
+                    return concat(left, right)
                 raise RuntimeError(binary.operator, 
                     "Operands must be two numbers or two strings.")
             case TokenType.SLASH:
@@ -168,20 +207,30 @@ class Interpreter(expr.Visitor, stmt.Visitor):
     @override
     def visit_call(self, expr):
         callee: any = self.evaluate(expr.callee)
-        if not isinstance(callee, SAGACallable):
-            raise RuntimeError(expr.paren, "Can only call functions or classes.")
 
-        arguments: list[any] = []
-        for arg in expr.arguments:
-            arguments.append(self.evaluate(arg))
-        
-        function: SAGACallable = callee
-        
-        # Handle variadic functions (arity -1) differently
-        if function.arity() != -1 and len(arguments) != function.arity():
-            raise RuntimeError(expr.paren, f"Expected {function.arity()} arguments but got {len(arguments)}.")
+        cache: CallSiteCache = self.call_caches.get(expr)
+        if cache is None:
+            cache = self.call_caches[expr] = CallSiteCache(expr.paren, len(expr.arguments))
+
+        # Same callee as last time: already validated, straight to its entry
+        if callee is cache.callee:
+            cache.hits += 1
+            entry = cache.entry
+        else:
+            entry = cache.lookup(callee)
 
-        return function.call(self, arguments)
+        arguments: list[any] = [self.evaluate(arg) for arg in expr.arguments]
+        try:
+            return entry(self, arguments)
+        except RuntimeError as error:
+            # A native's own error, reported at the call
+            if error.token is None:
+                error.token = expr.paren
+            raise
+
+    def call_site_stats(self) -> dict[str, dict]:
+        """Inline cache hit/miss counters of the call sites run so far"""
+        return call_site_stats(self.call_caches)
     
     @override
     def visit_ternary(self, ternary: Ternary):
@@ -197,9 +246,9 @@ class Interpreter(expr.Visitor, stmt.Visitor):
         return self.look_up_variable(variable.name, variable)
 
     def look_up_variable(self, name: Token, variable: Expr):
-        distance: int = self.locals.get(variable)
-        if distance is not None:
-            return self.env.get_at(distance, name.lexeme)
+        location = self.locals.get(variable)
+        if location is not None:
+            return self.env.get_at(*location)
         else:
             return self.globals.get(name)
 
@@ -207,9 +256,9 @@ class Interpreter(expr.Visitor, stmt.Visitor):
     def visit_assign(self, assign):
         value: any = self.evaluate(assign.value)
 
-        distance: int = self.locals.get(assign)
-        if distance is not None:
-            self.env.assign_at(distance, assign.name, value)
+        location = self.locals.get(assign)
+        if location is not None:
+            self.env.assign_at(*location, value)
         else:
             self.globals.assign(assign.name, value)
 
@@ -224,57 +273,99 @@ class Interpreter(expr.Visitor, stmt.Visitor):
     def visit_function(self, stmt):
         # We pass the environment that is active when 
         # the function is declared not when it's called
-        func: SAGAFunction = SAGAFunction(stmt, self.env)
-        self.env.define(stmt.name.lexeme, func)
+        func: SAGAFunction = SAGAFunction(stmt, self.env, self.slot_counts[stmt])
+        self.declare(stmt, stmt.name, func)
         return None
     
     @override
     def visit_break(self, stmt: Break):
-        raise BreakException()
+        return BREAK
 
     @override
     def visit_continue(self, stmt: Continue):
-        raise ContinueException()
+        return CONTINUE
 
     @override
     def visit_pass(self, stmt: Pass):
         # Pass statement does nothing
         return None
 
+    @override
+    def visit_spawn(self, stmt: Spawn):
+        no_coroutines(stmt.keyword)
+
+    @override
+    def visit_yield(self, stmt: Yield):
+        no_coroutines(stmt.keyword)
+
     @override
     def visit_while(self, stmt):
+        while self.is_truthful(self.evaluate(stmt.condition)):
+            signal = self.execute(stmt.body)
+            if signal is BREAK:
+                break
+            if signal is not None and signal is not CONTINUE:
+                # return from the enclosing function
+                return signal
+        return None
+
+    @override
+    def visit_forrange(self, stmt: ForRange):
+        values = counted_range(self.evaluate(stmt.start), self.evaluate(stmt.end), stmt.name)
+
+        # The loop variable lives in a scope of its own around the body
+        env: Environment = Environment(self.env, self.slot_counts[stmt])
+        slots = env.slots
+        slot: int = self.locals[stmt][1]
+
+        previous: Environment = self.env
         try:
-            while self.is_truthful(self.evaluate(stmt.condition)):
-                try:
-                    self.execute(stmt.body)
-                except ContinueException:
-                    continue  
-                except BreakException:
-                    break 
-        except BreakException:
-            pass  
+            self.env = env
+            for value in values:
+                slots[slot] = value
+                signal = self.execute(stmt.body)
+                if signal is BREAK:
+                    break
+                if signal is not None and signal is not CONTINUE:
+                    return signal
+        finally:
+            self.env = previous
         return None
 
     @override
     def visit_if(self, stmt: If):
         if self.is_truthful(self.evaluate(stmt.condition)):
-            self.execute_block(stmt.then_branch.statements, self.env)
+            return self.execute_block(stmt.then_branch.statements, self.env)
         elif stmt.else_branch != None:
-            self.execute_block(stmt.else_branch.statements, self.env)
+            return self.execute_block(stmt.else_branch.statements, self.env)
         return None
 
     @override
     def visit_say(self, say: Say):
         value: any = self.evaluate(say.expression)
-        print(value)
+        self.output.say(value)
         return None
     
     @override
     def visit_return(self, stmt):
+        # Nothing runs after a return, calling a function there is a tail call
+        if type(stmt.value) is Call and type(stmt.value.callee) is Variable:
+            return self.tail_call(stmt.value)
+
         value: any = None
         if stmt.value is not None: value = self.evaluate(stmt.value)
 
-        raise ReturnException(value)
+        return ReturnSignal(value)
+
+    def tail_call(self, call: Call):
+        """return f(...): SAGA functions are handed back to the running call, see SAGAFunction.call"""
+        callee: any = self.evaluate(call.callee)
+        if type(callee) is SAGAFunction and len(call.arguments) == len(callee.declaration.params):
+            return TailCall(callee, [self.evaluate(arg) for arg in call.arguments])
+
+        # Natives, classes & arity errors go through a regular call, looking
+        # the variable up again has no side effects
+        return ReturnSignal(self.visit_call(call))
 
     @override
     def visit_let(self, let: Let):
@@ -282,7 +373,7 @@ class Interpreter(expr.Visitor, stmt.Visitor):
         if let.initializer is not None:
             value = self.evaluate(let.initializer)
         
-        self.env.define(let.name.lexeme, value)
+        self.declare(let, let.name, value)
         return None
 
     def evaluate(self, expr: Expr):
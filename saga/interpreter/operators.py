@@ -0,0 +1,64 @@
+from lexer.token import Token
+
+from errors.errors import RuntimeError
+
+from interpreter.rope import STRINGS, concat
+
+# Operator semantics shared by the backends that do not go through Interpreter.visit_binary
+
+
+def check_number_operand(operator: Token, operand: any):
+    if isinstance(operand, (int, float)): return
+    raise RuntimeError(operator, "Operand must be a number.")
+
+
+def check_number_operands(operator: Token, left: any, right: any):
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)): return
+    raise RuntimeError(operator, "Operands must be numbers.")
+
+
+def no_coroutines(keyword: Token):
+    """spawn & yield on the tree interpreters, which keep a running function's state on the Python stack.
+
+    saga.check_backend already rejects them before a run, this is for statements interpreted without it.
+    """
+    raise RuntimeError(keyword, "Coroutines need the vm backend (--backend vm).")
+
+
+def add(left: any, right: any, operator: Token):
+    """Slow path of '+', same rules as Interpreter.visit_binary"""
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+        return left + right
+    elif isinstance(left, STRINGS) and isinstance(right, STRINGS):
+        return concat(left, right)
+    elif (isinstance(left, (int, float)) and isinstance(right, STRINGS)) or (isinstance(left, STRINGS) and isinstance(right, (int, float))):
+        return concat(left, right)
+    raise RuntimeError(operator, "Operands must be two numbers or two strings.")
+
+
+def divide(left: any, right: any, operator: Token):
+    check_number_operands(operator, left, right)
+    if right != 0:
+        return left / right
+    raise RuntimeError(operator, "Cannot divide by zero.")
+
+
+def comma(left: any, right: any):
+    left_values = left if isinstance(left, tuple) else (left,)
+    right_values = right if isinstance(right, tuple) else (right,)
+    return left_values + right_values
+
+
+def counted_range(start: any, end: any, name: Token):
+    """Values taken by the variable of 'for name in start..end', both ends inclusive"""
+    check_number_operands(name, start, end)
+    if type(start) is int and type(end) is int:
+        return range(start, end + 1)
+    return fractional_range(start, end)
+
+
+def fractional_range(start: any, end: any):
+    value = start
+    while value <= end:
+        yield value
+        value = value + 1
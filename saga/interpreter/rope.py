@@ -0,0 +1,65 @@
+# Concatenations shorter than this just build the Python string
+ROPE_THRESHOLD = 256
+
+
+class Rope:
+    """String value of a long concatenation, only joined once its text is needed.
+
+    Ropes appended to one another share a list of pieces, each one knowing
+    how many of them it's made of. Appending to the rope holding every piece
+    of the list extends it in place, so `out = out + line` in a loop is
+    amortized O(1) instead of copying out on every iteration. Appending to an
+    older rope copies its pieces first, a value never changes.
+
+    str() (say, natives), ==, != & hash flatten it, the joined text then
+    replaces its pieces.
+    """
+    __slots__ = ("pieces", "count")
+
+    def __init__(self, pieces: list[str], count: int):
+        self.pieces = pieces
+        self.count = count
+
+    def append(self, text: str) -> "Rope":
+        pieces = self.pieces
+        if len(pieces) != self.count:
+            # Another rope already appended to our pieces
+            pieces = pieces[:self.count]
+        pieces.append(text)
+        return Rope(pieces, self.count + 1)
+
+    def flatten(self) -> str:
+        pieces = self.pieces
+        if self.count == 1:
+            return pieces[0]
+        text = "".join(pieces if len(pieces) == self.count else pieces[:self.count])
+        self.pieces, self.count = [text], 1
+        return text
+
+    __str__ = flatten
+
+    def __repr__(self):
+        return repr(self.flatten())
+
+    def __eq__(self, other):
+        if type(other) is Rope:
+            other = other.flatten()
+        return self.flatten() == other
+
+    def __hash__(self):
+        return hash(self.flatten())
+
+
+# Types of a SAGA string value
+STRINGS = (str, Rope)
+
+
+def concat(left: any, right: any) -> str | Rope:
+    """'+' of a string & a string or a number, either way round"""
+    if type(left) is Rope:
+        return left.append(str(right))
+
+    left, right = str(left), str(right)
+    if len(left) + len(right) < ROPE_THRESHOLD:
+        return left + right
+    return Rope([left, right], 2)
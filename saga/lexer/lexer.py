@@ -1,311 +1,247 @@
+import re
+from collections.abc import Iterator
+
 from .token_type import TokenType
 from .token import Token
-from errors.errors import Error
+from errors.errors import Diagnostics, LEX
+
+KEYWORDS = {
+    "if": TokenType.IF,
+    "else": TokenType.ELSE,
+    "and": TokenType.AND,
+    "or": TokenType.OR,
+    "while": TokenType.WHILE,
+    "for": TokenType.FOR,
+    "break": TokenType.BREAK,
+    "continue": TokenType.CONTINUE,
+    "return": TokenType.RETURN,
+    "fun": TokenType.FUN,
+    "let": TokenType.LET,
+    "true": TokenType.TRUE,
+    "false": TokenType.FALSE,
+    "nil": TokenType.NIL,
+    "import": TokenType.IMPORT,
+    "in": TokenType.IN,
+    "say": TokenType.SAY,
+    "class": TokenType.CLASS,
+    "this": TokenType.THIS,
+    "super": TokenType.SUPER,
+    "pass": TokenType.PASS,
+    "spawn": TokenType.SPAWN,
+    "yield": TokenType.YIELD
+}
+
+OPERATORS = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "..": TokenType.RANGE,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    "/": TokenType.SLASH,
+    "*": TokenType.STAR,
+    ":": TokenType.COLON,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "?": TokenType.QUESTION,
+}
+
+# One alternative per kind of lexeme, roughly the most frequent first (comments
+# have to come before the '/' operator). A newline takes the indentation of the
+# next line along. ASCII covers nearly every character, anything else falls
+# through to 'other' and gets the same isdigit()/isalpha() checks as the
+# reference lexer.
+TOKEN_PATTERN = re.compile(r"""
+    (?P<identifier>[A-Za-z]\w*)
+  | (?P<space>[ \t\r]+)
+  | (?P<comment>//[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<operator>\.\.|[<>=!]=|[(),.\-+/*:<>=!?])
+  | (?P<newline>\n(?P<indentation>\ *))
+  | (?P<number>[0-9]\d*(?:\.\d+)?)
+  | (?P<string>"[^"]*")
+  | (?P<unterminated>"[^"]*)
+  | (?P<other>.)
+""", re.VERBOSE)
+
+WORD = re.compile(r"\w*")
+COMMENT_DELIMITERS = re.compile(r"/\*|\*/")
+
 
 class Lexer:
+    """Table-driven lexer, one regex match per lexeme.
+
+    Produces exactly the token stream of the reference lexer, including its
+    INDENT/DEDENT/NEWLINE rules and line/column numbers: a token's column is
+    where it ends, counted from the last newline outside strings and comments
+    (from 1 on the first line, from 0 on the following ones).
 
-    def __init__(self, source: str):
+    tokenize() yields the tokens lazily so a parser can consume them while the
+    source is still being lexed, lex_tokens() collects them into a list.
+    """
+
+    def __init__(self, source: str, diagnostics: Diagnostics = None):
         self.source = source
         self.tokens = []
-        self.start = 0
-        self.current = 0
-        self.line = 1
-        self.column = 1
-        self.indentation_level = 0
-        self.at_line_start = False
-        self.line_has_content = False  # Track if current line has significant tokens
-
-        self.keywords = {
-            "if": TokenType.IF,
-            "else": TokenType.ELSE,
-            "and": TokenType.AND,
-            "or": TokenType.OR,
-            "while": TokenType.WHILE,
-            "for": TokenType.FOR,
-            "break": TokenType.BREAK,
-            "continue": TokenType.CONTINUE, 
-            "return": TokenType.RETURN,
-            "fun": TokenType.FUN, 
-            "let": TokenType.LET,
-            "true": TokenType.TRUE,
-            "false": TokenType.FALSE,
-            "nil": TokenType.NIL,
-            "import": TokenType.IMPORT,
-            "in": TokenType.IN,
-            "say": TokenType.SAY,
-            "class": TokenType.CLASS,
-            "this": TokenType.THIS,
-            "super": TokenType.SUPER,
-            "pass": TokenType.PASS
-        }
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
 
     def lex_tokens(self) -> list[Token]:
         """Performs lexical analysis on the source string"""
-        while not self.is_at_end():
-            # start of the next lexeme
-            self.start = self.current
-            self.lex_token()
-        
-        # Append an EOF at then end of the token list
-        self.tokens.append(Token(
-            type_=TokenType.EOF,
-            lexeme="",
-            literal=None,
-            line=self.line,
-            column=self.column
-        ))
-
+        self.tokens.extend(self.tokenize())
         return self.tokens
 
-    def is_at_end(self) -> bool:
-        """Checks if the lexer has reached the end of the source file"""
-        return self.current >= len(self.source)
-
-    def lex_token(self):
-        # Handle indentation at the start of every line
-        if self.at_line_start:
-            self.handle_indentation()
-            self.at_line_start = False
-            # After handling indentation, check if we're at end
-            if self.is_at_end():
-                return
-            self.start = self.current
-
-        c = self.advance()
-
-        match c:
-            case '(':
-                self.line_has_content = True
-                self.add_token(TokenType.LEFT_PAREN)
-            case ')':
-                self.line_has_content = True
-                self.add_token(TokenType.RIGHT_PAREN)
-            case '{':
-                self.line_has_content = True
-                self.add_token(TokenType.LEFT_BRACE)
-            case '}':
-                self.line_has_content = True
-                self.add_token(TokenType.RIGHT_BRACE)
-            case ',':
-                self.line_has_content = True
-                self.add_token(TokenType.COMMA)
-            case '.':
-                self.line_has_content = True
-                if self.match('.'):
-                    self.add_token(TokenType.RANGE)
-                else:
-                    self.add_token(TokenType.DOT)
-            case '-':
-                self.line_has_content = True
-                self.add_token(TokenType.MINUS)
-            case '+':
-                self.line_has_content = True
-                self.add_token(TokenType.PLUS)
-            case '/':
-                if self.match('/'):
-                    # Single-line comment - don't mark as content
-                    while self.peek() != '\n' and not self.is_at_end():
-                        self.advance()
-                elif self.match('*'):
-                    # Block comment - don't mark as content
-                    self.block_comment()
-                else:
-                    # Division operator - this IS content
-                    self.line_has_content = True
-                    self.add_token(TokenType.SLASH)
-            case '*':
-                self.line_has_content = True
-                self.add_token(TokenType.STAR)
-            case  ':':
-                self.line_has_content = True
-                self.add_token(TokenType.COLON)
-            case '<':
-                self.line_has_content = True
-                if self.match('='):
-                    self.add_token(TokenType.LESS_EQUAL)
-                else:
-                    self.add_token(TokenType.LESS)
-            case '>':
-                self.line_has_content = True
-                if self.match('='):
-                    self.add_token(TokenType.GREATER_EQUAL)
-                else:
-                    self.add_token(TokenType.GREATER)
-            case '=':
-                self.line_has_content = True
-                if self.match('='):
-                    self.add_token(TokenType.EQUAL_EQUAL)
-                else:
-                    self.add_token(TokenType.EQUAL)
-            case '!':
-                self.line_has_content = True
-                if self.match('='):
-                    self.add_token(TokenType.BANG_EQUAL)
-                else:
-                    self.add_token(TokenType.BANG)
-            case '?':
-                self.line_has_content = True
-                self.add_token(TokenType.QUESTION)
-            case '\t' | '\r' | ' ':
-                pass  # Ignore whitespace - don't mark as content
-            case '\n':
-                # Only emit NEWLINE if the line had actual content
-                if self.line_has_content:
-                    self.add_token(TokenType.NEWLINE)
-                self.line += 1
-                self.column = 0
-                self.at_line_start = True
-                self.line_has_content = False  # Reset for next line
-            case '"':
-                self.line_has_content = True
-                self.string()
-            case _:
-                if c.isdigit():
-                    self.line_has_content = True
-                    self.number()
-                elif c.isalpha():
-                    self.line_has_content = True
-                    self.identifier()
+    def tokenize(self) -> Iterator[Token]:
+        """Lexes the source lazily, yielding each token as soon as it's scanned"""
+        source = self.source
+        end = len(source)
+        keywords = KEYWORDS
+        operators = OPERATORS
+        IDENTIFIER = TokenType.IDENTIFIER
+
+        pos = 0
+        line = 1
+        # column of a token is its end offset minus line_start
+        line_start = -1
+        indentation_level = 0
+        line_has_content = False
+
+        while pos < end:
+            # Block comments & non-ASCII lexemes are scanned by hand, the
+            # matching then resumes after them
+            resume = None
+
+            for m in TOKEN_PATTERN.finditer(source, pos):
+                kind = m.lastgroup
+
+                if kind == "identifier":
+                    line_has_content = True
+                    text = m.group()
+                    yield Token(keywords.get(text, IDENTIFIER), text, None, line, m.end() - line_start)
+
+                elif kind == "space" or kind == "comment":
+                    continue
+
+                elif kind == "operator":
+                    line_has_content = True
+                    text = m.group()
+                    yield Token(operators[text], text, None, line, m.end() - line_start)
+
+                elif kind == "newline":
+                    newline_end = m.start() + 1
+                    # Only emit NEWLINE if the line had actual content
+                    if line_has_content:
+                        yield Token(TokenType.NEWLINE, "\n", None, line, newline_end - line_start)
+                    line += 1
+                    line_start = newline_end
+                    line_has_content = False
+
+                    # Indentation of the new line, unless it is blank (only
+                    # spaces before newline/EOF)
+                    spaces_end = m.end()
+                    if spaces_end == end or source[spaces_end] == "\n":
+                        continue
+
+                    level = (spaces_end - newline_end) // 4
+                    if level != indentation_level:
+                        lexeme = m.group("indentation")
+                        column = spaces_end - line_start
+                        line_has_content = True
+                        if level > indentation_level:
+                            # Only indent by one token whatever the jump
+                            yield Token(TokenType.INDENT, lexeme, None, line, column)
+                        else:
+                            for _ in range(indentation_level - level):
+                                yield Token(TokenType.DEDENT, lexeme, None, line, column)
+                        indentation_level = level
+
+                elif kind == "number":
+                    line_has_content = True
+                    text = m.group()
+                    if "." in text:
+                        yield Token(TokenType.FLOAT, text, float(text), line, m.end() - line_start)
+                    else:
+                        yield Token(TokenType.INTEGER, text, int(text), line, m.end() - line_start)
+
+                elif kind == "string":
+                    line_has_content = True
+                    text = m.group()
+                    line += text.count("\n")
+                    yield Token(TokenType.STRING, text, text[1:-1], line, m.end() - line_start)
+
+                elif kind == "block_comment":
+                    resume, line = self.block_comment(m.end(), line, line_start)
+                    break
+
+                elif kind == "unterminated":
+                    line_has_content = True
+                    line += m.group().count("\n")
+                    self.diagnostics.report(line, m.end() - line_start, "Unterminated string", LEX)
+
                 else:
-                    self.line_has_content = True
-                    Error.report(self.line, self.column, "Unexpected character")
-        
-    def advance(self):
-        """Advances the lexer and returns the next character"""
-        self.current += 1
-        self.column += 1
-        return self.source[self.current-1]
-    
-    def add_token(self, type_: TokenType):
-        """Adds a non-literal token"""
-        self.add_token_with_literal(type_, None)
-    
-    def add_token_with_literal(self, type_, literal: any):
-        """Adss a token"""
-        lexeme = self.source[self.start:self.current]
-        self.tokens.append(
-            Token(
-                type_,
-                lexeme,
-                literal,
-                self.line,
-                self.column
-            )
-        )        
-
-    def match(self, expected: chr) -> bool:
-        """checks if the current character matches the expected character"""
-        if self.is_at_end():
-            return False
-        if self.source[self.current] != expected:
-            return False
-        self.current += 1
-        self.column += 1
-        return True
-
-    def peek(self):
-        """Lookahead method, works like advance but doesn't consume the token"""
-        if self.is_at_end():
-            return ''
-        return self.source[self.current]
-
-    def peek_next(self):
-        """A second character lookahead"""
-        if self.current + 1 >= len(self.source):
-            return ''
-        return self.source[self.current+1]
-
-    def peek_previous(self):
-        """Backwards lookahead"""
-        if self.current > 1:
-            return self.source[self.current-2]
-
-    def string(self):
-        """Adds a string litteral"""
-        while self.peek() != '"' and not self.is_at_end():
-            if self.peek()  == '\n':
-                self.line += 1
-            self.advance()
-
-        if self.is_at_end():
-            Error.report(self.line, self.column, "Unterminated string")
-        
-        # closing "
-        self.advance()
-
-        # Trim the quotes
-        value = self.source[self.start+1:self.current-1]
-        self.add_token_with_literal(TokenType.STRING, value)
-
-    def number(self):
-        """Adds an number Litteral"""
-        # Integer part
-        while self.peek().isdigit():
-            self.advance()
-            
-        # Fraction
-        if self.peek() == '.' and self.peek_next().isdigit():
-            self.advance()  # consume the "."
-
-            while self.peek().isdigit():
-                self.advance()
-
-            value = float(self.source[self.start:self.current])
-            self.add_token_with_literal(TokenType.FLOAT, value)
-        else:
-            value = int(self.source[self.start:self.current])
-            self.add_token_with_literal(TokenType.INTEGER, value)
-    
-    def identifier(self):
-        """Reads & Adds an identifier keyword"""
-        while self.peek().isalnum() or self.peek() == '_':
-            self.advance()
-        
-        text = self.source[self.start:self.current]
-        token_type = self.keywords.get(text)
-        if not token_type:
-            # generic identifer
-            token_type = TokenType.IDENTIFIER
-        self.add_token(token_type)
-    
-    def block_comment(self):
-        """Handles C-style block comments"""
+                    line_has_content = True
+                    token, resume = self.other(m.group(), m.end(), line, line_start)
+                    if token is not None:
+                        yield token
+                    break
+
+            pos = end if resume is None else resume
+
+        # End the token stream with an EOF
+        yield Token(TokenType.EOF, "", None, line, end - line_start)
+
+    def block_comment(self, pos: int, line: int, line_start: int) -> tuple[int, int]:
+        """Skips a nested C-style block comment, returns the position & line after it"""
+        source = self.source
+        start = pos
         nesting_level = 1
 
-        while nesting_level > 0 and not self.is_at_end():
-            c = self.advance()
-            
-            if c == '/' and self.match('*'):
-                nesting_level += 1
-            elif c == '*' and self.match('/'):
-                nesting_level -= 1
-            elif c == '\n':
-                self.line += 1
-        
+        for delimiter in COMMENT_DELIMITERS.finditer(source, pos):
+            nesting_level += 1 if delimiter.group() == "/*" else -1
+            if nesting_level == 0:
+                pos = delimiter.end()
+                break
+        else:
+            pos = len(source)
+
+        line += source.count("\n", start, pos)
         if nesting_level > 0:
-            Error.report(self.line, self.column, "Unterminated block comment")
-
-    def handle_indentation(self):
-        """indents/dedents based on the reached level"""
-        local_indentation_level = 0
-        while self.peek() == ' ' and not self.is_at_end():
-            self.advance()
-            local_indentation_level += 1
-
-        # Skip if this is a blank line (only whitespace before newline/EOF)
-        if self.peek() == '\n' or self.is_at_end():
-            return
-
-        local_indentation_level = local_indentation_level // 4
-
-        if local_indentation_level > self.indentation_level:
-            # Only indent by one level at a time
-            self.indentation_level = local_indentation_level
-            self.line_has_content = True
-            self.add_token(TokenType.INDENT)
-        elif local_indentation_level < self.indentation_level:
-            # Emit multiple DEDENTs if we jump multiple levels
-            while self.indentation_level > local_indentation_level:
-                self.line_has_content = True
-                self.add_token(TokenType.DEDENT)
-                self.indentation_level -= 1
\ No newline at end of file
+            self.diagnostics.report(line, pos - line_start, "Unterminated block comment", LEX)
+        return pos, line
+
+    def other(self, c: str, pos: int, line: int, line_start: int) -> tuple[Token | None, int]:
+        """Lexemes starting with a non-ASCII character, returns the token & the position after it"""
+        source = self.source
+        start = pos - 1
+
+        if c.isdigit():
+            while pos < len(source) and source[pos].isdigit():
+                pos += 1
+            is_float = pos + 1 < len(source) and source[pos] == "." and source[pos + 1].isdigit()
+            if is_float:
+                pos += 1
+                while pos < len(source) and source[pos].isdigit():
+                    pos += 1
+            text = source[start:pos]
+            try:
+                if is_float:
+                    return Token(TokenType.FLOAT, text, float(text), line, pos - line_start), pos
+                return Token(TokenType.INTEGER, text, int(text), line, pos - line_start), pos
+            except ValueError:
+                # Digits that aren't decimal ones, like '²', the reference lexer crashes on them
+                self.diagnostics.report(line, pos - line_start, f"Invalid number '{text}'", LEX)
+                return None, pos
+
+        if c.isalpha():
+            pos = WORD.match(source, pos).end()
+            text = source[start:pos]
+            return Token(KEYWORDS.get(text, TokenType.IDENTIFIER), text, None, line, pos - line_start), pos
+
+        self.diagnostics.report(line, pos - line_start, "Unexpected character", LEX)
+        return None, pos
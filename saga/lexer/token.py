@@ -1,6 +1,8 @@
 from .token_type import TokenType
 
 class Token:
+    __slots__ = ("type", "lexeme", "literal", "line", "column")
+
     def __init__(self, type_: TokenType, lexeme: str, literal: any, line: int, column: int):
         self.type = type_
         self.lexeme = lexeme
@@ -80,6 +80,10 @@ class TokenType(Enum):
     THIS = 'this'
     SUPER = 'super'
 
+    # coroutines
+    SPAWN = 'spawn'
+    YIELD = 'yield'
+
     # end of file
     EOF = 'EOF'
 
@@ -0,0 +1,269 @@
+from typing import override
+
+import expr.expr as expr
+from expr.expr import Expr, Assign, Binary, Call, Grouping, Literal, Logical, Ternary, Unary, Variable
+
+import stmt.stmt as stmt
+from stmt.stmt import Stmt, Block, Expression, Function, Class, If, Say, Return, Let, While, ForRange, Break, Continue, Pass, Spawn, Yield
+
+from lexer.token_type import TokenType
+
+from errors.errors import RuntimeError
+
+from interpreter.interpreter import Interpreter
+from interpreter.rope import Rope
+
+# Tree-walker folding literal operands with its exact semantics, built by the
+# first Optimizer & shared by all: evaluating literals never touches its
+# globals, output or caches, so every parse can use it, from any thread
+evaluator: Interpreter = None
+
+
+class Optimizer(expr.Visitor, stmt.Visitor):
+    """AST pass run between parsing and resolving.
+
+    Folds operators whose operands are all literals, picks the taken side of
+    logical/ternary expressions & if statements with a literal condition, and
+    drops dead loops and pass statements. An operation that would fail is left
+    as is, so the error is still raised at runtime at its original token.
+
+    Expression visitors return the expression replacing the node, statement
+    visitors the list of statements replacing it.
+    """
+
+    def __init__(self):
+        global evaluator
+        if evaluator is None:
+            evaluator = Interpreter()
+        self.evaluator = evaluator
+        # Blocks & function bodies around the statement being optimized
+        self.scope_depth = 0
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        optimized: list[Stmt] = []
+        for statement in statements:
+            if statement is None:
+                # The parser leaves None behind for statements it had to skip
+                optimized.append(statement)
+            else:
+                optimized.extend(statement.accept(self))
+        return optimized
+
+    def optimize_expr(self, expression: Expr) -> Expr:
+        return expression.accept(self)
+
+    def optimize_body(self, body: Stmt) -> Stmt:
+        """Optimizes a statement that has to stay a single statement, like a loop body"""
+        optimized = self.optimize([body])
+        if len(optimized) == 1:
+            return optimized[0]
+        if isinstance(body, Block) or not optimized:
+            return Block(optimized)
+        # Wrapping several statements in a block would give their declarations a
+        # scope of their own, keep an if statement whose branch got inlined instead
+        return body
+
+    def optimize_branch(self, branch: Stmt) -> list[Stmt]:
+        # If branches run in the enclosing scope, so they can be inlined as is
+        statements = branch.statements if isinstance(branch, Block) else [branch]
+        return self.optimize(statements)
+
+    def dead_branch(self, branch: Stmt) -> list[Stmt]:
+        """What is left of an if branch that never runs.
+
+        Locals declared in a skipped branch still exist, set to nil, so only
+        their declarations are kept. Globals in a skipped branch never exist.
+        """
+        if branch is None or self.scope_depth == 0:
+            return []
+
+        declarations: list[Stmt] = []
+        for statement in branch.statements if isinstance(branch, Block) else [branch]:
+            if isinstance(statement, (Let, Function, Class)):
+                declarations.append(Let(statement.name, None))
+            elif isinstance(statement, If):
+                declarations.extend(self.dead_branch(statement.then_branch))
+                declarations.extend(self.dead_branch(statement.else_branch))
+        return declarations
+
+    def in_scope(self, optimize, *args):
+        self.scope_depth += 1
+        try:
+            return optimize(*args)
+        finally:
+            self.scope_depth -= 1
+
+    def fold(self, expression: Expr) -> Expr:
+        try:
+            value: any = self.evaluator.evaluate(expression)
+            # Literals hold plain strings
+            return Literal(value.flatten() if type(value) is Rope else value)
+        except RuntimeError:
+            return expression
+
+    def is_truthful(self, literal: Literal) -> bool:
+        return self.evaluator.is_truthful(literal.value)
+
+    ### expressions ###
+
+    @override
+    def visit_literal(self, literal: Literal):
+        return literal
+
+    @override
+    def visit_grouping(self, grouping: Grouping):
+        # Parentheses only matter to the parser
+        return self.optimize_expr(grouping.expression)
+
+    @override
+    def visit_variable(self, variable: Variable):
+        return variable
+
+    @override
+    def visit_assign(self, assign: Assign):
+        assign.value = self.optimize_expr(assign.value)
+        return assign
+
+    @override
+    def visit_unary(self, unary: Unary):
+        unary.right = self.optimize_expr(unary.right)
+        if isinstance(unary.right, Literal):
+            return self.fold(unary)
+        return unary
+
+    @override
+    def visit_binary(self, binary: Binary):
+        binary.left = self.optimize_expr(binary.left)
+        binary.right = self.optimize_expr(binary.right)
+
+        # Ranges have no value of their own, they are left for the for loop to use
+        if binary.operator.type == TokenType.RANGE:
+            return binary
+
+        if isinstance(binary.left, Literal) and isinstance(binary.right, Literal):
+            return self.fold(binary)
+        return binary
+
+    @override
+    def visit_logical(self, logical: Logical):
+        logical.left = self.optimize_expr(logical.left)
+        logical.right = self.optimize_expr(logical.right)
+
+        if not isinstance(logical.left, Literal):
+            return logical
+
+        # Short-circuiting, the result is whichever operand gets evaluated last
+        if logical.operator.type == TokenType.OR:
+            return logical.left if self.is_truthful(logical.left) else logical.right
+        return logical.right if self.is_truthful(logical.left) else logical.left
+
+    @override
+    def visit_ternary(self, ternary: Ternary):
+        ternary.condition = self.optimize_expr(ternary.condition)
+        ternary.then_branch = self.optimize_expr(ternary.then_branch)
+        ternary.else_branch = self.optimize_expr(ternary.else_branch)
+
+        if not isinstance(ternary.condition, Literal):
+            return ternary
+        return ternary.then_branch if self.is_truthful(ternary.condition) else ternary.else_branch
+
+    @override
+    def visit_call(self, call: Call):
+        call.callee = self.optimize_expr(call.callee)
+        call.arguments = [self.optimize_expr(argument) for argument in call.arguments]
+        return call
+
+    ### statements ###
+
+    @override
+    def visit_block(self, block: Block):
+        block.statements = self.in_scope(self.optimize, block.statements)
+        return [block]
+
+    @override
+    def visit_class(self, stmt: Class):
+        return [stmt]
+
+    @override
+    def visit_expression(self, expression: Expression):
+        expression.expression = self.optimize_expr(expression.expression)
+        return [expression]
+
+    @override
+    def visit_function(self, stmt: Function):
+        stmt.body = self.in_scope(self.optimize, stmt.body)
+        return [stmt]
+
+    @override
+    def visit_if(self, stmt: If):
+        stmt.condition = self.optimize_expr(stmt.condition)
+
+        if isinstance(stmt.condition, Literal):
+            if self.is_truthful(stmt.condition):
+                return self.optimize_branch(stmt.then_branch) + self.dead_branch(stmt.else_branch)
+            if stmt.else_branch is not None:
+                return self.dead_branch(stmt.then_branch) + self.optimize_branch(stmt.else_branch)
+            return self.dead_branch(stmt.then_branch)
+
+        stmt.then_branch = Block(self.optimize_branch(stmt.then_branch))
+        if stmt.else_branch is not None:
+            stmt.else_branch = Block(self.optimize_branch(stmt.else_branch))
+        return [stmt]
+
+    @override
+    def visit_say(self, say: Say):
+        say.expression = self.optimize_expr(say.expression)
+        return [say]
+
+    @override
+    def visit_return(self, stmt: Return):
+        if stmt.value is not None:
+            stmt.value = self.optimize_expr(stmt.value)
+        return [stmt]
+
+    @override
+    def visit_let(self, let: Let):
+        if let.initializer is not None:
+            let.initializer = self.optimize_expr(let.initializer)
+        return [let]
+
+    @override
+    def visit_while(self, stmt: While):
+        stmt.condition = self.optimize_expr(stmt.condition)
+
+        # A loop that never runs
+        if isinstance(stmt.condition, Literal) and not self.is_truthful(stmt.condition):
+            return []
+
+        stmt.body = self.optimize_body(stmt.body)
+        return [stmt]
+
+    @override
+    def visit_forrange(self, stmt: ForRange):
+        stmt.start = self.optimize_expr(stmt.start)
+        stmt.end = self.optimize_expr(stmt.end)
+        # The loop variable has a scope of its own
+        stmt.body = self.in_scope(self.optimize_body, stmt.body)
+        return [stmt]
+
+    @override
+    def visit_break(self, stmt: Break):
+        return [stmt]
+
+    @override
+    def visit_continue(self, stmt: Continue):
+        return [stmt]
+
+    @override
+    def visit_pass(self, stmt: Pass):
+        return []
+
+    @override
+    def visit_spawn(self, stmt: Spawn):
+        # Stays a Call, visit_call only optimizes its callee & arguments
+        stmt.call = self.optimize_expr(stmt.call)
+        return [stmt]
+
+    @override
+    def visit_yield(self, stmt: Yield):
+        return [stmt]
@@ -0,0 +1,47 @@
+import sys
+
+# Characters gathered before a buffered Output writes them to its sink
+BUFFER_SIZE = 8192
+
+
+class Output:
+    """Where `say` writes, shared by the backends.
+
+    Lines are gathered & written to the sink in one go once buffer_size
+    characters are waiting, instead of one print() per say. Line-buffered,
+    every line goes out as soon as it's said, which is the default when
+    writing to a terminal. The backends flush it when a program ends or
+    stops on an error, and input() flushes it before reading.
+
+    The sink is any object with a write(str) method (flushed too if it has
+    a flush method), sys.stdout as it is at the time of the write by default.
+    """
+
+    def __init__(self, sink=None, buffer_size: int = BUFFER_SIZE, line_buffered: bool = None):
+        self.sink = sink
+        self.buffer_size = buffer_size
+        if line_buffered is None:
+            line_buffered = sink is None and sys.stdout.isatty()
+        self.line_buffered = line_buffered
+
+        self.lines: list[str] = []
+        self.size = 0
+
+    def say(self, value: any):
+        line = str(value) + "\n"
+        self.lines.append(line)
+        self.size += len(line)
+        if self.line_buffered or self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.lines:
+            return
+        sink = self.sink if self.sink is not None else sys.stdout
+        sink.write("".join(self.lines))
+        self.lines.clear()
+        self.size = 0
+
+        flush = getattr(sink, "flush", None)
+        if flush is not None:
+            flush()
@@ -1,13 +1,22 @@
+from collections.abc import Iterable
+
 from lexer.token import Token
 from lexer.token_type import TokenType
 from expr.expr import Expr, Assign, Binary, Call, Unary, Literal, Grouping, Logical, Ternary, Variable
-from stmt.stmt import Stmt, Class, Block, Expression, Say, Return, Let, If, While, Continue, Break, Function, Pass
-from errors.errors import Error, ParseError
+from stmt.stmt import Stmt, Class, Block, Expression, Say, Return, Let, If, While, ForRange, Continue, Break, Function, Pass, Spawn, Yield
+from errors.errors import Diagnostics, ParseError, PARSE
 
 class Parser:
-    def __init__(self, tokens: list[Token]):
-        self.tokens = tokens
-        self.current = 0
+    def __init__(self, tokens: Iterable[Token], diagnostics: Diagnostics = None):
+        """
+            Takes either a token list or a token stream such as Lexer.tokenize().
+            Tokens are pulled one at a time through a two token window, the
+            grammar never needs more than the current & the previous one.
+        """
+        self.tokens = iter(tokens)
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
+        self.previous_token = None
+        self.current_token = next(self.tokens)
     
     def parse(self) -> Expr:
         statements = []
@@ -61,22 +70,41 @@ class Parser:
         if self.match(TokenType.BREAK): return self.break_statement()
         if self.match(TokenType.CONTINUE): return self.continue_statement()
         if self.match(TokenType.PASS): return self.pass_statement()
+        if self.match(TokenType.SPAWN): return self.spawn_statement()
+        if self.match(TokenType.YIELD): return self.yield_statement()
         if self.match(TokenType.INDENT): return Block(self.block())
 
         return self.expression_statement()
     
     def break_statement(self):
+        keyword: Token = self.previous()
         self.consume("Expected newline or EOF after 'break'.", TokenType.NEWLINE, TokenType.EOF)
-        return Break()
+        return Break(keyword)
 
     def continue_statement(self):
+        keyword: Token = self.previous()
         self.consume("Expected newline or EOF after 'continue'.", TokenType.NEWLINE, TokenType.EOF)
-        return Continue()
+        return Continue(keyword)
 
     def pass_statement(self):
         self.consume("Expected newline or EOF after 'pass'.", TokenType.NEWLINE, TokenType.EOF)
         return Pass()
 
+    def spawn_statement(self):
+        # spawn enemy(1)
+        keyword: Token = self.previous()
+        call: Expr = self.expression()
+        if not isinstance(call, Call):
+            self.diagnostics.error(keyword, "Expected a function call after 'spawn'.", PARSE)
+            raise ParseError()
+        self.consume("Expected newline or EOF after spawned call.", TokenType.NEWLINE, TokenType.EOF)
+        return Spawn(keyword, call)
+
+    def yield_statement(self):
+        keyword: Token = self.previous()
+        self.consume("Expected newline or EOF after 'yield'.", TokenType.NEWLINE, TokenType.EOF)
+        return Yield(keyword)
+
     def for_statement(self):
         # for i in 1..10:
         loop_var: Token = self.consume("Expected variable name after 'for'.", TokenType.IDENTIFIER)
@@ -87,53 +115,15 @@ class Parser:
         
         body: Stmt = self.statement()
         
-        # Desugar: for i in start..end  =>
-        # {
-        #   let i = start
-        #   while i <= end:
-        #       body
-        #       i = i + 1
-        # }
-        
         # Assuming iterable is a Binary expression with RANGE operator
         if isinstance(iterable, Binary) and iterable.operator.type == TokenType.RANGE:
-            start = iterable.left
-            end = iterable.right
-            
-            # Create: let i = start
-            initializer = Let(loop_var, start)
-            
-            # Create: i <= end
-            condition = Binary(
-                Variable(loop_var),
-                Token(TokenType.LESS_EQUAL, "<=", None, loop_var.line, loop_var.column),
-                end
-            )
-            
-            # Create: i = i + 1
-            increment = Expression(
-                Assign(
-                    loop_var,
-                    Binary(
-                        Variable(loop_var),
-                        Token(TokenType.PLUS, "+", None, loop_var.line, loop_var.column),
-                        Literal(1)
-                    )
-                )
-            )
-            
-            # Create the while body: original body + increment
-            while_body = Block([body, increment]) if isinstance(body, Block) else Block([body, increment])
-            
-            # Create the while loop
-            while_stmt = While(condition, while_body)
-            
-            # Wrap everything in a block
-            return Block([initializer, while_stmt])
+            # Counted loops get their own node, run as a native range
+            # loop with both bounds evaluated once
+            return ForRange(loop_var, iterable.left, iterable.right, body)
         
         else:
             # Handle other iterables later
-            Error.error(loop_var, "For loop currently only supports range expressions.")
+            self.diagnostics.error(loop_var, "For loop currently only supports range expressions.", PARSE)
             raise ParseError()
 
     def while_statement(self):
@@ -191,7 +181,7 @@ class Parser:
             params.append(self.consume("Expected parameter name.", TokenType.IDENTIFIER))
             while self.match(TokenType.COMMA):
                 if (len(params) >= 254):
-                    Error.error(self.peek(), "Can't have more than 255 arguments.")
+                    self.diagnostics.error(self.peek(), "Can't have more than 255 arguments.", PARSE)
                 params.append(self.consume("Expected parameter name.", TokenType.IDENTIFIER))
 
         self.consume(f"Expected ')' after {kind} name.", TokenType.RIGHT_PAREN)
@@ -267,7 +257,7 @@ class Parser:
                 name: Token = expr.name
                 return Assign(name, value)
 
-            Error.error(equals, "Invalid assignment target.")
+            self.diagnostics.error(equals, "Invalid assignment target.", PARSE)
 
         return expr
 
@@ -399,7 +389,7 @@ class Parser:
                 # We'll go with Java arg limitation to simplify our future bytecode interpreter
                 if (len(arguments) >= 254):  
                     # We don't throw an error to not kick into panic mode (since technically the parser is in a valid state still)
-                    Error.error(self.peek(), "Can't have more than 255 arguments.")
+                    self.diagnostics.error(self.peek(), "Can't have more than 255 arguments.", PARSE)
                 arguments.append(self.expression())
         
         paren: Token = self.consume("Expected ')' after arguments.", TokenType.RIGHT_PAREN)
@@ -439,20 +429,21 @@ class Parser:
         return self.peek().type == TokenType.EOF
 
     def peek(self) -> Token:
-        return self.tokens[self.current]
+        return self.current_token
 
     def check(self, type: TokenType) -> bool:
         if self.is_at_end(): return False
         return self.peek().type == type
 
     def advance(self):
+        # The stream ends with EOF, it's never pulled past it
         if not self.is_at_end():
-            self.current += 1
+            self.previous_token = self.current_token
+            self.current_token = next(self.tokens)
         return self.previous()
 
     def previous(self) -> Token:
-        if self.current > 0:
-            return self.tokens[self.current - 1]
+        return self.previous_token
     
     def consume(self,  message: str, *types: TokenType):
         """Looks for the a token of the suggested type else it yields an error"""
@@ -460,7 +451,7 @@ class Parser:
         raise self.error(self.peek(), message)
     
     def error(self, token: Token, message: str) -> ParseError:
-        Error.error(token, message)
+        self.diagnostics.error(token, message, PARSE)
         return ParseError()
     
     def synchronize(self):
@@ -482,6 +473,8 @@ class Parser:
             TokenType.SAY,
             TokenType.BREAK,
             TokenType.CONTINUE,
+            TokenType.SPAWN,
+            TokenType.YIELD,
             }:
                 return        
 
@@ -0,0 +1,263 @@
+import sys
+import time
+import threading
+from collections import Counter
+from pathlib import Path
+
+from lexer.token import Token
+from expr.expr import Expr
+from stmt.stmt import Stmt, Function
+from callables.saga_callable import SAGAFunction
+from interpreter.interpreter import Interpreter
+from interpreter.closure_interpreter import ClosureInterpreter, ClosureFunction
+from interpreter.completion import TailCall
+from compiler.chunk import CompiledFunction
+from vm.vm import VM, VMClosure, CallFrame
+
+# Root of every sampled stack & the function the top-level code runs in
+SCRIPT = "<script>"
+# Samples taken before the program started running (lexing, parsing, ...)
+FRONT_END = "<front end>"
+
+# Python frames of these run a SAGA function, their 'function' local is it
+FUNCTION_CODES = {SAGAFunction.call.__code__, ClosureFunction.call.__code__}
+# Python frames of these run a whole program
+INTERPRET_CODES = {Interpreter.interpret.__code__, ClosureInterpreter.interpret.__code__}
+VM_RUN_CODE = VM.run.__code__
+
+# Python files whose frames tell which line of the program is running
+INTERPRETER_FILES = {code.co_filename for code in FUNCTION_CODES | INTERPRET_CODES}
+
+# Entry points of a SAGA call in each backend & the local holding the callee,
+# tail calls don't go through SAGAFunction/ClosureFunction.call but build a TailCall
+CALL_CODES = {
+    SAGAFunction.call.__code__: "self",
+    ClosureFunction.call.__code__: "self",
+    TailCall.__init__.__code__: "function",
+    CallFrame.__init__.__code__: "closure",
+}
+
+
+def function_key(function) -> Function | CompiledFunction:
+    """What calls & samples of a SAGA function are aggregated under"""
+    if type(function) is VMClosure:
+        return function.function
+    return function.declaration
+
+
+def describe(key) -> tuple[str, int | None]:
+    """Name & declaration line of an aggregation key"""
+    if type(key) is Function:
+        return key.name.lexeme, key.name.line
+    if type(key) is CompiledFunction:
+        return (key.name or SCRIPT), key.line
+    return key, None
+
+
+def node_line(node) -> int | None:
+    """Line of the first token in a node or its children"""
+    for field in type(node).__slots__:
+        value = getattr(node, field)
+        if type(value) is Token:
+            return value.line
+        if isinstance(value, (Expr, Stmt)):
+            line = node_line(value)
+            if line is not None:
+                return line
+    return None
+
+
+def frame_line(frame) -> int | None:
+    """Line an interpreter frame is working on, from the first token or node in its locals"""
+    for value in frame.f_locals.values():
+        if type(value) is Token:
+            return value.line
+        if isinstance(value, (Expr, Stmt)):
+            line = node_line(value)
+            if line is not None:
+                return line
+    return None
+
+
+class Profiler:
+    """Sampling profiler for `saga --profile`.
+
+    A background thread samples the main thread's Python stack every interval
+    and maps it back to SAGA functions & lines: frames of SAGAFunction.call and
+    ClosureFunction.call are SAGA calls, the tokens on the nodes & closures the
+    interpreter frames work on give the lines, and the VM keeps its own stack
+    of CallFrames. Each sample is weighted by the time since the previous one.
+
+    Calls are counted exactly through sys.monitoring PY_START events on the
+    call entry points of the backends (CALL_CODES). Nothing is registered
+    unless the profiler runs, so the interpreters pay nothing otherwise.
+
+    Used as a context manager around the run, it prints the report to stderr
+    & writes the sampled stacks in the collapsed format flamegraph.pl,
+    speedscope & co. read, with one "function:line" frame per SAGA call.
+    """
+
+    def __init__(self, script: str, backend: str | None, output: str = None, interval: float = 0.001):
+        self.script = Path(script)
+        self.backend = backend
+        self.output = Path(output) if output is not None else Path(self.script.stem + ".collapsed")
+        self.interval = interval
+
+        # stack of (function key, line) from the root -> seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.calls = Counter()
+
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, name="saga-profiler", daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        self.report()
+        return False
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+        monitoring = sys.monitoring
+        monitoring.use_tool_id(monitoring.PROFILER_ID, "saga")
+        monitoring.register_callback(monitoring.PROFILER_ID, monitoring.events.PY_START, self.count_call)
+        for code in CALL_CODES:
+            monitoring.set_local_events(monitoring.PROFILER_ID, code, monitoring.events.PY_START)
+
+        # The sampler only runs when the main thread lets go of the GIL
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval / 2))
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+        sys.setswitchinterval(self.switch_interval)
+
+        monitoring = sys.monitoring
+        for code in CALL_CODES:
+            monitoring.set_local_events(monitoring.PROFILER_ID, code, 0)
+        monitoring.register_callback(monitoring.PROFILER_ID, monitoring.events.PY_START, None)
+        monitoring.free_tool_id(monitoring.PROFILER_ID)
+
+        self.duration = time.perf_counter() - self.start_time
+
+    def count_call(self, code, instruction_offset):
+        # The frame that just started is the caller of this callback
+        callee = sys._getframe(1).f_locals[CALL_CODES[code]]
+        self.calls[function_key(callee)] += 1
+
+    def sample(self):
+        main_thread: int = threading.main_thread().ident
+        previous: float = time.perf_counter()
+
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(main_thread)
+            now = time.perf_counter()
+            weight, previous = now - previous, now
+            if frame is None:
+                continue
+
+            try:
+                stack = self.saga_stack(frame)
+            except Exception:
+                # Caught the interpreter halfway through a call or a return
+                continue
+            finally:
+                del frame
+
+            self.stacks[stack] += weight
+            self.samples += 1
+
+    def saga_stack(self, frame) -> tuple[tuple[any, int | None], ...]:
+        """(function key, line) pairs of a sampled Python stack, outermost first"""
+        stack: list = []
+        line: int | None = None
+        running: bool = False
+
+        # Innermost to outermost
+        while frame is not None:
+            code = frame.f_code
+            if code is VM_RUN_CODE:
+                return self.vm_stack(frame)
+
+            if code in FUNCTION_CODES:
+                stack.append((function_key(frame.f_locals["function"]), line))
+                line = None
+            elif code in INTERPRET_CODES:
+                running = True
+            elif line is None and code.co_filename in INTERPRETER_FILES:
+                line = frame_line(frame)
+            frame = frame.f_back
+
+        if not running:
+            return ((FRONT_END, None),)
+
+        stack.append((SCRIPT, line))
+        stack.reverse()
+        return tuple(stack)
+
+    def vm_stack(self, frame) -> tuple[tuple[any, int | None], ...]:
+        """The VM's own call stack, run() keeps the current ip & tokens in locals"""
+        f_locals = frame.f_locals
+        frames: list[CallFrame] = f_locals["frames"]
+
+        stack = []
+        for depth, call_frame in enumerate(frames):
+            function: CompiledFunction = call_frame.closure.function
+            if depth == len(frames) - 1:
+                tokens, ip = f_locals["tokens"], f_locals["ip"]
+            else:
+                tokens, ip = function.chunk.tokens, call_frame.ip
+
+            # Not every instruction has a token, the closest one before does
+            line = None
+            for index in range(ip - 1, -1, -1):
+                if tokens[index] is not None:
+                    line = tokens[index].line
+                    break
+            stack.append((function, line))
+        return tuple(stack)
+
+    def report(self):
+        """Prints the function & line tables to stderr & writes the collapsed stacks"""
+        total: float = sum(self.stacks.values()) or 1.0
+        self_time, total_time, line_time = Counter(), Counter(), Counter()
+        collapsed = Counter()
+
+        for stack, seconds in self.stacks.items():
+            key, line = stack[-1]
+            self_time[key] += seconds
+            if line is not None:
+                line_time[line] += seconds
+            # Recursive functions count once per sample in their total
+            for function in {function for function, _ in stack}:
+                total_time[function] += seconds
+            collapsed[";".join(f"{describe(function)[0]}:{line}" if line is not None else describe(function)[0]
+                               for function, line in stack)] += seconds
+
+        out = sys.stderr
+        print(f"\nSAGA profile of {self.script.name} ({self.backend or 'default'} backend): "
+              f"{self.duration:.3f}s, {self.samples} samples", file=out)
+
+        print(f"\n{'function':<32} {'calls':>10} {'self':>7} {'total':>7}", file=out)
+        for key in sorted(total_time, key=lambda key: (self_time[key], total_time[key]), reverse=True):
+            name, line = describe(key)
+            label = f"{name} (line {line})" if line is not None else name
+            calls = self.calls.get(key, "") if key not in (SCRIPT, FRONT_END) else ""
+            print(f"{label:<32} {calls:>10} {self_time[key] / total:>7.1%} {total_time[key] / total:>7.1%}", file=out)
+
+        print(f"\n{'line':<32} {'self':>7}", file=out)
+        for line, seconds in line_time.most_common(15):
+            print(f"{self.script.name + ':' + str(line):<32} {seconds / total:>7.1%}", file=out)
+
+        # Weights in microseconds, flamegraph tools expect integer counts
+        with open(self.output, "w") as f:
+            for stack, seconds in sorted(collapsed.items()):
+                f.write(f"{stack} {max(1, round(seconds * 1_000_000))}\n")
+        print(f"\ncollapsed stacks written to {self.output}", file=out)
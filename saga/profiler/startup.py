@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import time
+
+IMPORT_TIME = "import time:"
+# Modules listed by the report, the slowest first
+TOP = 25
+
+
+def parse_import_times(lines: list[str]) -> list[tuple[str, int, int, int]]:
+    """(module, depth, self µs, cumulative µs) of each line -X importtime printed"""
+    imports = []
+    for line in lines:
+        fields = line[len(IMPORT_TIME):].split("|")
+        if not fields[0].strip().isdigit():
+            # The header line
+            continue
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        imports.append((module, (len(name) - len(module) - 1) // 2, int(fields[0]), int(fields[1])))
+    return imports
+
+
+def profile_startup(main_script: str, argv: list[str], top: int = TOP) -> int:
+    """Runs `saga argv` again under -X importtime, prints where its startup went, returns its exit code.
+
+    The run is a fresh process, as a user would launch it, its output goes
+    through as usual. The report on stderr has the wall time of the whole
+    run, how much of it went to imports & the modules that cost the most
+    themselves, with what importing them cost altogether next to it.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", main_script, *argv],
+                               stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+
+    lines = completed.stderr.splitlines()
+    # What the run itself printed to stderr is passed on
+    for line in lines:
+        if not line.startswith(IMPORT_TIME):
+            print(line, file=sys.stderr)
+    imports = parse_import_times([line for line in lines if line.startswith(IMPORT_TIME)])
+
+    out = sys.stderr
+    total = sum(self_time for _, _, self_time, _ in imports)
+    print(f"\nSAGA startup profile: {wall * 1000:.1f} ms wall, {total / 1000:.1f} ms importing "
+          f"{len(imports)} modules", file=out)
+    print(f"\n{'module':<40} {'self ms':>8} {'total ms':>9}", file=out)
+    for module, _, self_time, cumulative in sorted(imports, key=lambda i: i[2], reverse=True)[:top]:
+        print(f"{module:<40} {self_time / 1000:>8.2f} {cumulative / 1000:>9.2f}", file=out)
+    return completed.returncode
@@ -0,0 +1,288 @@
+from enum import Enum, auto
+from typing import override
+
+import expr.expr as expr
+from expr.expr import Expr, Assign, Binary, Call, Grouping, Literal, Logical, Ternary, Unary, Variable
+
+import stmt.stmt as stmt
+from stmt.stmt import Stmt, Block, Expression, Function, Class, If, Say, Return, Let, While, ForRange, Break, Continue, Pass, Spawn, Yield
+
+from lexer.token import Token
+
+from errors.errors import Diagnostics, RESOLVE
+
+
+class FunctionType(Enum):
+    NONE = auto()
+    FUNCTION = auto()
+
+
+class Scope:
+    """Locals declared in one block or function body, in declaration order"""
+
+    def __init__(self):
+        # name -> slot index in the Environment the scope becomes at runtime
+        self.slots: dict[str, int] = {}
+        self.defined: set[str] = set()
+
+
+class Resolution:
+    """What the Resolver found, held apart from any interpreter.
+
+    Lets a resolved program be cached, or run by several interpreters. It has
+    the same resolve/resolve_scope hooks, so it can be handed to the Resolver
+    in place of one.
+    """
+
+    def __init__(self):
+        self.locals = {}
+        self.slot_counts = {}
+        # Keywords of the spawn & yield statements, which only the VM can run
+        self.coroutines: list[Token] = []
+
+    def resolve(self, expr: Expr, depth: int, slot: int):
+        self.locals[expr] = (depth, slot)
+
+    def resolve_scope(self, node: Stmt, slot_count: int):
+        self.slot_counts[node] = slot_count
+
+    def apply(self, interpreter):
+        """Hands the resolved locals & scope sizes over to an interpreter"""
+        interpreter.locals.update(self.locals)
+        interpreter.slot_counts.update(self.slot_counts)
+
+
+class Resolver(expr.Visitor, stmt.Visitor):
+    """Static pass binding every local variable to a (depth, slot) pair.
+
+    Depth is the number of environments between the use and the declaration,
+    slot is the index of the variable in that environment. Scopes mirror the
+    interpreter exactly: blocks and function bodies get one, if branches run
+    in the enclosing one. Globals are left unresolved and looked up by name.
+    """
+
+    def __init__(self, interpreter, diagnostics: Diagnostics = None):
+        self.interpreter = interpreter
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
+        self.scopes: list[Scope] = []
+        self.current_function: FunctionType = FunctionType.NONE
+        self.loop_depth: int = 0
+        # Keywords of the spawn & yield statements found, see Resolution.coroutines
+        self.coroutines: list[Token] = []
+
+    def resolve(self, statements: list[Stmt]):
+        for statement in statements:
+            self.resolve_stmt(statement)
+
+    def resolve_stmt(self, statement: Stmt):
+        # The parser leaves None behind for statements it had to skip
+        if statement is not None:
+            statement.accept(self)
+
+    def resolve_expr(self, expression: Expr):
+        expression.accept(self)
+
+    def begin_scope(self):
+        self.scopes.append(Scope())
+
+    def end_scope(self, node: Stmt):
+        """Closes the innermost scope & tells the interpreter how many slots its environment needs"""
+        scope: Scope = self.scopes.pop()
+        self.interpreter.resolve_scope(node, len(scope.slots))
+
+    def declare(self, declaration: Stmt, name: Token):
+        if not self.scopes:
+            return
+
+        scope: Scope = self.scopes[-1]
+        slot: int = scope.slots.get(name.lexeme)
+        if slot is None:
+            slot = scope.slots[name.lexeme] = len(scope.slots)
+        elif declaration is None:
+            # Arguments are bound to the parameters' slots by position
+            self.diagnostics.error(name, "Already a parameter with this name.", RESOLVE)
+            return
+        # Otherwise declaring the name again rebinds it in its slot, as Environment.define did
+        if declaration is not None:
+            self.interpreter.resolve(declaration, 0, slot)
+
+    def define(self, name: Token):
+        if not self.scopes:
+            return
+        self.scopes[-1].defined.add(name.lexeme)
+
+    def resolve_local(self, expression: Expr, name: Token):
+        for depth, scope in enumerate(reversed(self.scopes)):
+            slot: int = scope.slots.get(name.lexeme)
+            if slot is not None:
+                self.interpreter.resolve(expression, depth, slot)
+                return
+        # Not found, assume it is global
+
+    def resolve_function(self, function: Function, type: FunctionType):
+        enclosing_function: FunctionType = self.current_function
+        enclosing_loop_depth: int = self.loop_depth
+        self.current_function = type
+        # break & continue can't cross a function boundary
+        self.loop_depth = 0
+
+        self.begin_scope()
+        for param in function.params:
+            self.declare(None, param)
+            self.define(param)
+        self.resolve(function.body)
+        self.end_scope(function)
+
+        self.current_function = enclosing_function
+        self.loop_depth = enclosing_loop_depth
+
+    def resolve_branch(self, branch: Stmt):
+        # Branches run in the enclosing environment, see Interpreter.visit_if
+        if isinstance(branch, Block):
+            self.resolve(branch.statements)
+        else:
+            self.resolve_stmt(branch)
+
+    ### statements ###
+
+    @override
+    def visit_block(self, block: Block):
+        self.begin_scope()
+        self.resolve(block.statements)
+        self.end_scope(block)
+
+    @override
+    def visit_class(self, stmt: Class):
+        self.declare(stmt, stmt.name)
+        self.define(stmt.name)
+
+    @override
+    def visit_expression(self, expression: Expression):
+        self.resolve_expr(expression.expression)
+
+    @override
+    def visit_function(self, stmt: Function):
+        # Defined before the body is resolved so the function can call itself
+        self.declare(stmt, stmt.name)
+        self.define(stmt.name)
+        self.resolve_function(stmt, FunctionType.FUNCTION)
+
+    @override
+    def visit_if(self, stmt: If):
+        self.resolve_expr(stmt.condition)
+        self.resolve_branch(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.resolve_branch(stmt.else_branch)
+
+    @override
+    def visit_say(self, say: Say):
+        self.resolve_expr(say.expression)
+
+    @override
+    def visit_return(self, stmt: Return):
+        if self.current_function == FunctionType.NONE:
+            self.diagnostics.error(stmt.keyword, "Can't return from top-level code.", RESOLVE)
+
+        if stmt.value is not None:
+            self.resolve_expr(stmt.value)
+
+    @override
+    def visit_let(self, let: Let):
+        self.declare(let, let.name)
+        if let.initializer is not None:
+            self.resolve_expr(let.initializer)
+        self.define(let.name)
+
+    @override
+    def visit_while(self, stmt: While):
+        self.resolve_expr(stmt.condition)
+        self.loop_depth += 1
+        self.resolve_stmt(stmt.body)
+        self.loop_depth -= 1
+
+    @override
+    def visit_forrange(self, stmt: ForRange):
+        # The bounds are evaluated once, before the loop variable exists
+        self.resolve_expr(stmt.start)
+        self.resolve_expr(stmt.end)
+
+        self.begin_scope()
+        self.declare(stmt, stmt.name)
+        self.define(stmt.name)
+        self.loop_depth += 1
+        self.resolve_stmt(stmt.body)
+        self.loop_depth -= 1
+        self.end_scope(stmt)
+
+    @override
+    def visit_break(self, stmt: Break):
+        if self.loop_depth == 0:
+            self.diagnostics.error(stmt.keyword, "Can't use 'break' outside of a loop.", RESOLVE)
+
+    @override
+    def visit_continue(self, stmt: Continue):
+        if self.loop_depth == 0:
+            self.diagnostics.error(stmt.keyword, "Can't use 'continue' outside of a loop.", RESOLVE)
+
+    @override
+    def visit_pass(self, stmt: Pass):
+        return None
+
+    @override
+    def visit_spawn(self, stmt: Spawn):
+        self.coroutines.append(stmt.keyword)
+        self.resolve_expr(stmt.call)
+
+    @override
+    def visit_yield(self, stmt: Yield):
+        self.coroutines.append(stmt.keyword)
+
+    ### expressions ###
+
+    @override
+    def visit_variable(self, variable: Variable):
+        if self.scopes:
+            scope: Scope = self.scopes[-1]
+            if variable.name.lexeme in scope.slots and variable.name.lexeme not in scope.defined:
+                self.diagnostics.error(variable.name, "Can't read local variable in its own initializer.", RESOLVE)
+
+        self.resolve_local(variable, variable.name)
+
+    @override
+    def visit_assign(self, assign: Assign):
+        self.resolve_expr(assign.value)
+        self.resolve_local(assign, assign.name)
+
+    @override
+    def visit_binary(self, binary: Binary):
+        self.resolve_expr(binary.left)
+        self.resolve_expr(binary.right)
+
+    @override
+    def visit_call(self, call: Call):
+        self.resolve_expr(call.callee)
+        for argument in call.arguments:
+            self.resolve_expr(argument)
+
+    @override
+    def visit_grouping(self, grouping: Grouping):
+        self.resolve_expr(grouping.expression)
+
+    @override
+    def visit_literal(self, literal: Literal):
+        return None
+
+    @override
+    def visit_logical(self, logical: Logical):
+        self.resolve_expr(logical.left)
+        self.resolve_expr(logical.right)
+
+    @override
+    def visit_ternary(self, ternary: Ternary):
+        self.resolve_expr(ternary.condition)
+        self.resolve_expr(ternary.then_branch)
+        self.resolve_expr(ternary.else_branch)
+
+    @override
+    def visit_unary(self, unary: Unary):
+        self.resolve_expr(unary.right)
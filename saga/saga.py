@@ -3,55 +3,188 @@ import sys
 from lexer.lexer import Lexer
 from parser.parser import Parser
 from interpreter.interpreter import Interpreter
-from errors.errors import Error
-from lexer.token import Token
+from errors.errors import Diagnostics, RuntimeError, COMPILE
 from stmt.stmt import Stmt, Expression
-from resolver.resolver import Resolver
+from resolver.resolver import Resolver, Resolution
+from optimizer.optimizer import Optimizer
+from output.output import Output
 
+# Execution backends selectable per script
+TREE = "tree"
+CLOSURE = "closure"
+VM_BACKEND = "vm"
+BACKENDS = (TREE, CLOSURE, VM_BACKEND)
 
-interpreter = Interpreter()
+# What every backend says goes through one buffer
+output = Output()
+interpreter = Interpreter(output)
+# The other backends are imported & built by the first script run on them
+closure_interpreter = None
+vm = None
 
-def run_file(path: str):
+
+def closure_backend():
+    global closure_interpreter
+    if closure_interpreter is None:
+        from interpreter.closure_interpreter import ClosureInterpreter
+        closure_interpreter = ClosureInterpreter(output)
+    return closure_interpreter
+
+
+def vm_backend():
+    global vm
+    if vm is None:
+        from vm.vm import VM
+        vm = VM(output)
+    return vm
+
+
+def preload():
+    """Imports & builds everything a run may need up front, what saga serve's workers start from"""
+    import random
+    from cache import parse_cache
+    from compiler.compiler import Compiler
+    parse_cache.front_end_digest()
+    closure_backend()
+    vm_backend()
+
+
+def run_file(path: str, backend: str = TREE):
     try:
         f = open(path, 'r')
     except OSError:
-        Error.had_error = True
         sys.exit()
 
     with f:
-        run(f.read(), is_repl=False)
-
-        if Error.had_error:
-            sys.exit(65)
-        if Error.had_runtime_error:
-            sys.exit(70)
-    
-def run_prompt():
+        run_source(f.read(), backend, path)
+
+
+def run_source(source: str, backend: str = TREE, path: str = None):
+    """Runs a whole program, exits with 65 on a compile error & 70 on a runtime error"""
+    diagnostics: Diagnostics = run(source, is_repl=False, backend=backend, path=path)
+
+    if diagnostics.had_error:
+        sys.exit(65)
+    if diagnostics.had_runtime_error:
+        sys.exit(70)
+
+
+def run_prompt(backend: str = TREE):
     """REPL (Read-Eval-Print Loop) for interactive usage"""
     line = input("SAGA> ")
     while line.strip() != 'q':
-        run(line, is_repl=True)
-        Error.had_error = False
+        # Every line gets diagnostics of its own, errors don't carry over
+        run(line, is_repl=True, backend=backend)
         line = input("SAGA> ")
 
 
-def run(source: str, is_repl: bool = False):
-    """Tokenizes, Parses & Interprets source code"""
-    lex: Lexer = Lexer(source)
-    tokens: list[Token] = lex.lex_tokens()
-    parser: Parser = Parser(tokens)
+def run(source: str, is_repl: bool = False, backend: str = TREE, path: str = None,
+        diagnostics: Diagnostics = None) -> Diagnostics:
+    """Tokenizes, Parses, Optimizes & Interprets source code, returns the errors reported
+
+    Scripts read from a path go through the parse cache, a hit skips
+    everything up to interpretation. Errors are printed as they're reported
+    unless the given diagnostics say otherwise.
+    """
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+
+    program = None
+    if path is not None:
+        # Only scripts read from a file are cached, -c & the REPL never pay for the import
+        from cache import parse_cache
+        program = parse_cache.load(path, source)
+    if program is None:
+        program = parse(source, diagnostics)
+        if program is None: return diagnostics
+        if path is not None:
+            parse_cache.store(path, source, program)
+
+    statements, resolution = program
+    if backend is None:
+        backend = default_backend(resolution)
+    check_backend(resolution, backend, diagnostics)
+    if diagnostics.had_error: return diagnostics
+
+    if backend == VM_BACKEND:
+        run_vm(statements, is_repl, diagnostics)
+        return diagnostics
+
+    backend_interpreter = closure_backend() if backend == CLOSURE else interpreter
+    resolution.apply(backend_interpreter)
+
+    if is_repl and len(statements) == 1 and isinstance(statements[0], Expression):
+        # Said like any other value, after what the expression's calls said & before the next prompt
+        try:
+            value = backend_interpreter.evaluate(statements[0].expression)
+            if value is not None:
+                backend_interpreter.output.say(value)
+        except RuntimeError as error:
+            diagnostics.runtime_error(error)
+        finally:
+            backend_interpreter.output.flush()
+    else:
+        backend_interpreter.interpret(statements, diagnostics)
+    return diagnostics
+
+
+def parse(source: str, diagnostics: Diagnostics = None) -> tuple[list[Stmt], Resolution]:
+    """Front end shared by every backend, returns the optimized statements & their resolution
+
+    None when the program has errors, they're reported into diagnostics.
+    """
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+
+    # Tokens are streamed into the parser, the full token list never exists
+    lex: Lexer = Lexer(source, diagnostics)
+    parser: Parser = Parser(lex.tokenize(), diagnostics)
     statements: list[Stmt] = parser.parse()
 
-    if Error.had_error: return
+    if diagnostics.had_error: return None
 
-    resolver: Resolver = Resolver(interpreter)
+    statements = Optimizer().optimize(statements)
+
+    # The VM resolves scopes itself, the resolver still checks the program for it
+    resolution: Resolution = Resolution()
+    resolver: Resolver = Resolver(resolution, diagnostics)
     resolver.resolve(statements)
 
-    if Error.had_error: return
+    if diagnostics.had_error: return None
+    resolution.coroutines = resolver.coroutines
+    return statements, resolution
 
-    if is_repl and len(statements) == 1 and isinstance(statements[0], Expression):
-        value = interpreter.evaluate(statements[0].expression)
-        if value is not None:
-            print(value)
+
+def default_backend(resolution: Resolution) -> str:
+    """Backend of a program run without --backend: the tree-walker, unless it spawns tasks"""
+    return VM_BACKEND if resolution.coroutines else TREE
+
+
+def check_backend(resolution: Resolution, backend: str, diagnostics: Diagnostics):
+    """Reports spawn & yield unless the backend is the VM"""
+    # The tree interpreters keep a running function's state on the Python stack, they can't switch tasks
+    if backend == VM_BACKEND:
+        return
+    for keyword in resolution.coroutines:
+        diagnostics.error(keyword, "Coroutines need the vm backend (--backend vm).", COMPILE)
+
+
+def run_vm(statements: list[Stmt], is_repl: bool, diagnostics: Diagnostics):
+    """Compiles the statements to bytecode & runs them on the VM"""
+    from compiler.compiler import Compiler
+    compiler: Compiler = Compiler(diagnostics)
+    repl_expression = is_repl and len(statements) == 1 and isinstance(statements[0], Expression)
+
+    if repl_expression:
+        function = compiler.compile_expression(statements[0].expression)
     else:
-        interpreter.interpret(statements)
\ No newline at end of file
+        function = compiler.compile(statements)
+
+    if diagnostics.had_error: return
+
+    vm = vm_backend()
+    value = vm.interpret(function, diagnostics)
+    if repl_expression and value is not None:
+        # Said like any other value, what the expression's calls said is already flushed
+        vm.output.say(value)
+        vm.output.flush()
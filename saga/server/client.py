@@ -0,0 +1,48 @@
+# The client side of saga serve only uses the C modules, socket & signal
+# pull in enum & more, which would cost more than the whole request
+import os
+import sys
+import _socket
+import _signal
+
+# Exit code of a request the daemon couldn't run at all
+FAILED = 1
+
+
+def socket_path() -> str:
+    """$SAGA_SOCKET, else saga-<uid>.sock in $XDG_RUNTIME_DIR or the temporary directory"""
+    path = os.environ.get("SAGA_SOCKET")
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(directory, f"saga-{os.getuid()}.sock")
+
+
+def forward(argv: list[str], path: str = None) -> int:
+    """Has the daemon run `saga argv` on this process' standard streams, returns the exit code"""
+    client = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        client.connect(path or socket_path())
+
+        # Working directory & arguments, NUL separated, with stdin, stdout & stderr attached
+        request = "\0".join([os.getcwd(), *argv]).encode()
+        fds = b"".join(fd.to_bytes(4, sys.byteorder) for fd in (0, 1, 2))
+        client.sendmsg([request], [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, fds)])
+
+        # The worker's pid comes first, Ctrl-C is passed on to it, then its exit code
+        replies = b""
+        while replies.count(b"\n") < 2:
+            try:
+                received = client.recv(64)
+            except KeyboardInterrupt:
+                if b"\n" in replies:
+                    os.kill(int(replies.split(b"\n")[0]), _signal.SIGINT)
+                continue
+            if not received:
+                break
+            replies += received
+    finally:
+        client.close()
+
+    lines = replies.split(b"\n")
+    return int(lines[1]) if len(lines) > 2 else FAILED
@@ -0,0 +1,114 @@
+import os
+import sys
+import signal
+import socket
+
+from server.client import socket_path, FAILED
+
+# Longest request (working directory & arguments) a client can send
+MAX_REQUEST = 1 << 20
+# Exit code of a worker stopped by Ctrl-C in its client, as Python's on SIGINT
+INTERRUPTED = 128 + signal.SIGINT
+
+
+def serve(main, path: str = None):
+    """Accepts requests on a Unix socket & runs each in a worker forked from this process.
+
+    main is the command line's entry point, already imported along with the
+    whole interpreter, its globals & natives included. A forked worker
+    starts with all of it, so a request only pays for the fork & its own
+    script. Workers are never reused, every request starts from the state
+    the daemon had when it was forked.
+    """
+    path = path or socket_path()
+    # Forked workers must never remove the socket, only this process may
+    daemon = os.getpid()
+    if os.path.exists(path):
+        os.unlink(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen(128)
+    # Workers report their exit code through the socket, nothing to wait for
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    # Stopped by kill as by Ctrl-C, the socket is removed either way
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"saga serve: listening on {path}", file=sys.stderr)
+
+    try:
+        while True:
+            connection, _ = server.accept()
+            try:
+                request, fds, _, _ = socket.recv_fds(connection, MAX_REQUEST, 3)
+            except OSError:
+                connection.close()
+                continue
+            if len(fds) != 3:
+                for fd in fds:
+                    os.close(fd)
+                connection.close()
+                continue
+
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                try:
+                    server.close()
+                    run_request(main, connection, request.decode(), fds)
+                finally:
+                    # Whatever happened, a worker never gets back into the daemon's loop
+                    os._exit(FAILED)
+
+            connection.close()
+            for fd in fds:
+                os.close(fd)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.getpid() == daemon:
+            os.unlink(path)
+
+
+def run_request(main, connection: socket.socket, request: str, fds: list[int]):
+    """Worker side of a request: takes over the client's streams, runs main & exits"""
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    code = FAILED
+    try:
+        # Raises if the client already hung up, the worker then just exits
+        connection.sendall(f"{os.getpid()}\n".encode())
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdout.reconfigure(line_buffering=sys.stdout.isatty())
+
+        cwd, *argv = request.split("\0")
+        os.chdir(cwd)
+        if argv[:1] == ["serve"]:
+            print("saga serve: a client can't start a daemon", file=sys.stderr)
+        else:
+            try:
+                main(argv)
+                code = 0
+            except SystemExit as stop:
+                if stop.code is None or isinstance(stop.code, int):
+                    code = stop.code or 0
+                else:
+                    print(stop.code, file=sys.stderr)
+    except KeyboardInterrupt:
+        code = INTERRUPTED
+    except ConnectionError:
+        # The client hung up, there's nobody left to report to
+        pass
+    except BaseException as error:
+        print(f"saga serve: {error!r}", file=sys.stderr)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            connection.sendall(f"{code}\n".encode())
+        finally:
+            os._exit(code)
@@ -6,11 +6,15 @@ from lexer.token import Token
 from expr.expr import Expr
 
 class Stmt(ABC):
+  __slots__ = ()
+
   @abstractmethod
   def accept(self, visitor: "Visitor"):
       pass
 
 class Block(Stmt):
+  __slots__ = ('statements',)
+
   def __init__(self, statements: list[Stmt]):
       self.statements = statements
 
@@ -19,6 +23,8 @@ class Block(Stmt):
       return visitor.visit_block(self)
 
 class Expression(Stmt):
+  __slots__ = ('expression',)
+
   def __init__(self, expression: Expr):
       self.expression = expression
 
@@ -27,6 +33,8 @@ class Expression(Stmt):
       return visitor.visit_expression(self)
 
 class Function(Stmt):
+  __slots__ = ('name', 'params', 'body')
+
   def __init__(self, name: Token, params: list[Token], body: list[Stmt]):
       self.name = name
       self.params = params
@@ -37,6 +45,8 @@ class Function(Stmt):
       return visitor.visit_function(self)
 
 class Class(Stmt):
+  __slots__ = ('name', 'methods')
+
   def __init__(self, name: Token, methods: list[Function]):
       self.name = name
       self.methods = methods
@@ -46,6 +56,8 @@ class Class(Stmt):
       return visitor.visit_class(self)
 
 class If(Stmt):
+  __slots__ = ('condition', 'then_branch', 'else_branch')
+
   def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Stmt):
       self.condition = condition
       self.then_branch = then_branch
@@ -56,6 +68,8 @@ class If(Stmt):
       return visitor.visit_if(self)
 
 class Say(Stmt):
+  __slots__ = ('expression',)
+
   def __init__(self, expression: Expr):
       self.expression = expression
 
@@ -64,6 +78,8 @@ class Say(Stmt):
       return visitor.visit_say(self)
 
 class Return(Stmt):
+  __slots__ = ('keyword', 'value')
+
   def __init__(self, keyword: Token, value: Expr):
       self.keyword = keyword
       self.value = value
@@ -73,6 +89,8 @@ class Return(Stmt):
       return visitor.visit_return(self)
 
 class Let(Stmt):
+  __slots__ = ('name', 'initializer')
+
   def __init__(self, name: Token, initializer: Expr):
       self.name = name
       self.initializer = initializer
@@ -82,6 +100,8 @@ class Let(Stmt):
       return visitor.visit_let(self)
 
 class While(Stmt):
+  __slots__ = ('condition', 'body')
+
   def __init__(self, condition: Expr, body: Stmt):
       self.condition = condition
       self.body = body
@@ -90,27 +110,69 @@ class While(Stmt):
   def accept(self, visitor: "Visitor"):
       return visitor.visit_while(self)
 
+class ForRange(Stmt):
+  __slots__ = ('name', 'start', 'end', 'body')
+
+  def __init__(self, name: Token, start: Expr, end: Expr, body: Stmt):
+      self.name = name
+      self.start = start
+      self.end = end
+      self.body = body
+
+  @override
+  def accept(self, visitor: "Visitor"):
+      return visitor.visit_forrange(self)
+
 class Break(Stmt):
-  def __init__(self):
-      pass
+  __slots__ = ('keyword',)
+
+  def __init__(self, keyword: Token):
+      self.keyword = keyword
+
   @override
   def accept(self, visitor: "Visitor"):
       return visitor.visit_break(self)
 
 class Continue(Stmt):
-  def __init__(self):
-      pass
+  __slots__ = ('keyword',)
+
+  def __init__(self, keyword: Token):
+      self.keyword = keyword
+
   @override
   def accept(self, visitor: "Visitor"):
       return visitor.visit_continue(self)
 
 class Pass(Stmt):
+  __slots__ = ()
+
   def __init__(self):
       pass
   @override
   def accept(self, visitor: "Visitor"):
       return visitor.visit_pass(self)
 
+class Spawn(Stmt):
+  __slots__ = ('keyword', 'call')
+
+  def __init__(self, keyword: Token, call: Expr):
+      self.keyword = keyword
+      self.call = call
+
+  @override
+  def accept(self, visitor: "Visitor"):
+      return visitor.visit_spawn(self)
+
+class Yield(Stmt):
+  __slots__ = ('keyword',)
+
+  def __init__(self, keyword: Token):
+      self.keyword = keyword
+
+  @override
+  def accept(self, visitor: "Visitor"):
+      return visitor.visit_yield(self)
+
 class Visitor(ABC):
   @abstractmethod
   def visit_block(self, stmt: Block):
@@ -140,6 +202,9 @@ class Visitor(ABC):
   def visit_while(self, stmt: While):
       pass
   @abstractmethod
+  def visit_forrange(self, stmt: ForRange):
+      pass
+  @abstractmethod
   def visit_break(self, stmt: Break):
       pass
   @abstractmethod
@@ -148,3 +213,9 @@ class Visitor(ABC):
   @abstractmethod
   def visit_pass(self, stmt: Pass):
       pass
+  @abstractmethod
+  def visit_spawn(self, stmt: Spawn):
+      pass
+  @abstractmethod
+  def visit_yield(self, stmt: Yield):
+      pass
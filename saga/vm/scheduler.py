@@ -0,0 +1,81 @@
+import heapq
+import time
+from collections import deque
+
+from interpreter.completion import Yield
+
+
+class Task:
+    """A SAGA coroutine: the value stack, call frames & open upvalues the VM runs it on"""
+    __slots__ = ("stack", "frames", "open_upvalues")
+
+    def __init__(self, stack: list, frames: list, open_upvalues: list):
+        self.stack = stack
+        self.frames = frames
+        self.open_upvalues = open_upvalues
+
+
+class Scheduler:
+    """Cooperative scheduler of the tasks of one program run on the VM.
+
+    The program itself is the first task, spawn adds the others to the
+    ready queue. A task runs until it finishes or raises Yield: yield puts
+    it at the back of the ready queue, sleep in the timer heap, ordered by
+    wake-up time then by who went to sleep first. Switching tasks swaps the
+    VM's stack, frames & open upvalues for the next task's, a task costs
+    those few small objects, not a thread. The run ends once every task is
+    done, a runtime error in any of them stops it.
+    """
+
+    def __init__(self, vm, main: Task):
+        self.vm = vm
+        self.ready: deque[Task] = deque()
+        # (wake-up time, sleep number, task)
+        self.timers: list[tuple[float, int, Task]] = []
+        self.sleeps = 0
+        # Task on the VM, still set when an async native suspended it mid-run
+        self.current: Task = main
+        self.main = main
+        # What the program's own code returned, the value of a REPL expression
+        self.result = None
+
+    def spawn(self, task: Task):
+        self.ready.append(task)
+
+    def run(self):
+        """Runs every task to completion, returns the program's result"""
+        while (delay := self.run_ready()) is not None:
+            time.sleep(delay)
+        return self.result
+
+    def run_ready(self) -> float | None:
+        """Runs tasks until none is ready, returns the seconds until the next timer, None once all are done"""
+        vm, ready, timers = self.vm, self.ready, self.timers
+        while True:
+            task = self.current
+            if task is None:
+                if timers:
+                    now = time.monotonic()
+                    while timers and timers[0][0] <= now:
+                        ready.append(heapq.heappop(timers)[2])
+                if not ready:
+                    return max(0.0, timers[0][0] - time.monotonic()) if timers else None
+                task = self.current = ready.popleft()
+                vm.stack, vm.frames, vm.open_upvalues = task.stack, task.frames, task.open_upvalues
+
+            try:
+                result = vm.run(0)
+            except Yield as switch:
+                # The frame saved its ip past the yield, which evaluates to nil once resumed
+                vm.stack.append(None)
+                if switch.delay > 0:
+                    self.sleeps += 1
+                    heapq.heappush(timers, (time.monotonic() + switch.delay, self.sleeps, task))
+                else:
+                    ready.append(task)
+                self.current = None
+                continue
+
+            self.current = None
+            if task is self.main:
+                self.result = result
@@ -0,0 +1,535 @@
+from typing import override
+
+from callables.saga_callable import SAGACallable, SAGAClass
+from callables.native_callables import natives
+
+from compiler.opcode import OpCode
+from compiler.chunk import CompiledFunction
+
+from interpreter.operators import add, check_number_operand, check_number_operands, comma, counted_range, divide
+from interpreter.rope import concat
+from interpreter.completion import Yield
+
+from vm.scheduler import Scheduler, Task
+
+from errors.errors import RuntimeError, Diagnostics
+
+from output.output import Output
+
+FRAMES_MAX = 10_000
+
+# Values of the opcodes run() binds to locals, in the order it unpacks them. Read
+# once here: an enum member's value costs ~100 ns & run() is entered again on
+# every task switch
+RUN_OPCODES = tuple(OpCode[name].value for name in (
+    "GET_LOCAL", "GET_GLOBAL", "CONSTANT", "STORE_LOCAL", "STORE_GLOBAL", "ADD_CONSTANT",
+    "SUBTRACT_CONSTANT", "MULTIPLY_CONSTANT", "JUMP_IF_NOT_LESS", "JUMP_IF_NOT_LESS_EQUAL",
+    "JUMP_IF_NOT_GREATER", "JUMP_IF_NOT_GREATER_EQUAL", "JUMP_IF_NOT_EQUAL", "JUMP_IF_EQUAL",
+    "JUMP", "POP_JUMP_IF_FALSE", "JUMP_IF_FALSE", "JUMP_IF_TRUE", "FOR_ITER", "ADD", "SUBTRACT",
+    "MULTIPLY", "DIVIDE", "LESS", "LESS_EQUAL", "GREATER", "GREATER_EQUAL", "EQUAL", "NOT_EQUAL",
+    "NOT", "NEGATE", "COMMA", "CALL", "TAIL_CALL", "RETURN", "GET_UPVALUE", "STORE_UPVALUE",
+    "CLOSURE", "POP", "NIL", "TRUE", "FALSE", "RESERVE", "END_SCOPE", "SET_LOCAL", "SET_GLOBAL",
+    "SET_UPVALUE", "DEFINE_GLOBAL", "CLASS", "SAY", "FOR_RANGE", "SPAWN", "YIELD"
+))
+
+# Returned by next() once the iterator of a for loop runs out
+EXHAUSTED = object()
+
+
+class Upvalue:
+    """A variable captured by a closure.
+
+    While the variable is still alive on the VM stack, cells is the stack itself
+    and index its slot. Closing it moves the value into a private one-element
+    list, so reads and writes never have to check which case they are in.
+    """
+    __slots__ = ("cells", "index")
+
+    def __init__(self, stack: list, index: int):
+        self.cells = stack
+        self.index = index
+
+
+class VMClosure(SAGACallable):
+
+    def __init__(self, function: CompiledFunction, upvalues: list[Upvalue]):
+        self.function = function
+        self.upvalues = upvalues
+
+    @override
+    def call(self, interpreter, arguments):
+        return interpreter.call_closure(self, arguments)
+
+    @override
+    def arity(self):
+        return self.function.arity
+
+    def __str__(self):
+        return str(self.function)
+
+
+class CallFrame:
+    __slots__ = ("closure", "ip", "base")
+
+    def __init__(self, closure: VMClosure, ip: int, base: int):
+        self.closure = closure
+        self.ip = ip
+        self.base = base
+
+
+class VM:
+    """Stack-based virtual machine running the bytecode produced by the Compiler"""
+
+    def __init__(self, output: Output = None):
+        self.globals: dict[str, any] = natives()
+        self.stack: list[any] = []
+        self.frames: list[CallFrame] = []
+        # open upvalues sorted by the stack slot they point to
+        self.open_upvalues: list[Upvalue] = []
+        # Where say writes
+        self.output: Output = output if output is not None else Output()
+        # Whether an async native may suspend the running program, see run_program_async
+        self.suspendable = False
+        # Whether sleep may switch tasks, not from a native calling back into SAGA code
+        self.switchable = True
+        # Tasks of the running program
+        self.scheduler: Scheduler = None
+
+    def interpret(self, function: CompiledFunction, diagnostics: Diagnostics = None):
+        """Runs a compiled script, a runtime error stopping it is reported into diagnostics"""
+        try:
+            return self.run_program(function)
+        except RuntimeError as error:
+            if diagnostics is None:
+                diagnostics = Diagnostics()
+            diagnostics.runtime_error(error)
+
+    def run_program(self, function: CompiledFunction):
+        """Runs a compiled script & the tasks it spawns, whatever stops it is raised once the VM is reset & what was said before flushed"""
+        try:
+            return self.start(function).run()
+        except BaseException:
+            # A native's own Python error too, or the next program would resume this one's frames
+            self.reset()
+            raise
+        finally:
+            self.scheduler = None
+            self.output.flush()
+
+    def start(self, function: CompiledFunction) -> Scheduler:
+        """Pushes the script's frame, the first task of a new scheduler"""
+        closure = VMClosure(function, [])
+        self.stack.append(closure)
+        self.frames.append(CallFrame(closure, 0, len(self.stack) - 1))
+        self.scheduler = Scheduler(self, Task(self.stack, self.frames, self.open_upvalues))
+        return self.scheduler
+
+    async def run_program_async(self, function: CompiledFunction):
+        """run_program as a coroutine: the VM suspends at async natives while the event loop runs others.
+
+        An AsyncCallable called by the program raises Suspend instead of
+        blocking. Its frame already saved the ip past the call & the callee
+        & arguments are off the stack, so the program is resumed by pushing
+        the awaited result & running the same frames again. Each program
+        needs a VM of its own, the suspended state lives in the VM.
+        """
+        # Only imported when asked for, asyncio is slow to import
+        import asyncio
+        from callables.async_callables import Suspend
+
+        scheduler = self.start(function)
+        self.suspendable = True
+        try:
+            while True:
+                try:
+                    delay = scheduler.run_ready()
+                except Suspend as suspend:
+                    # What was said before the native is written before waiting on it
+                    self.output.flush()
+                    # The task stays the scheduler's current one & resumes with the result
+                    self.stack.append(await suspend.awaitable)
+                    continue
+                if delay is None:
+                    return scheduler.result
+                # Every task is asleep, the loop runs other programs meanwhile
+                await asyncio.sleep(delay)
+        except BaseException:
+            self.reset()
+            raise
+        finally:
+            self.suspendable = False
+            self.scheduler = None
+            self.output.flush()
+
+    def reset_globals(self):
+        """Back to globals holding only the natives, for the next program"""
+        self.globals.clear()
+        self.globals.update(natives())
+
+    def reset(self):
+        self.stack.clear()
+        self.frames.clear()
+        self.open_upvalues.clear()
+
+    def call_closure(self, closure: VMClosure, arguments: list[any]):
+        """Runs a closure to completion for a native calling back into SAGA code"""
+        self.stack.append(closure)
+        self.stack.extend(arguments)
+        self.frames.append(CallFrame(closure, 0, len(self.stack) - len(arguments) - 1))
+
+        # Neither a suspension nor a task switch can get past the native's Python frames
+        suspendable, switchable = self.suspendable, self.switchable
+        self.suspendable = self.switchable = False
+        try:
+            return self.run(len(self.frames) - 1)
+        finally:
+            self.suspendable, self.switchable = suspendable, switchable
+
+    def capture_upvalue(self, location: int) -> Upvalue:
+        open_upvalues = self.open_upvalues
+        position = len(open_upvalues)
+        while position > 0 and open_upvalues[position - 1].index >= location:
+            upvalue = open_upvalues[position - 1]
+            if upvalue.index == location:
+                return upvalue
+            position -= 1
+
+        upvalue = Upvalue(self.stack, location)
+        open_upvalues.insert(position, upvalue)
+        return upvalue
+
+    def close_upvalues(self, last: int):
+        """Closes every open upvalue pointing at slot last or above"""
+        open_upvalues = self.open_upvalues
+        stack = self.stack
+        while open_upvalues and open_upvalues[-1].index >= last:
+            upvalue = open_upvalues.pop()
+            upvalue.cells = [stack[upvalue.index]]
+            upvalue.index = 0
+
+    def run(self, exit_depth: int):
+        """Executes frames until the frame stack shrinks back to exit_depth"""
+        # Everything the loop touches is cached in locals, and the common int/str
+        # cases of every operator are handled inline before falling back to the
+        # helpers below.
+        (GET_LOCAL, GET_GLOBAL, CONSTANT, STORE_LOCAL, STORE_GLOBAL, ADD_CONSTANT,
+         SUBTRACT_CONSTANT, MULTIPLY_CONSTANT, JUMP_IF_NOT_LESS, JUMP_IF_NOT_LESS_EQUAL,
+         JUMP_IF_NOT_GREATER, JUMP_IF_NOT_GREATER_EQUAL, JUMP_IF_NOT_EQUAL, JUMP_IF_EQUAL, JUMP,
+         POP_JUMP_IF_FALSE, JUMP_IF_FALSE, JUMP_IF_TRUE, FOR_ITER, ADD, SUBTRACT, MULTIPLY, DIVIDE,
+         LESS, LESS_EQUAL, GREATER, GREATER_EQUAL, EQUAL, NOT_EQUAL, NOT, NEGATE, COMMA, CALL,
+         TAIL_CALL, RETURN, GET_UPVALUE, STORE_UPVALUE, CLOSURE, POP, NIL, TRUE, FALSE, RESERVE,
+         END_SCOPE, SET_LOCAL, SET_GLOBAL, SET_UPVALUE, DEFINE_GLOBAL, CLASS, SAY, FOR_RANGE,
+         SPAWN, YIELD) = RUN_OPCODES
+
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        frames = self.frames
+        globals_ = self.globals
+        say = self.output.say
+        exhausted = EXHAUSTED
+
+        frame = frames[-1]
+        closure = frame.closure
+        code, tokens = closure.function.chunk.code, closure.function.chunk.tokens
+        ip, base = frame.ip, frame.base
+
+        while True:
+            op, arg = code[ip]
+            ip += 1
+
+            # Opcodes are tested in numbered groups, nested so that no opcode
+            # is more than a handful of comparisons away.
+            if op <= STORE_GLOBAL:
+                if op == GET_LOCAL:
+                    push(stack[base + arg])
+
+                elif op == GET_GLOBAL:
+                    try:
+                        push(globals_[arg])
+                    except KeyError:
+                        raise RuntimeError(tokens[ip - 1], f"Undefined variable '{arg}'.") from None
+
+                elif op == CONSTANT:
+                    push(arg)
+
+                elif op == STORE_LOCAL:
+                    stack[base + arg] = pop()
+
+                else: # STORE_GLOBAL
+                    if arg not in globals_:
+                        raise RuntimeError(tokens[ip - 1], f"Undefined variable '{arg}'.")
+                    globals_[arg] = pop()
+
+            elif op <= JUMP_IF_EQUAL:
+                if op == ADD_CONSTANT:
+                    left = stack[-1]
+                    if type(left) is int:
+                        stack[-1] = left + arg
+                    else:
+                        stack[-1] = add(left, arg, tokens[ip - 1])
+
+                elif op == SUBTRACT_CONSTANT:
+                    left = stack[-1]
+                    if type(left) is not int:
+                        check_number_operands(tokens[ip - 1], left, arg)
+                    stack[-1] = left - arg
+
+                elif op == MULTIPLY_CONSTANT:
+                    left = stack[-1]
+                    if type(left) is not int:
+                        check_number_operands(tokens[ip - 1], left, arg)
+                    stack[-1] = left * arg
+
+                elif op <= JUMP_IF_NOT_GREATER_EQUAL:
+                    right = pop()
+                    left = pop()
+                    if type(left) is not int or type(right) is not int:
+                        check_number_operands(tokens[ip - 1], left, right)
+
+                    if op == JUMP_IF_NOT_LESS:
+                        if not left < right: ip = arg
+                    elif op == JUMP_IF_NOT_LESS_EQUAL:
+                        if not left <= right: ip = arg
+                    elif op == JUMP_IF_NOT_GREATER:
+                        if not left > right: ip = arg
+                    else: # JUMP_IF_NOT_GREATER_EQUAL
+                        if not left >= right: ip = arg
+
+                elif op == JUMP_IF_NOT_EQUAL:
+                    right = pop()
+                    if pop() != right: ip = arg
+
+                else: # JUMP_IF_EQUAL
+                    right = pop()
+                    if pop() == right: ip = arg
+
+            elif op <= FOR_ITER:
+                if op == JUMP:
+                    ip = arg
+
+                elif op == POP_JUMP_IF_FALSE:
+                    value = pop()
+                    if value is None or value is False: ip = arg
+
+                elif op == JUMP_IF_FALSE:
+                    value = stack[-1]
+                    if value is None or value is False: ip = arg
+
+                elif op == JUMP_IF_TRUE:
+                    value = stack[-1]
+                    if value is not None and value is not False: ip = arg
+
+                else: # FOR_ITER
+                    slot, target = arg
+                    value = next(stack[base + slot], exhausted)
+                    if value is exhausted:
+                        ip = target
+                    else:
+                        stack[base + slot + 1] = value
+
+            elif op <= DIVIDE:
+                right = pop()
+                left = stack[-1]
+
+                if op == ADD:
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left + right
+                    elif type(left) is str and type(right) is str:
+                        stack[-1] = concat(left, right)
+                    else:
+                        stack[-1] = add(left, right, tokens[ip - 1])
+
+                elif op == SUBTRACT:
+                    if type(left) is not int or type(right) is not int:
+                        check_number_operands(tokens[ip - 1], left, right)
+                    stack[-1] = left - right
+
+                elif op == MULTIPLY:
+                    if type(left) is not int or type(right) is not int:
+                        check_number_operands(tokens[ip - 1], left, right)
+                    stack[-1] = left * right
+
+                else: # DIVIDE
+                    stack[-1] = divide(left, right, tokens[ip - 1])
+
+            elif op <= NOT_EQUAL:
+                right = pop()
+                left = stack[-1]
+
+                if op == EQUAL:
+                    stack[-1] = left == right
+                elif op == NOT_EQUAL:
+                    stack[-1] = left != right
+                else:
+                    check_number_operands(tokens[ip - 1], left, right)
+                    if op == LESS:
+                        stack[-1] = left < right
+                    elif op == LESS_EQUAL:
+                        stack[-1] = left <= right
+                    elif op == GREATER:
+                        stack[-1] = left > right
+                    else: # GREATER_EQUAL
+                        stack[-1] = left >= right
+
+            elif op <= COMMA:
+                if op == NOT:
+                    value = stack[-1]
+                    stack[-1] = value is None or value is False
+
+                elif op == NEGATE:
+                    value = stack[-1]
+                    check_number_operand(tokens[ip - 1], value)
+                    stack[-1] = -value
+
+                else: # COMMA
+                    right = pop()
+                    stack[-1] = comma(stack[-1], right)
+
+            elif op <= CLOSURE:
+                if op <= TAIL_CALL:
+                    callee = stack[-1 - arg]
+
+                    if type(callee) is VMClosure:
+                        function = callee.function
+                        if arg != function.arity:
+                            raise RuntimeError(tokens[ip - 1], f"Expected {function.arity} arguments but got {arg}.")
+
+                        if op == TAIL_CALL:
+                            # The callee & its arguments replace the current
+                            # frame's closure, arguments & locals
+                            if self.open_upvalues:
+                                self.close_upvalues(base)
+                            stack[base:] = stack[-1 - arg:]
+                            frame = frames[-1] = CallFrame(callee, 0, base)
+                        else:
+                            if len(frames) >= FRAMES_MAX:
+                                raise RuntimeError(tokens[ip - 1], "Stack overflow.")
+                            frame.ip = ip
+                            frame = CallFrame(callee, 0, len(stack) - arg - 1)
+                            frames.append(frame)
+
+                        closure = callee
+                        code, tokens = function.chunk.code, function.chunk.tokens
+                        ip, base = 0, frame.base
+
+                    elif isinstance(callee, SAGACallable):
+                        arity = callee.arity()
+                        # Handle variadic functions (arity -1) differently
+                        if arity != -1 and arg != arity:
+                            raise RuntimeError(tokens[ip - 1], f"Expected {arity} arguments but got {arg}.")
+
+                        start = len(stack) - arg
+                        arguments = stack[start:]
+                        del stack[start - 1:]
+                        frame.ip = ip
+                        try:
+                            push(callee.call(self, arguments))
+                        except RuntimeError as error:
+                            # A native's own error, reported at the call
+                            if error.token is None:
+                                error.token = tokens[ip - 1]
+                            raise
+
+                    else:
+                        raise RuntimeError(tokens[ip - 1], "Can only call functions or classes.")
+
+                elif op == RETURN:
+                    result = pop()
+                    if self.open_upvalues:
+                        self.close_upvalues(base)
+                    del stack[base:]
+                    frames.pop()
+
+                    if len(frames) == exit_depth:
+                        return result
+
+                    push(result)
+                    frame = frames[-1]
+                    closure = frame.closure
+                    code, tokens = closure.function.chunk.code, closure.function.chunk.tokens
+                    ip, base = frame.ip, frame.base
+
+                elif op == GET_UPVALUE:
+                    upvalue = closure.upvalues[arg]
+                    push(upvalue.cells[upvalue.index])
+
+                elif op == STORE_UPVALUE:
+                    upvalue = closure.upvalues[arg]
+                    upvalue.cells[upvalue.index] = pop()
+
+                else: # CLOSURE
+                    function, captures = arg
+                    upvalues = []
+                    for is_local, index in captures:
+                        if is_local:
+                            upvalues.append(self.capture_upvalue(base + index))
+                        else:
+                            upvalues.append(closure.upvalues[index])
+                    push(VMClosure(function, upvalues))
+
+            elif op <= END_SCOPE:
+                if op == POP:
+                    pop()
+
+                elif op == NIL:
+                    push(None)
+
+                elif op == TRUE:
+                    push(True)
+
+                elif op == FALSE:
+                    push(False)
+
+                elif op == RESERVE:
+                    stack.extend([None] * arg)
+
+                else: # END_SCOPE
+                    if self.open_upvalues:
+                        self.close_upvalues(len(stack) - arg)
+                    del stack[-arg:]
+
+            elif op == SET_LOCAL:
+                stack[base + arg] = stack[-1]
+
+            elif op == SET_GLOBAL:
+                if arg not in globals_:
+                    raise RuntimeError(tokens[ip - 1], f"Undefined variable '{arg}'.")
+                globals_[arg] = stack[-1]
+
+            elif op == SET_UPVALUE:
+                upvalue = closure.upvalues[arg]
+                upvalue.cells[upvalue.index] = stack[-1]
+
+            elif op == DEFINE_GLOBAL:
+                globals_[arg] = pop()
+
+            elif op == CLASS:
+                push(SAGAClass(arg))
+
+            elif op == SAY:
+                say(pop())
+
+            elif op == FOR_RANGE:
+                end = pop()
+                stack[-1] = iter(counted_range(stack[-1], end, tokens[ip - 1]))
+
+            elif op == SPAWN:
+                callee = stack[-1 - arg]
+                if type(callee) is not VMClosure:
+                    raise RuntimeError(tokens[ip - 1], "Can only spawn functions.")
+                if arg != callee.function.arity:
+                    raise RuntimeError(tokens[ip - 1], f"Expected {callee.function.arity} arguments but got {arg}.")
+                # The task's stack starts as the callee & its arguments, like a frame being called
+                task_stack = stack[-1 - arg:]
+                del stack[-1 - arg:]
+                self.scheduler.spawn(Task(task_stack, [CallFrame(callee, 0, 0)], []))
+
+            elif op == YIELD:
+                if exit_depth:
+                    raise RuntimeError(tokens[ip - 1], "Can't yield from a function called back by a native.")
+                frame.ip = ip
+                raise Yield(0)
+
+            else:
+                raise SystemError(f"Unknown opcode {op}.")
@@ -0,0 +1,130 @@
+"""Benchmark: function call overhead on the tree-walk & closure backends.
+
+Runs recursion heavy scripts and prints the time of each. With --compare REV
+the same scripts also run on the saga/ sources of a git revision for a
+before/after.
+
+CPython allocates frames in fixed size chunks, deep recursion that keeps
+crossing a chunk boundary runs up to ~3x slower depending only on how deep the
+stack already is. Each script is timed from several starting depths & the
+mean of the best times is reported so both sides pay their share.
+
+usage: python tools/bench_calls.py [--repeat N] [--compare REV]
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_parse_memory import ROOT, export_saga
+
+SCRIPTS = {
+    # Calls from a loop, the stack depth stays put
+    "flat calls": """
+fun step(total):
+    let next = total + 1
+    return next
+let total = 0
+for i in 0..60000:
+    total = step(total)
+say total
+""",
+    "fib": """
+fun fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+say fib(22)
+""",
+    # Walks an implicit binary tree of depth 14, locals in nested scopes
+    "tree walk": """
+fun walk(depth):
+    if depth == 0:
+        return 1
+    let left = walk(depth - 1)
+    let right = walk(depth - 1)
+    return left + right + 1
+say walk(14)
+""",
+    # Calls closures that capture their declaring call's locals
+    "closures": """
+fun adder(n):
+    fun add(x):
+        return x + n
+    return add
+let total = 0
+for i in 0..30000:
+    total = adder(i)(total)
+say total
+""",
+}
+
+
+# Extra Python frames under the interpreter, a few chunk boundaries' worth
+DEPTHS = range(0, 48, 3)
+
+
+def measure(saga_dir: str, repeat: int) -> dict:
+    """Runs in a fresh process so only the given saga sources are imported"""
+    sys.path.insert(0, saga_dir)
+    from saga import parse
+    from interpreter.interpreter import Interpreter
+    from interpreter.closure_interpreter import ClosureInterpreter
+
+    def best_time(interpreter_class: type, statements, resolution, depth: int) -> float:
+        if depth > 0:
+            return best_time(interpreter_class, statements, resolution, depth - 1)
+
+        times = []
+        for _ in range(repeat):
+            interpreter = interpreter_class()
+            resolution.apply(interpreter)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                interpreter.interpret(statements)
+                times.append(time.perf_counter() - start)
+        return min(times)
+
+    results = {}
+    for backend, interpreter_class in (("tree", Interpreter), ("closure", ClosureInterpreter)):
+        for name, source in SCRIPTS.items():
+            statements, resolution = parse(source)
+            results[f"{backend} {name}"] = statistics.mean(
+                best_time(interpreter_class, statements, resolution, depth) for depth in DEPTHS)
+    return results
+
+
+def run_measurement(saga_dir, repeat: int) -> dict:
+    output = subprocess.run([sys.executable, __file__, "--measure", str(saga_dir), "--repeat", str(repeat)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--repeat", type=int, default=2)
+    arg_parser.add_argument("--compare", metavar="REV", help="git revision to measure as the baseline")
+    arg_parser.add_argument("--measure", metavar="SAGA_DIR", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.repeat)))
+        sys.exit()
+
+    current = run_measurement(ROOT / "saga", args.repeat)
+    if not args.compare:
+        for name, seconds in current.items():
+            print(f"{name:<18} {seconds:>8.3f}s")
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as baseline:
+        before = run_measurement(export_saga(args.compare, baseline), args.repeat)
+
+    print(f"{'benchmark':<18} {args.compare:>9} {'current':>9} {'speedup':>8}")
+    for name, seconds in current.items():
+        print(f"{name:<18} {before[name]:>8.3f}s {seconds:>8.3f}s {before[name] / seconds:>7.2f}x")
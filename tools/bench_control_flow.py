@@ -0,0 +1,144 @@
+"""Microbenchmark: completion signals vs exceptions for break/continue/return.
+
+Runs recursive fib and break/continue heavy loops on the tree-walk
+Interpreter, then on a copy of it that still raises & catches exceptions the
+way it used to, and prints the best time of each.
+
+usage: python tools/bench_control_flow.py [repeat]
+"""
+import io
+import sys
+import time
+import contextlib
+from pathlib import Path
+from typing import override
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "saga"))
+
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from resolver.resolver import Resolver
+from interpreter.interpreter import Interpreter
+from callables.saga_callable import SAGAFunction
+from environment.environment import Environment
+
+FIB = """
+fun fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+say fib(20)
+"""
+
+BREAK_LOOP = """
+let total = 0
+let i = 0
+while i < 20000:
+    let j = 0
+    while true:
+        j = j + 1
+        if j > 3:
+            break
+    total = total + j
+    i = i + 1
+say total
+"""
+
+CONTINUE_LOOP = """
+let odd = 0
+let even = false
+let i = 0
+while i < 60000:
+    i = i + 1
+    even = !even
+    if even:
+        continue
+    odd = odd + 1
+say odd
+"""
+
+
+class BreakException(Exception):
+    pass
+
+class ContinueException(Exception):
+    pass
+
+class ReturnException(Exception):
+    def __init__(self, value: any):
+        self.value = value
+
+
+class ExceptionFunction(SAGAFunction):
+
+    @override
+    def call(self, interpreter, arguments):
+        env: Environment = Environment(self.closure, interpreter.slot_counts[self.declaration])
+        env.slots[:len(arguments)] = arguments
+
+        try:
+            interpreter.execute_block(self.declaration.body, env)
+        except ReturnException as return_value:
+            return return_value.value
+
+        return None
+
+
+class ExceptionInterpreter(Interpreter):
+    """The Interpreter with its former exception based control flow"""
+
+    @override
+    def visit_function(self, stmt):
+        self.declare(stmt, stmt.name, ExceptionFunction(stmt, self.env, self.slot_counts[stmt]))
+
+    @override
+    def visit_break(self, stmt):
+        raise BreakException()
+
+    @override
+    def visit_continue(self, stmt):
+        raise ContinueException()
+
+    @override
+    def visit_return(self, stmt):
+        value: any = None
+        if stmt.value is not None: value = self.evaluate(stmt.value)
+
+        raise ReturnException(value)
+
+    @override
+    def visit_while(self, stmt):
+        try:
+            while self.is_truthful(self.evaluate(stmt.condition)):
+                try:
+                    self.execute(stmt.body)
+                except ContinueException:
+                    continue
+                except BreakException:
+                    break
+        except BreakException:
+            pass
+        return None
+
+
+def best_time(interpreter_class: type, source: str, repeat: int) -> float:
+    statements = Parser(Lexer(source).lex_tokens()).parse()
+    times = []
+    for _ in range(repeat):
+        interpreter = interpreter_class()
+        Resolver(interpreter).resolve(statements)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            interpreter.interpret(statements)
+            times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"{'benchmark':<12} {'exceptions':>11} {'signals':>9} {'speedup':>8}")
+    for name, source in (("fib", FIB), ("break", BREAK_LOOP), ("continue", CONTINUE_LOOP)):
+        before = best_time(ExceptionInterpreter, source, repeat)
+        after = best_time(Interpreter, source, repeat)
+        print(f"{name:<12} {before:>10.3f}s {after:>8.3f}s {before / after:>7.2f}x")
@@ -0,0 +1,73 @@
+"""Benchmark: runs per second of a short script, from scratch vs through the Engine.
+
+"scratch" does what a host had to do before the embedding API: a new
+interpreter, the whole front end & interpret() on every run. "engine"
+compiles the script once & runs the Program, each run against fresh
+globals on a pooled interpreter.
+
+usage: python tools/bench_engine.py [--runs N] [--backend {tree,closure,vm}]
+"""
+import argparse
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "saga"))
+
+from saga import parse, BACKENDS, TREE, CLOSURE, VM_BACKEND
+from interpreter.interpreter import Interpreter
+from interpreter.closure_interpreter import ClosureInterpreter
+from compiler.compiler import Compiler
+from vm.vm import VM
+from engine.engine import Engine
+
+# A typical short hosted script: a few definitions, a loop & some output
+SCRIPT = """fun score(hits):
+    let total = 0
+    for i in 1..hits:
+        total = total + i * 2
+    return total
+
+let best = 0
+for round in 1..5:
+    let s = score(round)
+    if s > best:
+        best = s
+say "best score: " + best
+"""
+
+
+def from_scratch(backend: str):
+    statements, resolution = parse(SCRIPT)
+    if backend == VM_BACKEND:
+        VM().interpret(Compiler().compile(statements))
+        return
+    interpreter = ClosureInterpreter() if backend == CLOSURE else Interpreter()
+    resolution.apply(interpreter)
+    interpreter.interpret(statements)
+
+
+def runs_per_second(run, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        run()
+    return runs / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--runs", type=int, default=2000)
+    arg_parser.add_argument("--backend", choices=BACKENDS, default=TREE)
+    args = arg_parser.parse_args()
+
+    with redirect_stdout(io.StringIO()):
+        scratch = runs_per_second(lambda: from_scratch(args.backend), args.runs)
+
+    program = Engine(args.backend).compile(SCRIPT)
+    engine = runs_per_second(program.run, args.runs)
+
+    print(f"{args.backend} backend, {args.runs} runs")
+    print(f"scratch {scratch:>10.0f} runs/s")
+    print(f"engine  {engine:>10.0f} runs/s  ({engine / scratch:.1f}x)")
@@ -0,0 +1,141 @@
+"""Microbenchmark: call site inline caches.
+
+Runs call heavy scripts on the tree-walk and closure backends, then on copies
+of them whose visit_call does the full isinstance & arity checks on every call
+the way it used to, and prints the best time of each followed by the inline
+cache counters of each call site.
+
+usage: python tools/bench_inline_cache.py [repeat]
+"""
+import io
+import sys
+import time
+import contextlib
+from pathlib import Path
+from typing import override
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "saga"))
+
+from saga import parse
+from interpreter.interpreter import Interpreter
+from interpreter.closure_interpreter import ClosureInterpreter
+from callables.saga_callable import SAGACallable
+from errors.errors import RuntimeError
+
+FIB = """
+fun fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+say fib(20)
+"""
+
+# A native & a global function called from the same loop
+MONOMORPHIC = """
+fun add(a):
+    return a + 1
+let total = 0
+for i in 0..40000:
+    total = add(total) + clock() * 0
+say total
+"""
+
+# Two functions alternating at one call site
+POLYMORPHIC = """
+fun inc(a):
+    return a + 1
+fun dec(a):
+    return a - 1
+let total = 0
+let even = false
+for i in 0..40000:
+    even = !even
+    let f = inc
+    if even:
+        f = dec
+    total = f(total)
+say total
+"""
+
+
+class UncachedInterpreter(Interpreter):
+    """The Interpreter with its former visit_call"""
+
+    @override
+    def visit_call(self, expr):
+        callee: any = self.evaluate(expr.callee)
+        if not isinstance(callee, SAGACallable):
+            raise RuntimeError(expr.paren, "Can only call functions or classes.")
+
+        arguments: list[any] = []
+        for arg in expr.arguments:
+            arguments.append(self.evaluate(arg))
+
+        function: SAGACallable = callee
+
+        # Handle variadic functions (arity -1) differently
+        if function.arity() != -1 and len(arguments) != function.arity():
+            raise RuntimeError(expr.paren, f"Expected {function.arity()} arguments but got {len(arguments)}.")
+
+        return function.call(self, arguments)
+
+
+class UncachedClosureInterpreter(ClosureInterpreter):
+    """The ClosureInterpreter with its former visit_call"""
+
+    @override
+    def visit_call(self, call):
+        callee = self.compile_expr(call.callee)
+        arguments = [self.compile_expr(argument) for argument in call.arguments]
+        paren = call.paren
+        interpreter = self
+
+        def call_(env):
+            function = callee(env)
+            if not isinstance(function, SAGACallable):
+                raise RuntimeError(paren, "Can only call functions or classes.")
+
+            values = [argument(env) for argument in arguments]
+
+            # Handle variadic functions (arity -1) differently
+            arity = function.arity()
+            if arity != -1 and len(values) != arity:
+                raise RuntimeError(paren, f"Expected {arity} arguments but got {len(values)}.")
+
+            return function.call(interpreter, values)
+        return call_
+
+
+def best_time(interpreter_class: type, source: str, repeat: int):
+    statements, resolution = parse(source)
+    times = []
+    for _ in range(repeat):
+        interpreter = interpreter_class()
+        resolution.apply(interpreter)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            interpreter.interpret(statements)
+            times.append(time.perf_counter() - start)
+    return min(times), interpreter
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    backends = (("tree", UncachedInterpreter, Interpreter),
+                ("closure", UncachedClosureInterpreter, ClosureInterpreter))
+    scripts = (("fib", FIB), ("monomorphic", MONOMORPHIC), ("polymorphic", POLYMORPHIC))
+
+    print(f"{'benchmark':<20} {'uncached':>9} {'cached':>8} {'speedup':>8}")
+    counters = {}
+    for backend, uncached, cached in backends:
+        for name, source in scripts:
+            before, _ = best_time(uncached, source, repeat)
+            after, interpreter = best_time(cached, source, repeat)
+            counters[backend + " " + name] = interpreter.call_site_stats()
+            print(f"{backend + ' ' + name:<20} {before:>8.3f}s {after:>7.3f}s {before / after:>7.2f}x")
+
+    print(f"\n{'call site':<28} hits/misses")
+    for name, stats in counters.items():
+        for site, stat in stats.items():
+            print(f"{name + ' ' + site:<28} {stat['hits']}/{stat['misses']} callees={stat['callees']}"
+                  f"{' megamorphic' if stat['megamorphic'] else ''}")
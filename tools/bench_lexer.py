@@ -0,0 +1,45 @@
+"""Benchmark: lexer throughput in tokens per second.
+
+Lexes a synthetic script (see bench_parse_memory.py) with the table-driven
+Lexer and the character by character ReferenceLexer and prints the best
+throughput of each.
+
+usage: python tools/bench_lexer.py [--lines N] [--repeat N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "saga"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from lexer.lexer import Lexer
+from lexer.reference_lexer import ReferenceLexer
+from bench_parse_memory import synthetic_script
+
+
+def tokens_per_second(lexer_class: type, source: str, repeat: int) -> tuple[int, float]:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = lexer_class(source).lex_tokens()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(tokens), len(tokens) / best
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--lines", type=int, default=20_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    source = synthetic_script(args.lines)
+    count, reference = tokens_per_second(ReferenceLexer, source, args.repeat)
+    _, table = tokens_per_second(Lexer, source, args.repeat)
+
+    print(f"{args.lines} lines, {count} tokens")
+    print(f"reference lexer {reference:>12,.0f} tokens/s")
+    print(f"lexer           {table:>12,.0f} tokens/s")
+    print(f"speedup         {table / reference:>12.2f}x")
@@ -0,0 +1,116 @@
+"""Benchmark: parse time and peak memory of a 50k line synthetic script.
+
+Lexes & parses the script with the current tree, keeping the tokens and the
+AST alive, and reports the best parse time and the tracemalloc peak. With
+--compare REV the same measurement also runs on the saga/ sources of a git
+revision (e.g. the commit before the AST became slotted) for a before/after.
+With --streaming, trees whose Lexer has tokenize() feed the parser the token
+stream instead, as saga.parse does, and only the AST is kept alive.
+
+usage: python tools/bench_parse_memory.py [--lines N] [--repeat N] [--compare REV] [--streaming]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 10 lines exercising declarations, control flow, calls & operators
+TEMPLATE = """fun f{i}(a):
+    let b = a * 2 + {i}
+    if b > 10 and a != nil:
+        b = b - (1 + a) / 2
+    else:
+        b = b + 1
+    return b
+let v{i} = f{i}({i})
+for j in 0..3:
+    say "v{i} " + v{i} + j
+"""
+
+
+def synthetic_script(lines: int) -> str:
+    return "".join(TEMPLATE.format(i=i) for i in range(lines // TEMPLATE.count("\n")))
+
+
+def measure(saga_dir: str, source: str, repeat: int, streaming: bool) -> dict:
+    """Runs in a fresh process so only the given saga sources are imported"""
+    sys.path.insert(0, saga_dir)
+    from lexer.lexer import Lexer
+    from parser.parser import Parser
+
+    def parse():
+        if streaming and hasattr(Lexer, "tokenize"):
+            statements = Parser(Lexer(source).tokenize()).parse()
+            return None, statements
+        tokens = Lexer(source).lex_tokens()
+        return tokens, Parser(tokens).parse()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse()
+        times.append(time.perf_counter() - start)
+        del result
+
+    tracemalloc.start()
+    tokens, statements = parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"mode": "list" if tokens is not None else "stream", "statements": len(statements),
+            "parse_seconds": min(times), "peak_bytes": peak}
+
+
+def export_saga(rev: str, directory: str) -> Path:
+    """Extracts the saga/ sources of a git revision, returns the extracted saga directory"""
+    archive = subprocess.run(["git", "-C", str(ROOT), "archive", rev, "saga"], check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", directory], input=archive, check=True)
+    return Path(directory) / "saga"
+
+
+def run_measurement(saga_dir: Path, lines: int, repeat: int, streaming: bool) -> dict:
+    command = [sys.executable, __file__, "--measure", str(saga_dir), "--lines", str(lines), "--repeat", str(repeat)]
+    if streaming:
+        command.append("--streaming")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def report(name: str, result: dict):
+    print(f"{name:<10} {result['mode']:>6} {result['parse_seconds']:>8.3f}s "
+          f"{result['peak_bytes'] / 2**20:>9.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--lines", type=int, default=50_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--compare", metavar="REV", help="git revision to measure as the baseline")
+    arg_parser.add_argument("--streaming", action="store_true", help="parse from Lexer.tokenize() when available")
+    arg_parser.add_argument("--measure", metavar="SAGA_DIR", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, synthetic_script(args.lines), args.repeat, args.streaming)))
+        sys.exit()
+
+    print(f"{args.lines} line script")
+    results = {}
+    if args.compare:
+        with tempfile.TemporaryDirectory() as baseline:
+            results[args.compare] = run_measurement(export_saga(args.compare, baseline), args.lines, args.repeat, args.streaming)
+            report(args.compare, results[args.compare])
+
+    results["current"] = run_measurement(ROOT / "saga", args.lines, args.repeat, args.streaming)
+    report("current", results["current"])
+
+    if args.compare:
+        before, after = results[args.compare], results["current"]
+        print(f"parse time {before['parse_seconds'] / after['parse_seconds']:.2f}x faster, "
+              f"peak memory {1 - after['peak_bytes'] / before['peak_bytes']:.0%} lower")
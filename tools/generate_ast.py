@@ -13,6 +13,7 @@ def define_ast(output_dir: str, base_name: str, types: list[str]):
             case "Stmt":
                 f.write("from expr.expr import Expr\n\n")
         f.write(f'class {base_name}(ABC):\n')
+        f.write(f'  __slots__ = ()\n\n')
         f.write(f'  @abstractmethod\n')
         f.write(f'  def accept(self, visitor: "Visitor"):\n')
         f.write(f'      pass\n\n')
@@ -31,6 +32,13 @@ def define_ast(output_dir: str, base_name: str, types: list[str]):
 
 def define_type(f, base_name: str, class_name: str, field_list: list[str] = None):
     f.write(f'class {class_name}({base_name}):\n')
+
+    # slotted, nodes don't carry a __dict__ around
+    if field_list:
+        names = [field.split(':')[0].strip() for field in field_list.split(',')]
+        f.write(f'  __slots__ = {tuple(names)!r}\n\n')
+    else:
+        f.write(f'  __slots__ = ()\n\n')
     
     # constructor
     if field_list:
@@ -67,17 +75,17 @@ if __name__ == "__main__":
     
     output_dir = args[1]
 
-    # define_ast(output_dir, "Expr", [
-    #     "Assign     | name: Token, value: Expr",
-    #     "Binary     | left: Expr, operator: Token, right: Expr",
-    #     "Call       | callee: Expr, paren: Token, arguments: list[Expr]",
-    #     "Grouping   | expression: Expr",
-    #     "Literal    | value: any",
-    #     "Logical    | left: Expr, operator: Token, right: Expr",
-    #     "Ternary    | condition: Expr, then_branch: Expr, else_branch: Expr",
-    #     "Unary      | operator: Token, right: Expr",
-    #     "Variable   | name: Token"
-    # ])
+    define_ast(output_dir, "Expr", [
+        "Assign     | name: Token, value: Expr",
+        "Binary     | left: Expr, operator: Token, right: Expr",
+        "Call       | callee: Expr, paren: Token, arguments: list[Expr]",
+        "Grouping   | expression: Expr",
+        "Literal    | value: any",
+        "Logical    | left: Expr, operator: Token, right: Expr",
+        "Ternary    | condition: Expr, then_branch: Expr, else_branch: Expr",
+        "Unary      | operator: Token, right: Expr",
+        "Variable   | name: Token"
+    ])
 
     define_ast(output_dir, "Stmt", [
         "Block      | statements: list[Stmt]",
@@ -89,7 +97,10 @@ if __name__ == "__main__":
         "Return     | keyword: Token, value: Expr",
         "Let        | name: Token, initializer: Expr",
         "While      | condition: Expr, body: Stmt",
-        "Break",
-        "Continue",
-        "Pass"
+        "ForRange   | name: Token, start: Expr, end: Expr, body: Stmt",
+        "Break      | keyword: Token",
+        "Continue   | keyword: Token",
+        "Pass",
+        "Spawn      | keyword: Token, call: Expr",
+        "Yield      | keyword: Token"
     ])
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""Differential check of the table-driven Lexer against the ReferenceLexer.
+
+Lexes every given script (all of examples/*.saga by default) with both
+lexers and compares the token streams field by field, along with the errors
+they report. Exits with status 1 on the first script where they differ.
+
+--fuzz N does the same on N generated sources instead: random runs of
+fragments covering indentation & dedents, strings (multi-line and
+unterminated), line & nested block comments, numbers, every keyword and
+operator, and non-ASCII letters, digits & symbols. The seed is printed, the
+failing source too, so a mismatch can be replayed with --seed. Sources the
+reference lexer crashes on are only checked to lex without an exception,
+the Lexer reports an error there instead.
+
+usage: python tools/lexer_diff.py [script ...]
+       python tools/lexer_diff.py --fuzz N [--seed SEED] [--max-fragments M]
+"""
+import argparse
+import io
+import random
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "saga"))
+
+from lexer.lexer import Lexer, KEYWORDS, OPERATORS
+from lexer.reference_lexer import ReferenceLexer
+from errors.errors import Diagnostics
+
+# What generated sources are made of, each fragment about as likely as the others
+FRAGMENTS = [
+    # indentation, blank lines & line endings
+    "\n", "\n", "\n    ", "\n        ", "\n  ", "\n\n", "    ", "\t", " ", "\r\n", "\r",
+    # strings, multi-line ones too
+    '"text"', '""', '"a\nb"', '"é名"', '"/* not a comment */"', '"// nor this"',
+    # comments, nested & unterminated block comments
+    "// comment", "//", "/*", "*/", "/* block */", "/* a\n b */", "/* /* nested */ */", "#",
+    # numbers & ranges
+    "0", "42", "1.5", "12.", ".5", "1..3", "007",
+    # identifiers
+    "x", "name_1", "_", "a1b2",
+    # non-ASCII letters, digits, symbols & spaces
+    "é", "ñame", "名前", "٣", "½", "€", "\U0001f600", "Ω",
+    " ", " ",
+    # anything else
+    "[", "]", "@", "$", ";", "\\", "'",
+] + [keyword + " " for keyword in KEYWORDS] + list(OPERATORS)
+
+# Fragments the reference lexer crashes on (an unterminated string at the end of
+# the source, a digit int() can't parse, braces), only drawn now & then so most
+# sources can still be compared
+CRASHING_FRAGMENTS = ['"', "²", "{", "}"]
+CRASHING_ODDS = 0.005
+
+
+def lex(lexer_class: type, source: str) -> tuple[list[tuple], list[str]]:
+    """Token fields & reported errors of one lexer run"""
+    diagnostics = Diagnostics(echo=False)
+    tokens = lexer_class(source, diagnostics).lex_tokens()
+    fields = [(token.type, token.lexeme, token.literal, token.line, token.column) for token in tokens]
+    return fields, [str(diagnostic) for diagnostic in diagnostics.entries]
+
+
+def compare(name: str, source: str, expected: tuple[list[tuple], list[str]]) -> bool:
+    """Lexes source with the Lexer & reports the first difference with the reference's tokens & errors"""
+    expected_tokens, expected_errors = expected
+    actual, actual_errors = lex(Lexer, source)
+
+    for index, (want, got) in enumerate(zip(expected_tokens, actual)):
+        if want != got:
+            print(f"{name}: token {index} differs\n  reference: {want}\n  lexer:     {got}")
+            return False
+    if len(expected_tokens) != len(actual):
+        print(f"{name}: {len(expected_tokens)} tokens from the reference, {len(actual)} from the lexer")
+        return False
+    if expected_errors != actual_errors:
+        print(f"{name}: errors differ\n  reference: {expected_errors!r}\n  lexer:     {actual_errors!r}")
+        return False
+    return True
+
+
+def diff(path: Path) -> bool:
+    source = path.read_text()
+    if not compare(str(path), source, lex(ReferenceLexer, source)):
+        return False
+    print(f"{path}: tokens match")
+    return True
+
+
+def generate(generator: random.Random, max_fragments: int) -> str:
+    fragments = []
+    for _ in range(generator.randint(0, max_fragments)):
+        pool = CRASHING_FRAGMENTS if generator.random() < CRASHING_ODDS else FRAGMENTS
+        fragments.append(generator.choice(pool))
+    return "".join(fragments)
+
+
+def fuzz(count: int, seed: int, max_fragments: int) -> bool:
+    generator = random.Random(seed)
+    print(f"fuzzing {count} sources, seed {seed}")
+
+    lexed_only = 0
+    for number in range(count):
+        source = generate(generator, max_fragments)
+        name = f"source {number}"
+        try:
+            # The reference lexer prints some of its errors itself
+            with redirect_stdout(io.StringIO()):
+                expected = lex(ReferenceLexer, source)
+        except Exception:
+            expected = None
+
+        try:
+            if expected is None:
+                lexed_only += 1
+                lex(Lexer, source)
+                continue
+            if compare(name, source, expected):
+                continue
+        except Exception as error:
+            print(f"{name}: the lexer raised {error!r}")
+        print(f"  source:    {source!r}\n  replay with --seed {seed}")
+        return False
+
+    print(f"{count - lexed_only} sources match, {lexed_only} only lexed (the reference lexer crashes on them)")
+    return True
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("scripts", nargs="*", type=Path, help="scripts to compare, examples/*.saga by default")
+    arg_parser.add_argument("--fuzz", type=int, metavar="N", help="compare N generated sources instead")
+    arg_parser.add_argument("--seed", type=int, help="seed of the generated sources, random by default")
+    arg_parser.add_argument("--max-fragments", type=int, default=40, metavar="M",
+                            help="longest generated source, in fragments")
+    args = arg_parser.parse_args()
+
+    if args.fuzz is not None:
+        seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+        if not fuzz(args.fuzz, seed, args.max_fragments):
+            sys.exit(1)
+    else:
+        paths = args.scripts or sorted((ROOT / "examples").glob("*.saga"))
+        if not all(diff(path) for path in paths):
+            sys.exit(1)